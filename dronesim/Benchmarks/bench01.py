@@ -0,0 +1,42 @@
+"""
+Benchmark n°1 : nombre de commandes exécutées par seconde selon le visualiseur
+(VIEWER_CONSOLE, avec sa pause après chaque commande, et les modes sans
+visualisation VIEWER_NONE et VIEWER_RECORD).
+"""
+import contextlib
+import io
+import time
+from dronecmds import *
+
+def program(n:int) :
+    """
+    Programme de test : le drone décolle puis parcourt n côtés d'un carré de 100 cm.
+    :param n: nombre de côtés à parcourir (soit 2*n commandes)
+    """
+    locate(200, 200, 90)
+    takeOff()
+    for _ in range(n) :
+        forward(100)
+        rotateLeft(90)
+    land()
+
+def bench(viewerId:str, n:int) -> float :
+    """
+    Exécute le programme de test avec le visualiseur donné.
+    :param viewerId: le visualiseur
+    :param n: nombre de côtés à parcourir
+    :return: le nombre de commandes par seconde
+    """
+    with contextlib.redirect_stdout(io.StringIO()) :
+        createRoom("(0 0, 500 0, 500 1000, 0 1000, 0 0)", 300)
+        createTargetIn(200, 200, 150, 300, 300, 200)
+        createDrone(DRONE_VIRTUAL, viewerId)
+        start = time.perf_counter()
+        program(n)
+        duration = time.perf_counter() - start
+    return (2*n+3) / duration
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°1 : commandes par seconde selon le visualiseur.")
+    for viewerId, n in ((VIEWER_CONSOLE, 4), (VIEWER_NONE, 20000), (VIEWER_RECORD, 20000)) :
+        print("{:<15} {:>12.1f} commands/s".format(viewerId, bench(viewerId, n)))
@@ -0,0 +1,64 @@
+"""
+Benchmark n°2 : nombre de pas de simulation (un drone, une commande) par seconde,
+avec N objets DroneVirtual commandés un par un, puis avec un lot DroneBatch.
+"""
+import time
+import numpy as np
+from dronecore.roomshply import RoomShp
+from dronecore.dronevirt import *
+from dronecore.dronebatch import DroneBatch
+
+ROOM = "(0 0, 10000 0, 10000 10000, 0 10000, 0 0)"
+
+def commands(n:int, steps:int, seed:int=0) :
+    """
+    Tire une suite de commandes aléatoires (rotations et déplacements) pour n drones.
+    :return: les opcodes et les quantités, sous forme de tableaux (steps, n)
+    """
+    rng = np.random.default_rng(seed)
+    choices = np.array([DroneBatch.opcode(c) for c in (CommandType.CMD_FORWARD, CommandType.CMD_BACKWARD,
+                        CommandType.CMD_GOLEFT, CommandType.CMD_GORIGHT, CommandType.CMD_ROTATELEFT,
+                        CommandType.CMD_ROTATERIGHT, CommandType.CMD_GOUP, CommandType.CMD_GODOWN)])
+    ops = rng.choice(choices, size=(steps, n))
+    amounts = rng.integers(20, 120, size=(steps, n))
+    return ops, amounts
+
+def benchVirtual(room:RoomShp, n:int, steps:int) -> float :
+    ops, amounts = commands(n, steps)
+    names = {DroneBatch.opcode(c): name for c, name in ((CommandType.CMD_FORWARD, "forward"),
+             (CommandType.CMD_BACKWARD, "backward"), (CommandType.CMD_GOLEFT, "goLeft"),
+             (CommandType.CMD_GORIGHT, "goRight"), (CommandType.CMD_ROTATELEFT, "rotateLeft"),
+             (CommandType.CMD_ROTATERIGHT, "rotateRight"), (CommandType.CMD_GOUP, "goUp"),
+             (CommandType.CMD_GODOWN, "goDown"))}
+    drones = []
+    for i in range(n) :
+        d = DroneVirtual()
+        d.viewer = ViewerNone(d, room)
+        d.locate(5000, 5000, 0, room)
+        d.takeOff()
+        drones.append(d)
+    start = time.perf_counter()
+    for s in range(steps) :
+        for i, d in enumerate(drones) :
+            try :
+                getattr(d, names[ops[s, i]])(int(amounts[s, i]))
+            except Exception :
+                pass
+    return n*steps / (time.perf_counter() - start)
+
+def benchBatch(room:RoomShp, n:int, steps:int) -> float :
+    ops, amounts = commands(n, steps)
+    batch = DroneBatch(n, room)
+    batch.locate(5000, 5000, 0)
+    batch.apply(CommandType.CMD_TAKEOFF)
+    start = time.perf_counter()
+    for s in range(steps) :
+        batch.apply(ops[s], amounts[s])
+    return n*steps / (time.perf_counter() - start)
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°2 : pas de simulation (drone x commande) par seconde.")
+    room = RoomShp(ROOM, 300)
+    print("{:<25} {:>12.0f} drone-steps/s".format("DroneVirtual (N=1000)", benchVirtual(room, 1000, 20)))
+    for n in (1000, 10000, 100000) :
+        print("{:<25} {:>12.0f} drone-steps/s".format("DroneBatch (N={})".format(n), benchBatch(room, n, 20)))
@@ -0,0 +1,56 @@
+"""
+Benchmark n°3 : coût d'une recherche de collision avec les murs (intersectWall2),
+avec l'ancienne méthode shapely (un LineString et une intersection par déplacement)
+et avec les segments précalculés de WallSegments, selon le nombre de murs.
+"""
+import time
+import numpy as np
+from shapely import LineString, intersection
+from dronecore.roomshply import RoomShp
+from dronecore.envgeo import Position
+
+def starRoom(n:int, seed:int=0) -> RoomShp :
+    """
+    Crée une pièce en étoile (polygone simple) de n murs, centrée en (5000, 5000).
+    """
+    rng = np.random.default_rng(seed)
+    angles = np.linspace(0, 2*np.pi, n, endpoint=False)
+    radius = rng.uniform(3000, 5000, n)
+    pts = [(5000+r*np.cos(a), 5000+r*np.sin(a)) for a, r in zip(angles, radius)]
+    return RoomShp(tuple(pts+pts[:1]), 300)
+
+def shapelyHit(room:RoomShp, p1:Position, p2:Position) -> Position|None :
+    """
+    L'ancienne implémentation de intersectWall2, basée sur shapely.
+    """
+    g = intersection(LineString([(p1.x, p1.y), (p2.x, p2.y)]), room.geometry.exterior)
+    if g.is_empty :
+        return None
+    return Position(x=g.coords[0][0], y=g.coords[0][1], z=p1.z) if g.geom_type == "Point" else Position(z=p1.z)
+
+def moves(k:int, seed:int=1) -> list[tuple[Position, Position]] :
+    rng = np.random.default_rng(seed)
+    x, y = rng.uniform(1000, 9000, k), rng.uniform(1000, 9000, k)
+    a = rng.uniform(0, 2*np.pi, k)
+    return [(Position(x[i], y[i]), Position(x[i]+500*np.cos(a[i]), y[i]+500*np.sin(a[i]))) for i in range(k)]
+
+def timeit(f, segments) -> float :
+    start = time.perf_counter()
+    for p1, p2 in segments :
+        f(p1, p2)
+    return (time.perf_counter() - start) / len(segments) * 1e6
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°3 : intersectWall2, en µs par déplacement.")
+    segments = moves(5000)
+    print("{:>8} {:>12} {:>12} {:>14}".format("walls", "shapely", "WallSegments", "batch (5000)"))
+    for n in (4, 10, 100, 1000) :
+        room = starRoom(n)
+        tOld = timeit(lambda p1, p2 : shapelyHit(room, p1, p2), segments)
+        tNew = timeit(room.intersectWall2, segments)
+        xa = np.array([p.x for p, _ in segments]); ya = np.array([p.y for p, _ in segments])
+        xb = np.array([p.x for _, p in segments]); yb = np.array([p.y for _, p in segments])
+        start = time.perf_counter()
+        room.walls.firstHits(xa, ya, xb, yb)
+        tBatch = (time.perf_counter() - start) / len(segments) * 1e6
+        print("{:>8} {:>12.2f} {:>12.2f} {:>14.3f}".format(n, tOld, tNew, tBatch))
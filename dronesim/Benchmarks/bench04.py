@@ -0,0 +1,62 @@
+"""
+Benchmark n°4 : pièces de 10, 1 000 et 100 000 murs, avec et sans index des murs
+(construction de la pièce, intersectWall2 et getRandomPosition : le premier tirage,
+qui peut construire la triangulation de la pièce, et les tirages suivants).
+"""
+import time
+import numpy as np
+from shapely import Point, Polygon
+from dronecore.roomshply import RoomShp
+from dronecore.envgeo import Position
+
+def starOutline(n:int, seed:int=0) -> tuple :
+    """
+    Contour ondulé (polygone simple) de n murs d'environ 50 cm, centré en (0, 0) : la
+    taille de la pièce croît avec le nombre de murs, comme pour un plan de bâtiment.
+    :return: le contour et le rayon moyen de la pièce
+    """
+    rng = np.random.default_rng(seed)
+    angles = np.linspace(0, 2*np.pi, n, endpoint=False)
+    r = max(n*50/(2*np.pi), 300)
+    radius = r*(1 + 0.1*np.sin(5*angles) + 0.02*np.sin(37*angles)) + rng.uniform(-2, 2, n)
+    pts = [(rd*np.cos(a), rd*np.sin(a)) for a, rd in zip(angles, radius)]
+    return tuple(pts+pts[:1]), r
+
+def nearWallMoves(r:float, k:int, seed:int=1) -> list[tuple[Position, Position]] :
+    """
+    Tire k déplacements de 500 cm, la moitié au centre de la pièce et l'autre moitié
+    près des murs (le cas le plus coûteux).
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.uniform(0, 2*np.pi, k)
+    d = np.where(np.arange(k) % 2 == 0, rng.uniform(0, 0.5*r, k), rng.uniform(0.85*r, 1.1*r, k))
+    h = rng.uniform(0, 2*np.pi, k)
+    x, y = d*np.cos(a), d*np.sin(a)
+    return [(Position(x[i], y[i]), Position(x[i]+500*np.cos(h[i]), y[i]+500*np.sin(h[i]))) for i in range(k)]
+
+def duration(f, repeat:int=1) -> float :
+    start = time.perf_counter()
+    for _ in range(repeat) :
+        f()
+    return (time.perf_counter() - start) / repeat
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°4 : index des murs selon la taille de la pièce.")
+    print("{:>8} {:>6} {:>12} {:>18} {:>18} {:>18}".format("walls", "index", "build (ms)", "intersectWall2 (µs)",
+                                                           "first random (µs)", "next random (µs)"))
+    for n in (10, 1000, 100000) :
+        outline, r = starOutline(n)
+        segments = nearWallMoves(r, 2000)
+        for index in (False, True) :
+            build = duration(lambda : RoomShp(outline, 300, wallIndex=index))
+            room = RoomShp(outline, 300, wallIndex=index)
+            k = len(segments) if n < 100000 or index else 200
+            hit = duration(lambda : [room.intersectWall2(p1, p2) for p1, p2 in segments[:k]]) / k
+            first = duration(room.getRandomPosition)
+            rnd = duration(room.getRandomPosition, 200)
+            print("{:>8} {:>6} {:>12.2f} {:>18.2f} {:>18.2f} {:>18.2f}".format(n, str(index), build*1e3, hit*1e6,
+                                                                             first*1e6, rnd*1e6))
+        # containment test without prepared geometry, as before the index
+        polygon = Polygon(outline)
+        rnd = duration(lambda : polygon.contains(Point(0, 0)), 50)
+        print("{:>8} {:>6} {:>12} {:>18} {:>18} {:>18.2f}  (one unprepared contains)".format(n, "-", "-", "-", "-", rnd*1e6))
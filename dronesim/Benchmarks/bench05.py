@@ -0,0 +1,48 @@
+"""
+Benchmark n°5 : tirage de positions aléatoires dans des pièces de formes diverses,
+par rejet (l'ancienne méthode) et par triangulation (getRandomPosition et
+getRandomPositions, qui tire K positions d'un coup).
+"""
+import time
+from random import uniform
+from shapely import Point
+from dronecore.roomshply import RoomShp
+from dronecore.envgeo import Position
+
+ROOMS = {
+    "square" : "(0 0, 1000 0, 1000 1000, 0 1000, 0 0)",
+    "thin L" : "(0 0, 5000 0, 5000 50, 50 50, 50 5000, 0 5000, 0 0)",
+    "corridor" : "(0 0, 10000 10000, 10000 10060, 0 60, 0 0)",
+    "ring" : "(0 0, 1000 0, 1000 1000, 0 1000, 0 0), (20 20, 980 20, 980 980, 20 980, 20 20)",
+}
+
+def rejection(room:RoomShp) -> Position :
+    """
+    Tirage par rejet, comme le faisait getRandomPosition.
+    """
+    [xmin, ymin, xmax, ymax] = room.geometry.bounds
+    pt = Point(uniform(xmin, xmax), uniform(ymin, ymax))
+    while not room.geometry.contains(pt):
+        pt = Point(uniform(xmin, xmax), uniform(ymin, ymax))
+    return Position(pt.x, pt.y, uniform(0,room.getHeight()))
+
+def duration(f, repeat:int=1) -> float :
+    start = time.perf_counter()
+    for _ in range(repeat) :
+        f()
+    return (time.perf_counter() - start) / repeat
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°5 : positions aléatoires, en µs par position.")
+    print("{:>10} {:>10} {:>12} {:>18} {:>22}".format("room", "accept", "rejection", "getRandomPosition",
+                                                      "getRandomPositions(K)"))
+    K = 100000
+    for name, description in ROOMS.items() :
+        room = RoomShp(description, 250)
+        room.getRandomPosition() # triangulation
+        [xmin, ymin, xmax, ymax] = room.geometry.bounds
+        accept = room.geometry.area / ((xmax-xmin)*(ymax-ymin))
+        old = duration(lambda : rejection(room), 200)
+        new = duration(room.getRandomPosition, 2000)
+        batch = duration(lambda : room.getRandomPositions(K, seed=1)) / K
+        print("{:>10} {:>9.1f}% {:>12.2f} {:>18.2f} {:>22.3f}".format(name, 100*accept, old*1e6, new*1e6, batch*1e6))
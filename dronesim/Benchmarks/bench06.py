@@ -0,0 +1,71 @@
+"""
+Benchmark n°6 : temps de rendu d'une image (backend Agg) au fil d'un long vol, en
+ajoutant des artistes à chaque commande (l'ancien affichage de ViewerTkMPL) ou en
+mettant à jour les mêmes artistes (FlightArtists, l'affichage incrémental).
+"""
+import time
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from math import cos, sin
+from random import Random
+from dronecore.roomshply import RoomShp
+from dronecore.envgeo import Position
+from mplext import FlightArtists
+
+def flight(n:int, seed:int=0) -> list[Position] :
+    """
+    Une promenade aléatoire de n déplacements dans un carré de 1000 cm.
+    """
+    rng = Random(seed)
+    points = [Position(500, 500, 80, 0)]
+    for _ in range(n) :
+        p = points[-1]
+        h = p.heading + rng.choice((-1, 0, 1))*0.8
+        x = min(max(p.x + 100*cos(h), 20), 980)
+        y = min(max(p.y + 100*sin(h), 20), 980)
+        points.append(Position(x, y, min(max(p.z + rng.choice((-20, 0, 20)), 20), 230), h))
+    return points
+
+def scene(room:RoomShp) :
+    fig, ax = plt.subplots(1, 1, subplot_kw={"projection": "3d"}, dpi=70, figsize=(4, 4))
+    ax.set_xlim(-0.5, room.getLengthX() + 0.5)
+    ax.set_ylim(-0.5, room.getLengthY() + 0.5)
+    ax.set_zlim(-0.5, room.getHeight() + 0.5)
+    x, y, z = room.getWalls2D()
+    ax.plot(x, y, z, color=(.8, .4, .4), linewidth=5)
+    return fig, ax
+
+def addArtists(ax, p1:Position, p2:Position) :
+    """
+    L'ancien affichage : de nouveaux artistes pour chaque commande.
+    """
+    ax.plot([p2.x, p2.x], [p2.y, p2.y], [p2.z, 0], color=(.8, .8, .8), linewidth=1)
+    ax.plot([p1.x, p2.x], [p1.y, p2.y], [p1.z, p2.z], color=(.2, .5, .2), alpha=0.8, linestyle="--", linewidth=2)
+    dx, dy = 50.0*cos(p2.heading), 50.0*sin(p2.heading)
+    ax.arrow3D(p2.x - dx/2, p2.y - dy/2, p2.z, dx, dy, 0, mutation_scale=15, ec='green', fc=(.2, .7, .2))
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°6 : temps de rendu d'une image (ms) selon le nombre de commandes déjà affichées.")
+    room = RoomShp("(0 0, 1000 0, 1000 1000, 0 1000, 0 0)", 250)
+    points = flight(200)
+    checkpoints = (10, 50, 100, 200)
+    results = {}
+    for mode in ("new artists", "in place") :
+        fig, ax = scene(room)
+        artists = FlightArtists(ax) if mode == "in place" else None
+        times = []
+        for i in range(1, len(points)) :
+            start = time.perf_counter()
+            if artists is None :
+                addArtists(ax, points[i-1], points[i])
+            else :
+                artists.update(points[i-1], points[i])
+            fig.canvas.draw()
+            if i in checkpoints :
+                times.append((time.perf_counter() - start)*1e3)
+        results[mode] = times
+        plt.close(fig)
+    print("{:>12} ".format("commands")+" ".join("{:>8}".format(c) for c in checkpoints))
+    for mode, times in results.items() :
+        print("{:>12} ".format(mode)+" ".join("{:>8.1f}".format(t) for t in times))
@@ -0,0 +1,56 @@
+"""
+Benchmark n°7 : enregistrement d'une trajectoire d'un million de pas (coût par
+commande, mémoire par pas, sauvegarde et chargement du fichier .npz).
+"""
+import os
+import tempfile
+import time
+from dronecore.roomshply import RoomShp
+from dronecore.dronevirt import *
+from dronecore.trajectory import TrajectoryRecorder
+
+def fly(drone:DroneVirtual, n:int) :
+    """
+    Un vol de n commandes qui tourne en rond dans la pièce.
+    """
+    for i in range(n) :
+        if i % 4 == 3 :
+            drone.rotateLeft(90)
+        else :
+            drone.forward(100)
+
+def newDrone(room:RoomShp) -> DroneVirtual :
+    drone = DroneVirtual()
+    drone.viewer = ViewerNone(drone, room)
+    drone.locate(200, 200, 0, room)
+    drone.takeOff()
+    return drone
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°7 : enregistrement d'une trajectoire.")
+    N = 1_000_000
+    room = RoomShp("(0 0, 1000 0, 1000 1000, 0 1000, 0 0)", 250)
+    drone = newDrone(room)
+    start = time.perf_counter()
+    fly(drone, N)
+    plain = time.perf_counter() - start
+    drone = newDrone(room)
+    drone.recorder = TrajectoryRecorder()
+    start = time.perf_counter()
+    fly(drone, N)
+    recorded = time.perf_counter() - start
+    recorder = drone.recorder
+    print("{} steps : {:.2f} µs per command without recorder, {:.2f} µs with recorder".format(
+        len(recorder), plain/N*1e6, recorded/N*1e6))
+    print("memory : {} bytes per step ({:.1f} MB allocated, {:.1f} MB used)".format(
+        recorder.steps.itemsize, recorder.steps.nbytes/1e6, recorder.getSteps().nbytes/1e6))
+    filename = os.path.join(tempfile.mkdtemp(), "trajectory.npz")
+    start = time.perf_counter()
+    recorder.save(filename)
+    save = time.perf_counter() - start
+    start = time.perf_counter()
+    loaded = TrajectoryRecorder.load(filename)
+    load = time.perf_counter() - start
+    print("save : {:.2f} s ({:.1f} MB), load : {:.2f} s, path length {:.0f} cm".format(
+        save, os.path.getsize(filename)/1e6, load, loaded.getPathLength()))
+    os.remove(filename)
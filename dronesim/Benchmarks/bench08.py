@@ -0,0 +1,58 @@
+"""
+Benchmark n°8 : temps d'import à froid du cœur du simulateur (dronecore et
+dronecmds), chaque mesure dans un nouvel interpréteur. Vérifie que le budget
+n'est pas dépassé et qu'aucune bibliothèque graphique n'est chargée.
+Le code de retour est 1 si le budget est dépassé.
+"""
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+
+IMPORT_BUDGET_MS = 300
+"""
+The budget of the cold import of dronecmds (in ms), on top of the start of the interpreter.
+"""
+
+GRAPHIC_MODULES = ("matplotlib", "mpl_toolkits", "tkinter", "idlelib", "PIL")
+"""
+The modules that must not be loaded by a run without visualisation.
+"""
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = [m for m in {graphics!r} if m in sys.modules]
+print(elapsed, ",".join(loaded))
+"""
+
+def importTime(module:str, repeat:int=7) -> tuple[float, list[str]] :
+    """
+    Measure the cold import of a module, in new interpreters.
+    :return: the median time (in ms), and the graphic modules loaded by the import
+    """
+    root = pathlib.Path(__file__).resolve().parent.parent
+    env = dict(os.environ, PYTHONPATH=str(root))
+    times = []
+    loaded = []
+    for _ in range(repeat) :
+        out = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, graphics=GRAPHIC_MODULES)],
+                             capture_output=True, text=True, env=env, cwd=root, check=True).stdout.split()
+        times.append(float(out[0]) * 1e3)
+        loaded = out[1].split(",") if len(out) > 1 else []
+    return statistics.median(times), loaded
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°8 : import à froid (médiane, en ms).")
+    ok = True
+    for module in ("dronecore", "dronecore.dronevirt", "dronecore.roomshply", "simulation", "dronecmds") :
+        t, loaded = importTime(module)
+        print("{:<22} {:8.1f}  {}".format(module, t, "graphic modules : "+", ".join(loaded) if loaded else ""))
+        ok = ok and not loaded
+    if t > IMPORT_BUDGET_MS :
+        print("dronecmds exceeds its import budget ({} ms)".format(IMPORT_BUDGET_MS))
+        ok = False
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,31 @@
+"""
+Benchmark n°9 : mode physique (DronePhysics). Rapport entre le temps de mission
+simulé et le temps de calcul, selon le pas d'intégration, avec et sans fonction
+d'échantillonnage du vol.
+"""
+import time
+from dronecore.roomshply import RoomShp
+from dronecore.dronevirt import *
+from dronecore.dronephys import DronePhysics
+from bench07 import fly
+
+def newDrone(room:RoomShp, dt:float, sampler=None) -> DronePhysics :
+    drone = DronePhysics(dt)
+    drone.viewer = ViewerNone(drone, room)
+    drone.onStep = sampler
+    drone.locate(200, 200, 0, room)
+    drone.takeOff()
+    return drone
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°9 : mode physique (temps simulé / temps de calcul).")
+    N = 2000
+    room = RoomShp("(0 0, 1000 0, 1000 1000, 0 1000, 0 0)", 250)
+    for dt in (0.01, 0.001) :
+        for name, sampler in (("without sampler", None), ("with sampler", lambda drone, t, x, y, z, heading : None)) :
+            drone = newDrone(room, dt, sampler)
+            start = time.perf_counter()
+            fly(drone, N)
+            elapsed = time.perf_counter() - start
+            print("dt = {} s, {:<15} : {:.0f} s of mission in {:.3f} s ({:.0f}x real time, {:.1f} µs per command)".format(
+                dt, name, drone.getMissionTime(), elapsed, drone.getMissionTime()/elapsed, elapsed/N*1e6))
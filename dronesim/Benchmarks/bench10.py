@@ -0,0 +1,64 @@
+"""
+Benchmark n°10 : latence des commandes d'un drone DroneTello, connecté à un
+émulateur local du Tello (TelloEmulator) : temps aller-retour d'une commande,
+et débit des commandes envoyées en file (window commandes en attente de réponse).
+"""
+import statistics
+import time
+from dronecore.roomshply import RoomShp
+from dronecore.dronevirt import *
+from dronecore.dronetello import DroneTello
+from dronecore.telloemu import TelloEmulator
+
+def roundTrips(drone:DroneTello, command:str, n:int) -> list[float] :
+    """
+    Send n times a command, waiting for each response.
+    :return: the round-trip times (in µs)
+    """
+    times = []
+    for _ in range(n) :
+        start = time.perf_counter()
+        drone.send(command)
+        times.append((time.perf_counter() - start) * 1e6)
+    return times
+
+def pipelined(drone:DroneTello, command:str, n:int) -> float :
+    """
+    Queue n times a command, then wait for all the responses.
+    :return: the number of commands per second
+    """
+    start = time.perf_counter()
+    futures = [drone.sendAsync(command) for _ in range(n)]
+    for f in futures :
+        f.result()
+    return n / (time.perf_counter() - start)
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°10 : latence des commandes Tello (émulateur local).")
+    N = 2000
+    room = RoomShp("(0 0, 1000 0, 1000 1000, 0 1000, 0 0)", 250)
+    for delay in (0.0, 0.001) :
+        emulator = TelloEmulator(room, 500, 500, 0, port=0, delay=delay)
+        emulator.start()
+        for window in (1, 8, 32) :
+            drone = DroneTello("127.0.0.1", emulator.port, window=window)
+            drone.viewer = ViewerNone(drone, room)
+            drone.connect()
+            if window == 1 :
+                times = roundTrips(drone, "battery?", N)
+                print("delay {} ms : round trip of 'battery?' median {:.0f} µs, p99 {:.0f} µs".format(
+                    delay*1e3, statistics.median(times), statistics.quantiles(times, n=100)[98]))
+                drone.locate(500, 500, 0, room)
+                drone.takeOff()
+                start = time.perf_counter()
+                for i in range(N // 10) :
+                    if i % 2 :
+                        drone.rotateLeft(90)
+                    else :
+                        drone.forward(40)
+                print("delay {} ms : {:.0f} µs per drone command (with the estimated position)".format(
+                    delay*1e3, (time.perf_counter() - start) / (N // 10) * 1e6))
+            print("delay {} ms, window {:>2} : {:.0f} commands per second".format(
+                delay*1e3, window, pipelined(drone, "battery?", N)))
+            drone.close()
+        emulator.stop()
@@ -0,0 +1,42 @@
+"""
+Benchmark n°11 : façade asynchrone et horloge simulée. N drones virtuels
+commandés en même temps dans une seule boucle asyncio (asyncio.gather) :
+temps de calcul par commande, et temps simulé des missions.
+"""
+import asyncio
+import time
+from dronecore.roomshply import RoomShp
+from dronecore.dronevirt import *
+from dronecore.droneasync import AsyncDrone, SimClock
+
+async def fly(drone:AsyncDrone, k:int) :
+    """
+    A flight of k commands that turns in circles.
+    """
+    await drone.takeOff()
+    for i in range(k) :
+        if i % 2 :
+            await drone.rotateLeft(90)
+        else :
+            await drone.forward(50)
+
+async def swarm(room:RoomShp, clock:SimClock, n:int, k:int) :
+    drones = []
+    for i in range(n) :
+        drone = DroneVirtual()
+        drone.viewer = ViewerNone(drone, room)
+        drone.locate(100 + 2*(i % 400), 100 + 2*(i // 400), 0, room)
+        drones.append(AsyncDrone(drone, clock))
+    await asyncio.gather(*(fly(d, k) for d in drones))
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°11 : N drones en même temps (asyncio, horloge simulée).")
+    K = 100
+    room = RoomShp("(0 0, 1000 0, 1000 1000, 0 1000, 0 0)", 250)
+    for n in (1, 10, 100, 500) :
+        clock = SimClock()
+        start = time.perf_counter()
+        clock.run(swarm(room, clock, n, K))
+        elapsed = time.perf_counter() - start
+        print("{:>3} drones x {} commands : {:.3f} s ({:.1f} µs per command), {:.1f} s simulated".format(
+            n, K, elapsed, elapsed / (n*K) * 1e6, clock.time))
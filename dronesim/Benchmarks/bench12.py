@@ -0,0 +1,40 @@
+"""
+Benchmark n°12 : détection des collisions dans un essaim de N drones. Table de
+hachage spatiale (closePairs) contre comparaison de toutes les paires, et coût
+d'une commande appliquée à tout l'essaim (Swarm.apply).
+"""
+import timeit
+import numpy as np
+from dronecore.roomshply import RoomShp
+from dronecore.dronevirt import *
+import dronecore.swarm
+from dronecore.swarm import Swarm, closePairs
+
+def allPairs(x:np.ndarray, y:np.ndarray, z:np.ndarray, distance:float) -> tuple[np.ndarray, np.ndarray] :
+    """
+    The N² version of closePairs : the matrix of all the distances.
+    """
+    d2 = (x[:, None]-x)**2 + (y[:, None]-y)**2 + (z[:, None]-z)**2
+    return np.nonzero(np.triu(d2 < distance**2, 1))
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°12 : collisions dans un essaim de N drones.")
+    room = RoomShp("(0 0, 3000 0, 3000 3000, 0 3000, 0 0)", 300)
+    rng = np.random.default_rng(0)
+    dronecore.swarm.DIRECT_PAIRS = 0 # the spatial hash only, to compare with all the pairs
+    for n in (10, 100, 500, 2000, 10000) :
+        # the density of a formation : about one drone per square meter
+        side = 100 * np.sqrt(n)
+        x, y, z = rng.uniform(0, side, n), rng.uniform(0, side, n), rng.uniform(50, 250, n)
+        number = max(1, 20000 // n)
+        hashed = min(timeit.repeat(lambda : closePairs(x, y, z, 20), number=number, repeat=5)) / number
+        line = "{:>5} drones : spatial hash {:8.1f} µs".format(n, hashed*1e6)
+        if n <= 2000 :
+            brute = min(timeit.repeat(lambda : allPairs(x, y, z, 20), number=number, repeat=5)) / number
+            assert len(allPairs(x, y, z, 20)[0]) == len(closePairs(x, y, z, 20)[0])
+            line += ", all pairs {:9.1f} µs ({:.1f}x)".format(brute*1e6, brute/hashed)
+        swarm = Swarm(n, room)
+        swarm.locate(100 + x % 2800, 100 + y % 2800, rng.integers(0, 360, n))
+        swarm.apply(CommandType.CMD_TAKEOFF)
+        step = min(timeit.repeat(lambda : swarm.apply(CommandType.CMD_ROTATELEFT, 90), number=number, repeat=5)) / number
+        print(line + ", swarm command {:8.1f} µs".format(step*1e6))
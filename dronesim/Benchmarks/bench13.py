@@ -0,0 +1,43 @@
+"""
+Benchmark n°13 : détection parmi N cibles après chaque déplacement. Grille de
+l'ensemble de cibles (TargetSet.query) contre le calcul de toutes les distances
+(NumPy) et contre Position.distance pour chaque cible, et surcoût par commande
+d'un drone qui recherche N cibles.
+"""
+import timeit
+import numpy as np
+from dronecore.roomshply import RoomShp
+from dronecore.dronevirt import *
+from dronecore.targets import TargetSet
+from bench07 import fly, newDrone
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°13 : détection parmi N cibles.")
+    room = RoomShp("(0 0, 1000 0, 1000 1000, 0 1000, 0 0)", 250)
+    rng = np.random.default_rng(0)
+    queries = [Position(*p) for p in zip(rng.uniform(0, 1000, 200), rng.uniform(0, 1000, 200), rng.uniform(0, 250, 200))]
+    for n in (100, 1000, 10000, 100000) :
+        x, y, z = room.getRandomPositions(n, seed=1)
+        targets = TargetSet(np.column_stack((x, y, z)))
+        positions = [targets.getPosition(i) for i in range(n)]
+        def grid() :
+            for p in queries :
+                targets.query(p, 50)
+        def numpy() :
+            for p in queries :
+                np.flatnonzero((x-p.x)**2 + (y-p.y)**2 + (z-p.z)**2 < 2500)
+        def loop() :
+            for p in queries :
+                [i for i, t in enumerate(positions) if p.distance(t) < 50]
+        line = "{:>6} targets : grid {:6.1f} µs, all distances {:8.1f} µs".format(
+            n, min(timeit.repeat(grid, number=5, repeat=5)) / 5 / len(queries) * 1e6,
+            min(timeit.repeat(numpy, number=5, repeat=5)) / 5 / len(queries) * 1e6)
+        if n <= 10000 :
+            line += ", Position.distance {:9.1f} µs".format(min(timeit.repeat(loop, number=1, repeat=3)) / len(queries) * 1e6)
+        drone = newDrone(room)
+        drone.targets = targets
+        N = 20000
+        per = min(timeit.repeat(lambda : fly(drone, N), number=1, repeat=3)) / N
+        print(line + " | drone : {:.2f} µs per command, {} targets detected".format(per * 1e6, targets.countDetected()))
+    drone = newDrone(room)
+    print("no targets : {:.2f} µs per command".format(min(timeit.repeat(lambda : fly(drone, N), number=1, repeat=3)) / N * 1e6))
@@ -0,0 +1,53 @@
+"""
+Benchmark n°14 : détection le long de tout le déplacement (sweptDetection).
+Nombre de cibles détectées par des déplacements de 500 cm, en fin de déplacement
+seulement ou le long du segment parcouru, et coût par commande ; distance à un
+segment calculée pour N cibles à la fois (TargetSet) ou cible par cible.
+"""
+import timeit
+import numpy as np
+from dronecore.roomshply import RoomShp
+from dronecore.dronevirt import *
+from dronecore.targets import TargetSet
+
+def zigzag(drone:DroneVirtual, n:int) :
+    """
+    A flight of n long moves across the room.
+    """
+    for i in range(n) :
+        if i % 2 :
+            drone.goLeft(50 if i % 4 == 1 else 20)
+            drone.rotateLeft(180)
+        else :
+            drone.forward(500)
+
+def newDrone(room:RoomShp, swept:bool, targets:TargetSet) -> DroneVirtual :
+    drone = DroneVirtual()
+    drone.sweptDetection = swept
+    drone.viewer = ViewerNone(drone, room)
+    drone.targets = targets
+    drone.locate(200, 100, 0, room)
+    drone.takeOff()
+    return drone
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°14 : détection le long des déplacements.")
+    room = RoomShp("(0 0, 800 0, 800 1000, 0 1000, 0 0)", 250)
+    N = 1000
+    for n in (100, 1000, 10000) :
+        x, y, z = room.getRandomPositions(n, seed=1)
+        z[:] = 80
+        for swept in (False, True) :
+            targets = TargetSet(np.column_stack((x, y, z)))
+            drone = newDrone(room, swept, targets)
+            t = timeit.timeit(lambda : zigzag(drone, 40), number=1)
+            print("{:>5} targets, {:<9} : {:>5} detected, {:.1f} µs per command".format(
+                n, "swept" if swept else "end point", targets.countDetected(), t / (40*1.5) * 1e6))
+        targets = TargetSet(np.column_stack((x, y, z)))
+        positions = [targets.getPosition(i) for i in range(n)]
+        p1, p2 = Position(100, 100, 80), Position(600, 400, 80)
+        vector = min(timeit.repeat(lambda : targets.querySegment(p1, p2, 50), number=20, repeat=5)) / 20
+        loop = min(timeit.repeat(lambda : [i for i, t in enumerate(positions) if t.distanceToSegment(p1, p2) < 50],
+                                 number=1, repeat=3))
+        print("{:>5} targets : segment query {:.1f} µs (TargetSet), {:.1f} µs (distanceToSegment per target)".format(
+            n, vector * 1e6, loop * 1e6))
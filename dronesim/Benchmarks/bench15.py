@@ -0,0 +1,46 @@
+"""
+Benchmark n°15 : couverture de la pièce (CoverageGrid).
+Temps de rastérisation de la pièce, et coût par commande de la mise à jour de la
+couverture selon la taille de la pièce et la résolution de la grille : la mise à
+jour ne traite que la fenêtre autour du déplacement, son coût ne dépend pas de la
+taille de la pièce.
+"""
+import timeit
+from dronecore.roomshply import RoomShp
+from dronecore.dronevirt import *
+from dronecore.coverage import CoverageGrid
+
+def lawnmower(drone:DroneVirtual, n:int) :
+    """
+    A flight of n moves : rows of 300 cm, 60 cm apart.
+    """
+    for i in range(n) :
+        drone.forward(300)
+        turn = drone.rotateLeft if i % 2 == 0 else drone.rotateRight
+        turn(90)
+        drone.forward(60)
+        turn(90)
+
+def newDrone(room:RoomShp, coverage:CoverageGrid|None) -> DroneVirtual :
+    drone = DroneVirtual()
+    drone.viewer = ViewerNone(drone, room)
+    drone.coverage = coverage
+    drone.locate(100, 100, 0, room)
+    drone.takeOff()
+    return drone
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°15 : couverture de la pièce.")
+    n = 10
+    for size in (1000, 3000, 10000) :
+        room = RoomShp("(0 0, {0} 0, {0} {0}, 0 {0}, 0 0)".format(size), 250)
+        base = min(timeit.repeat(lambda : lawnmower(newDrone(room, None), n), number=1, repeat=3))
+        for resolution in (10, 5) :
+            t = timeit.timeit(lambda : CoverageGrid(room, resolution), number=1)
+            coverage = CoverageGrid(room, resolution)
+            drone = newDrone(room, coverage)
+            c = timeit.timeit(lambda : lawnmower(drone, n), number=1)
+            print("{:>3} m x {:>3} m, {:>2} cm : rasterization {:.3f} s ({} cells), {:.1f} µs per command "
+                  "({:.1f} µs without coverage), {:.1f} % covered".format(
+                size // 100, size // 100, resolution, t, coverage.cells, c / (4*n) * 1e6, base / (4*n) * 1e6,
+                coverage.getCoverage()))
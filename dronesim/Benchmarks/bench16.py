@@ -0,0 +1,58 @@
+"""
+Benchmark n°16 : planification de trajets (PathPlanner).
+Temps de construction du graphe de visibilité (une fois par pièce et par tranche
+d'altitude) et temps d'une requête, qui réutilise le graphe, selon le nombre de
+sommets de la pièce (un polygone en étoile, ou une grille de piliers) ; les commandes planifiées sont
+exécutées par un drone virtuel.
+"""
+import timeit
+from math import cos, sin, pi
+from dronecore.roomshply import RoomShp
+from dronecore.dronevirt import *
+from dronecore.planner import PathPlanner, runCommands
+
+def starRoom(n:int) -> RoomShp :
+    """
+    A star-shaped room of n branches (2n vertices), about 20 m wide.
+    """
+    coords = []
+    for i in range(2*n) :
+        r = 1000 if i % 2 == 0 else 600
+        a = pi * i / n
+        coords.append((round(1000 + r * cos(a)), round(1000 + r * sin(a))))
+    return RoomShp(tuple(coords + coords[:1]), 250)
+
+def pillarRoom(n:int) -> RoomShp :
+    """
+    A room of 20 m x 20 m with a grid of n x n pillars (obstacles up to the ceiling).
+    """
+    step = 2000 / (n + 1)
+    pillars = [(step*(i+1) - 30, step*(j+1) - 30, step*(i+1) + 30, step*(j+1) + 30) for i in range(n) for j in range(n)]
+    return RoomShp("(0 0, 2000 0, 2000 2000, 0 2000, 0 0)", 250, obstacles=pillars)
+
+def measure(name:str, room:RoomShp, x1:float, y1:float, x2:float, y2:float) :
+    planner = PathPlanner(room)
+    build = timeit.timeit(lambda : planner.getGraph(100), number=1)
+    goal = Position(x2, y2, 100)
+    drone = DroneVirtual()
+    drone.viewer = ViewerNone(drone, room)
+    drone.locate(x1, y1, 0, room)
+    drone.takeOff()
+    start = drone.getCurrentPosition()
+    query = min(timeit.repeat(lambda : planner.plan(start, goal), number=20, repeat=5)) / 20
+    commands = planner.plan(start, goal)
+    runCommands(drone, commands)
+    p = drone.getCurrentPosition()
+    print("{:<22} : graph {:>6.1f} ms ({:>3} nodes), query {:.2f} ms, {:>2} commands, arrival at {:.1f} cm from the goal".format(
+        name, build * 1e3, len(planner.getGraph(100).nodes), query * 1e3, len(commands), p.distance(goal)))
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°16 : planification de trajets.")
+    for n in (5, 15, 30) :
+        room = starRoom(n)
+        # from the tip of a branch to the tip of the opposite branch
+        a = pi * 2 * (n // 2) / n
+        measure("star of {} vertices".format(2*n), room, 1000 + 700, 1000, 1000 + 700 * cos(a), 1000 + 700 * sin(a))
+    for n in (3, 6, 10) :
+        # across the grid, the straight line is blocked by the pillars of the diagonal
+        measure("{} pillars".format(n*n), pillarRoom(n), 50, 50, 1950, 1950)
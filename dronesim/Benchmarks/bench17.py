@@ -0,0 +1,56 @@
+"""
+Benchmark n°17 : missions compilées. Un programme sans lecture de capteurs est
+exécuté sur N scénarios d'une même pièce (positions de départ différentes) :
+exécution du programme pour chaque scénario (gradeRun), boucle serrée de la
+mission sur un drone virtuel (Mission.run), et rejeu de la mission par le moteur
+par lots (gradeMission), une seule capture du programme étant faite.
+"""
+import os
+import tempfile
+import timeit
+import numpy as np
+from dronecore.roomshply import RoomShp
+from dronecore.dronevirt import *
+import grading
+
+PROGRAM = """from dronecmds import *
+createRoom("(0 0, 1000 0, 1000 1000, 0 1000, 0 0)", 250)
+createDrone(DRONE_VIRTUAL, VIEWER_NONE)
+locate(100, 100, 0)
+takeOff()
+for i in range(25) :
+    forward(200)
+    rotateLeft(90)
+    goUp(20)
+    goDown(20)
+land()
+"""
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°17 : missions compilées.")
+    with tempfile.TemporaryDirectory() as folder :
+        program = os.path.join(folder, "square.py")
+        with open(program, "w", encoding="utf-8") as f :
+            f.write(PROGRAM)
+        room = "(0 0, 1000 0, 1000 1000, 0 1000, 0 0)"
+        capture = timeit.timeit(lambda : grading.captureProgram(program), number=10) / 10
+        mission = grading.captureProgram(program)
+        print("capture : {:.2f} ms, {} ({} problems)".format(capture * 1e3, mission, len(mission.validate())))
+        rng = np.random.default_rng(0)
+        for n in (10, 100, 1000) :
+            scenarios = [(i, {"room": room, "target": [500, 500, 80],
+                              "start": [int(rng.integers(300, 700)), int(rng.integers(300, 700)), int(rng.integers(0, 360))]})
+                         for i in range(n)]
+            runs = scenarios if n <= 100 else scenarios[:100]
+            t = timeit.timeit(lambda : [grading.gradeRun(program, i, s, timeout=None) for i, s in runs], number=1) / len(runs)
+            roomShp = RoomShp(room)
+            def loop() :
+                for i, s in runs :
+                    drone = DroneVirtual()
+                    drone.viewer = ViewerNone(drone, roomShp)
+                    mission.run(drone, roomShp, *s["start"])
+            l = timeit.timeit(loop, number=1) / len(runs)
+            grading.MISSION_BATCH = 1
+            b = min(timeit.repeat(lambda : grading.gradeMission(program, mission, scenarios), number=1, repeat=3)) / n
+            print("{:>4} scenarios : {:.3f} ms per run (gradeRun), {:.3f} ms (Mission.run), {:.3f} ms (gradeMission), x{:.0f}".format(
+                n, t * 1e3, l * 1e3, b * 1e3, t / b))
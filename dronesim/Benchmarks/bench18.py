@@ -0,0 +1,37 @@
+"""
+Benchmark n°18 : génération de scénarios. Débit du générateur (avec une ou
+plusieurs positions de départ par pièce, avec ou sans obstacles), écriture d'un
+corpus JSONL puis relecture au fil de l'eau, et mémoire utilisée pendant la
+relecture (elle ne dépend pas de la taille du corpus).
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+from dronecore.scenarios import ScenarioGenerator, Corpus
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°18 : génération de scénarios.")
+    n = 5000
+    for obstacles, perRoom in (((0, 0), 1), ((0, 3), 1), ((0, 0), 50), ((0, 3), 50)) :
+        generator = ScenarioGenerator(1, obstacles=obstacles, perRoom=perRoom)
+        start = time.perf_counter()
+        for scenario in generator.iterate(n) :
+            pass
+        t = time.perf_counter() - start
+        print("{} to {} obstacles, {:>2} scenario(s) per room : {:.0f} scenarios/s".format(obstacles[0], obstacles[1], perRoom, n / t))
+    with tempfile.TemporaryDirectory() as folder :
+        filename = os.path.join(folder, "corpus.jsonl")
+        for count in (10000, 100000) :
+            generator = ScenarioGenerator(2, perRoom=50)
+            start = time.perf_counter()
+            generator.write(filename, count)
+            w = time.perf_counter() - start
+            tracemalloc.start()
+            start = time.perf_counter()
+            k = sum(1 for scenario in Corpus(filename))
+            r = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print("{:>6} scenarios ({:.1f} MB) : written in {:.2f} s, read in {:.2f} s ({} scenarios), peak memory {:.0f} kB".format(
+                count, os.path.getsize(filename) / 1e6, w, r, k, peak / 1e3))
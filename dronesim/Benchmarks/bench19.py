@@ -0,0 +1,57 @@
+"""
+Benchmark n°19 : cache des résultats. Correction d'un programme sur un corpus de
+scénarios sans cache, puis avec un cache vide (les résultats sont calculés et
+rangés) et avec le cache rempli (les résultats sont relus) ; débit des lectures
+et des écritures du cache, et éviction quand il dépasse sa taille maximale.
+"""
+import io
+import os
+import tempfile
+import time
+from dronecore.scenarios import ScenarioGenerator
+from dronecore.resultcache import ResultCache
+import grading
+
+PROGRAM = """from dronecmds import *
+createRoom("(0 0, 1000 0, 1000 1000, 0 1000, 0 0)", 250)
+createDrone(DRONE_VIRTUAL, VIEWER_NONE)
+locate(100, 100, 0)
+takeOff()
+for i in range(10) :
+    forward(100)
+    rotateLeft(36)
+land()
+"""
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°19 : cache des résultats.")
+    with tempfile.TemporaryDirectory() as folder :
+        program = os.path.join(folder, "star.py")
+        with open(program, "w", encoding="utf-8") as f :
+            f.write(PROGRAM)
+        n = 2000
+        scenarios = list(ScenarioGenerator(3).iterate(n))
+        filename = os.path.join(folder, "cache.db")
+        for label in ("no cache", "empty cache", "full cache") :
+            cache = None if label == "no cache" else ResultCache(filename)
+            start = time.perf_counter()
+            grading.runGrading([program], scenarios, io.StringIO(), workers=2, cache=cache)
+            t = time.perf_counter() - start
+            print("{:>11} : {} runs in {:.2f} s ({:.3f} ms per run){}".format(label, n, t, t / n * 1e3,
+                  "" if cache is None else " - " + str(cache)))
+            if cache is not None :
+                cache.close()
+        result = {"program": "star.py", "scenario": 0, "status": "ok", "reached": False, "crashed": False,
+                  "commands": 23, "pathLength": 1000.0, "duration": 0.001, "error": None,
+                  "final": {"x": 1.0, "y": 2.0, "z": 80.0, "heading": 0, "state": "ONGROUND", "result": "RES_OK"}}
+        with ResultCache(os.path.join(folder, "small.db"), maxSize=1000000) as cache :
+            k = 50000
+            start = time.perf_counter()
+            for i in range(k) :
+                cache.put(cache.key("p", str(i)), result)
+            p = time.perf_counter() - start
+            start = time.perf_counter()
+            found = sum(1 for i in range(k) if cache.get(cache.key("p", str(i))) is not None)
+            g = time.perf_counter() - start
+            print("{} puts : {:.1f} µs per put, {} gets : {:.1f} µs per get, {} kept (LRU, {:.1f} MB max)".format(
+                k, p / k * 1e6, k, g / k * 1e6, found, cache.maxSize / 1e6))
@@ -0,0 +1,65 @@
+"""
+Benchmark n°20 : export d'un vol en animation, sans fenêtre (backend Agg). Temps
+d'une image en redessinant toute la figure ou en ne redessinant que le vol sur
+le fond gardé (FrameRenderer, comme les vues matplotlib), puis export complet d'un
+vol de 500 commandes en GIF et en images PNG, avec 1 processus et avec un
+processus par CPU.
+"""
+import os
+import tempfile
+import time
+from simulation import Simulation
+import viewerexport
+
+def recordFlight(n:int=500) -> Simulation :
+    """
+    Un vol enregistré de n commandes (avancer, tourner, monter et descendre) autour d'un obstacle.
+    """
+    sim = Simulation(verbose=False, record=True)
+    sim.createRoom("(0 0, 1000 0, 1000 800, 600 800, 600 1200, 0 1200, 0 0)", 250, obstacles=[(300, 300, 400, 400)])
+    sim.createTargetIn(500, 600, 100, 500, 600, 100)
+    sim.createDrone("DroneVirtual", "ViewerNone")
+    sim.locate(100, 100, 0)
+    sim.takeOff()
+    k = 2
+    while k < n - 1 :
+        sim.forward(60)
+        sim.rotateLeft(37)
+        k += 2
+        if k % 20 == 0 :
+            sim.goUp(20)
+            sim.goDown(20)
+            k += 2
+    sim.land()
+    return sim
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°20 : export d'un vol en animation.")
+    sim = recordFlight()
+    steps = sim.drone.recorder.getSteps()
+    renderer = viewerexport.FrameRenderer(viewerexport.getScene(sim.room, sim.target))
+    frames = range(0, len(steps), 5)
+    start = time.perf_counter()
+    for i in frames :
+        renderer.render(steps, i)
+        for a in renderer.artists + [renderer.title] :
+            a.set_animated(False)
+        renderer.canvas.draw()
+        for a in renderer.artists + [renderer.title] :
+            a.set_animated(True)
+    full = (time.perf_counter() - start) / len(frames)
+    start = time.perf_counter()
+    for i in frames :
+        renderer.render(steps, i)
+    blit = (time.perf_counter() - start) / len(frames)
+    print("one frame : {:.1f} ms (full redraw), {:.1f} ms (flight over the background), x{:.1f}".format(full * 1e3, blit * 1e3, full / blit))
+    with tempfile.TemporaryDirectory() as folder :
+        for workers in sorted({1, os.cpu_count() or 1}) :
+            for name in ("flight.gif", "frames") :
+                filename = os.path.join(folder, "{}-{}".format(workers, name))
+                start = time.perf_counter()
+                n = sim.exportFlight(filename, workers=workers)
+                t = time.perf_counter() - start
+                size = os.path.getsize(filename) if name.endswith(".gif") else sum(f.stat().st_size for f in os.scandir(filename))
+                print("{:>10}, {:>2} process(es) : {} frames in {:.2f} s ({:.1f} ms per frame, {:.1f} MB)".format(
+                    name, workers, n, t, t / n * 1e3, size / 1e6))
@@ -0,0 +1,91 @@
+"""
+Benchmark n°21 : scène fixe précalculée des vues matplotlib (backend Agg). Temps
+d'une image de ViewerBasicMPL en redessinant toute la figure ou en ne redessinant
+que le vol sur la scène gardée en fond (BlitLayer), puis temps de préparation
+d'un nouveau vol dans ViewerTkMPL (bouton 'run') : scène reconstruite et figure
+redessinée, ou scène réutilisée et vol effacé.
+"""
+import contextlib
+import io
+import time
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from dronecore import *
+from dronecore.roomshply import RoomShp
+from dronecore.dronevirt import DroneVirtual
+from mplext import SceneArtists, BlitLayer
+from viewermpl import ViewerBasicMPL
+from viewertk import ViewerTkMPL
+
+def flyBasic(viewer:ViewerBasicMPL, drone:DroneVirtual, n:int, full:bool) -> float :
+    """
+    Mean time (in s) of the n frames of a flight (a square), with a full redraw of each frame or not.
+    """
+    start = time.perf_counter()
+    for i in range(n) :
+        if i % 2 == 0 :
+            drone.forward(100)
+        else :
+            drone.rotateLeft(90)
+        viewer.display()
+        if full :
+            viewer.fig.canvas.draw()
+    return (time.perf_counter() - start) / n
+
+def newTkViewer(room:ARoom, target:Position) -> ViewerTkMPL :
+    """
+    A ViewerTkMPL drawn on an Agg canvas (no window), as in its constructor.
+    """
+    viewer = ViewerTkMPL.__new__(ViewerTkMPL)
+    AViewer.__init__(viewer, DroneVirtual(), room, target)
+    viewer.incremental = True
+    viewer.scene, viewer.flight, viewer.added = None, None, []
+    viewer.fig = Figure(figsize=(4, 4), dpi=70)
+    viewer.canvas = FigureCanvasAgg(viewer.fig)
+    viewer.ax = viewer.fig.add_subplot(projection="3d")
+    viewer._drawFigure()
+    viewer.layer = BlitLayer(viewer.canvas, viewer.flight.artists)
+    viewer.canvas.draw()
+    return viewer
+
+if __name__ == '__main__':
+    print("**** BENCHMARK n°21 : scène fixe précalculée des vues matplotlib.")
+    room = RoomShp("(0 0, 1000 0, 1000 800, 600 800, 600 1200, 0 1200, 0 0)", 250,
+                   obstacles=[(300, 300, 400, 400), (700, 100, 800, 200)])
+    target = Position(500, 600, 100)
+    n = 200
+    ViewerBasicMPL.delay = 0
+    with contextlib.redirect_stdout(io.StringIO()) :
+        drone = DroneVirtual()
+        viewer = ViewerBasicMPL(drone, room, target)
+        drone.viewer = viewer
+        drone.locate(450, 450, 0, room)
+        drone.takeOff()
+        full = flyBasic(viewer, drone, n, True) # the frame drawn by the viewer, then the whole figure
+        blit = flyBasic(viewer, drone, n, False)
+    plt.close(viewer.fig)
+    full -= blit # the time of the full redraw only
+    print("ViewerBasicMPL, one frame : {:.1f} ms (full redraw), {:.1f} ms (flight over the scene), x{:.1f}".format(
+        full * 1e3, blit * 1e3, full / blit))
+    h = room.getHeight()
+    count = 20
+    fig = Figure(figsize=(4, 4), dpi=70)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(projection="3d")
+    start = time.perf_counter()
+    for _ in range(count) :
+        # the scene built again in a cleared figure, and drawn
+        ax.clear()
+        SceneArtists(ax, room.getWalls2D(), room.getWalls2D(h=h), [o.getEdges3D(h) for o in room.getObstacles()], target)
+        canvas.draw()
+    rebuild = (time.perf_counter() - start) / count
+    viewer = newTkViewer(room, target)
+    start = time.perf_counter()
+    for _ in range(count) :
+        viewer._redraw(viewer._drawFigure())
+    reuse = (time.perf_counter() - start) / count
+    print("ViewerTkMPL, new flight : {:.1f} ms (scene rebuilt), {:.1f} ms (scene reused), x{:.1f}".format(
+        rebuild * 1e3, reuse * 1e3, rebuild / reuse))
@@ -0,0 +1,262 @@
+"""
+Suite de benchmarks des chemins critiques du simulateur, sans fenêtre ni saisie
+(backend Agg) : débit des commandes de DroneVirtual, latence de intersectWall2
+selon la taille de la pièce, coût de getRandomPosition selon la forme de la pièce,
+coût de Position.distance et de detectTarget, temps de rendu d'une image des vues
+matplotlib et temps d'import à froid de dronecmds. Les résultats sont écrits au
+format JSON, pour comparer deux versions du simulateur.
+
+Usage : python benchsuite.py [-o results.json] [--quick] [--compare baseline.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import timeit
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+import shapely
+from dronecore.roomshply import RoomShp
+from dronecore.dronevirt import *
+from bench04 import starOutline, nearWallMoves
+from bench05 import ROOMS
+from bench08 import importTime, IMPORT_BUDGET_MS
+
+def measure(f, number:int, repeat:int=5) -> dict :
+    """
+    Time a function (without argument) : repeat times number calls.
+    :return: the best and the median time of one call (in µs)
+    """
+    times = [t / number * 1e6 for t in timeit.Timer(f).repeat(repeat, number)]
+    return {"best_us": round(min(times), 4), "median_us": round(statistics.median(times), 4)}
+
+def newDrone(room:RoomShp) -> DroneVirtual :
+    drone = DroneVirtual()
+    drone.viewer = ViewerNone(drone, room)
+    drone.locate(200, 200, 0, room)
+    drone.takeOff()
+    return drone
+
+def benchThroughput(quick:bool) -> dict :
+    """
+    Commands per second of a DroneVirtual without viewer, flying in circles.
+    """
+    room = RoomShp("(0 0, 1000 0, 1000 1000, 0 1000, 0 0)", 250)
+    drone = newDrone(room)
+    drone.target = Position(800, 800, 80)
+    def square() :
+        for _ in range(4) :
+            drone.forward(100)
+            drone.goUp(20)
+            drone.goDown(20)
+            drone.rotateLeft(90)
+    r = measure(square, 200 if quick else 2000)
+    # 16 commands per call
+    return {"commands_per_s": round(16e6 / r["best_us"]), "per_command_us": round(r["best_us"] / 16, 4)}
+
+def benchIntersectWall(quick:bool) -> dict :
+    """
+    Latency of intersectWall2 according to the number of walls (half of the moves near the walls).
+    """
+    results = {}
+    for n in (4, 16, 64, 256, 1024) + (() if quick else (4096, 16384)) :
+        outline, r = starOutline(n)
+        room = RoomShp(outline, 300)
+        segments = nearWallMoves(r, 500)
+        def run() :
+            for p1, p2 in segments :
+                room.intersectWall2(p1, p2)
+        m = measure(run, 1, 3 if quick else 5)
+        results[str(n)] = {k: round(v / len(segments), 4) for k, v in m.items()}
+    return results
+
+def benchRandomPosition(quick:bool) -> dict :
+    """
+    Cost of getRandomPosition according to the shape of the room, and of getRandomPositions per position.
+    """
+    results = {}
+    random.seed(0)
+    for name, description in ROOMS.items() :
+        room = RoomShp(description, 250)
+        room.getRandomPosition()
+        single = measure(room.getRandomPosition, 200 if quick else 2000)
+        k = 10000
+        batch = measure(lambda : room.getRandomPositions(k, seed=1), 1, 3 if quick else 5)
+        results[name] = {"single": single, "batch_per_position_us": round(batch["best_us"] / k, 4)}
+    return results
+
+def benchDetection(quick:bool) -> dict :
+    """
+    Cost of Position.distance and of DroneVirtual.detectTarget.
+    """
+    p1 = Position(100, 200, 80)
+    p2 = Position(400, 300, 120)
+    room = RoomShp("(0 0, 1000 0, 1000 1000, 0 1000, 0 0)", 250)
+    drone = newDrone(room)
+    drone.target = p2
+    number = 20000 if quick else 200000
+    return {"distance": measure(lambda : p1.distance(p2), number),
+            "detectTarget": measure(drone.detectTarget, number)}
+
+def _frames(display, moves:int, checkpoints:tuple) -> dict :
+    """
+    Time of the frames displayed after the given numbers of commands.
+    """
+    rng = random.Random(0)
+    frames = {}
+    for i in range(1, moves+1) :
+        start = time.perf_counter()
+        display(rng)
+        if i in checkpoints :
+            frames[str(i)] = round((time.perf_counter() - start) * 1e3, 2)
+    return frames
+
+def benchViewers(quick:bool) -> dict :
+    """
+    Time of one frame (in ms) of the matplotlib viewers on the Agg backend, after n commands.
+    """
+    import matplotlib.pyplot as plt
+    from viewermpl import ViewerBasicMPL
+    moves = 50 if quick else 200
+    checkpoints = (1, 10, 50) if quick else (1, 10, 50, 100, 200)
+    room = RoomShp("(0 0, 1000 0, 1000 1000, 0 1000, 0 0)", 250)
+    results = {}
+    # ViewerBasicMPL : the flight artists updated in place, drawn over the cached scene
+    drone = DroneVirtual()
+    with contextlib.redirect_stdout(io.StringIO()) :
+        viewer = ViewerBasicMPL(drone, room, Position(800, 800, 80))
+        viewer.delay = 0
+        drone.viewer = viewer
+        drone.locate(500, 500, 0, room)
+        drone.takeOff()
+        def basic(rng) :
+            drone.rotateLeft(rng.choice((90, 180, 270)))
+            if not room.intersectWall(drone.position, Position(drone.position.x + 100*cos(drone.position.heading),
+                                                               drone.position.y + 100*sin(drone.position.heading))) :
+                drone.forward(100)
+            viewer.display()
+        results["ViewerBasicMPL"] = _frames(basic, moves, checkpoints)
+    plt.close(viewer.fig)
+    # ViewerTkMPL : its scene and its flight artists, drawn on an Agg canvas (no window)
+    try :
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from viewertk import ViewerTkMPL
+        from mplext import BlitLayer
+    except ImportError as err :
+        results["ViewerTkMPL"] = {"skipped": str(err)}
+        return results
+    viewer = ViewerTkMPL.__new__(ViewerTkMPL)
+    AViewer.__init__(viewer, DroneVirtual(), room, Position(800, 800, 80))
+    viewer.incremental = True
+    viewer.scene, viewer.flight, viewer.added = None, None, []
+    viewer.fig = Figure(figsize=(4, 4), dpi=70)
+    viewer.canvas = FigureCanvasAgg(viewer.fig)
+    viewer.ax = viewer.fig.add_subplot(projection="3d")
+    viewer._drawFigure()
+    viewer.layer = BlitLayer(viewer.canvas, viewer.flight.artists)
+    viewer.canvas.draw()
+    position = Position(500, 500, 80)
+    def tk(rng) :
+        previous = Position(position.x, position.y, position.z, position.heading)
+        position.heading += rng.choice((1, 2, 3)) * pi / 2
+        x, y = position.x + 100*cos(position.heading), position.y + 100*sin(position.heading)
+        if 0 < x < 1000 and 0 < y < 1000 :
+            position.x, position.y = x, y
+        viewer.flight.update(previous, position)
+        viewer._redraw(False)
+    results["ViewerTkMPL"] = _frames(tk, moves, checkpoints)
+    return results
+
+def benchImports(quick:bool) -> dict :
+    """
+    Cold import time (in ms) of the core modules, each in a new interpreter.
+    """
+    results = {}
+    for module in ("dronecore", "simulation", "dronecmds") :
+        t, loaded = importTime(module, 3 if quick else 7)
+        results[module] = {"median_ms": round(t, 2), "graphic_modules": loaded}
+    results["dronecmds"]["budget_ms"] = IMPORT_BUDGET_MS
+    return results
+
+BENCHMARKS = {
+    "throughput" : benchThroughput,
+    "intersectWall2" : benchIntersectWall,
+    "getRandomPosition" : benchRandomPosition,
+    "detection" : benchDetection,
+    "viewers" : benchViewers,
+    "imports" : benchImports,
+}
+"""
+The benchmarks of the suite, by name.
+"""
+
+def runSuite(quick:bool=False, names:list[str]=None) -> dict :
+    """
+    Run the benchmarks of the suite.
+    :param quick: True for fewer repetitions and smaller sizes
+    :param names: the benchmarks to run (default : all)
+    :return: the results, with the description of the machine and of the versions
+    """
+    meta = {"date": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+            "platform": platform.platform(), "machine": platform.machine(), "numpy": np.__version__,
+            "shapely": shapely.__version__, "matplotlib": matplotlib.__version__, "quick": quick}
+    results = {}
+    for name in names or BENCHMARKS :
+        start = time.perf_counter()
+        results[name] = BENCHMARKS[name](quick)
+        print("{:<20} {:6.1f} s".format(name, time.perf_counter() - start), file=sys.stderr)
+    return {"meta": meta, "results": results}
+
+def _flatten(results:dict, prefix:str="") -> dict :
+    values = {}
+    for k, v in results.items() :
+        if isinstance(v, dict) :
+            values.update(_flatten(v, prefix + k + "/"))
+        elif isinstance(v, (int, float)) :
+            values[prefix + k] = v
+    return values
+
+def compare(baseline:dict, current:dict, threshold:float=1.2) -> list[str] :
+    """
+    Compare two runs of the suite : the ratio current/baseline of every measure.
+    For commands_per_s, a higher value is better ; for the others (times), a lower value.
+    :param threshold: the ratio from which a measure is reported as a regression
+    :return: the lines of the report
+    """
+    old = _flatten(baseline["results"])
+    new = _flatten(current["results"])
+    lines = []
+    for key in sorted(old.keys() & new.keys()) :
+        if old[key] == 0 or new[key] == 0 :
+            continue
+        ratio = old[key] / new[key] if key.endswith("commands_per_s") else new[key] / old[key]
+        flag = "  <<< regression" if ratio >= threshold else ""
+        lines.append("{:<60} {:>12} {:>12} {:>7.2f}x{}".format(key, old[key], new[key], ratio, flag))
+    return lines
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the benchmark suite of the simulator.")
+    parser.add_argument("-o", "--output", help="the JSON result file (default : standard output)")
+    parser.add_argument("--quick", action="store_true", help="fewer repetitions and smaller sizes")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="the benchmarks to run")
+    parser.add_argument("--compare", help="a JSON result file of a previous run, to compare with")
+    args = parser.parse_args()
+    random.seed(0)
+    current = runSuite(args.quick, args.only)
+    text = json.dumps(current, indent=2)
+    if args.output :
+        with open(args.output, "w", encoding="utf-8") as f :
+            f.write(text+"\n")
+    else :
+        print(text)
+    if args.compare :
+        with open(args.compare, encoding="utf-8") as f :
+            baseline = json.load(f)
+        print("\n".join(compare(baseline, current)), file=sys.stderr)
@@ -0,0 +1,21 @@
+from dronecmds import *
+
+if __name__ == '__main__':
+    print("**** TEST n°7 : exécution sans visualisation, trajectoire affichée après coup.")
+    try :
+        createRoom("(0 0, 500 0, 500 1000, 0 1000, 0 0)", 300)
+        createTarget()
+        createDrone(DRONE_VIRTUAL, VIEWER_RECORD)
+        locate(200,200,90)
+        takeOff()
+        forward(100)
+        goUp(50)
+        rotateLeft(90)
+        forward(100)
+        backward(400) # recule dans le mur !
+        land()
+    except Exception as err:
+        print(err)
+        display()
+    getViewer().printTrajectory()
+    print("Path length : {} cm".format(getViewer().getPathLength()))
@@ -0,0 +1,24 @@
+from simulation import *
+
+if __name__ == '__main__':
+    print("**** TEST n°8 : plusieurs simulations indépendantes dans le même programme.")
+    simulations = []
+    for i in range(3) :
+        sim = Simulation(verbose=False)
+        sim.createRoom("(0 0, 500 0, 500 1000, 0 1000, 0 0)", 300)
+        sim.createTargetIn(200, 200, 150, 300, 300, 200)
+        sim.createDrone(DRONE_VIRTUAL, VIEWER_RECORD)
+        sim.locate(100+100*i, 100, 90)
+        simulations.append(sim)
+    for sim in simulations :
+        sim.takeOff()
+    for i, sim in enumerate(simulations) :
+        try :
+            sim.forward(100*(i+1))
+            sim.rotateRight(90)
+            sim.forward(300)
+        except Exception as err:
+            print(err)
+            sim.display()
+    for i, sim in enumerate(simulations) :
+        print("Simulation", i, ":", sim.getPosition(), "- path length :", sim.viewer.getPathLength(), "cm")
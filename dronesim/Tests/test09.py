@@ -0,0 +1,39 @@
+from dronecmds import *
+
+if __name__ == '__main__':
+    print("**** TEST n°9 : pièce avec un trou (un pilier) et des obstacles (une étagère, une cloison).")
+    try :
+        createRoom("(0 0, 1000 0, 1000 800, 0 800, 0 0), (450 350, 550 350, 550 450, 450 450, 450 350)", 250,
+                   [(100, 600, 400, 650, 0, 120), (700, 300, 720, 800, 0, None)])
+        createTarget()
+        createDrone(DRONE_VIRTUAL, VIEWER_RECORD)
+        locate(200,200,90)
+        takeOff()
+        forward(300)
+        goUp(100) # passe au-dessus de l'étagère
+        forward(200)
+        rotateRight(90)
+        forward(400)
+        forward(200) # heurte la cloison !
+        land()
+    except Exception as err:
+        print(err)
+        display()
+    getViewer().printTrajectory()
+    print("**** Obstacles suspendus : une tablette (à 20-60 cm du sol) et une mezzanine (à 50-120 cm).")
+    for x in (100, 700) :
+        setSimulation(Simulation())
+        try :
+            createRoom("(0 0, 1000 0, 1000 800, 0 800, 0 0)", 250, [(300, 100, 500, 300, 20, 60), (600, 100, 800, 300, 50, 120)])
+            createDrone(DRONE_VIRTUAL, VIEWER_RECORD)
+            locate(x, 200, 0)
+            takeOff() # depuis x=700, sous la mezzanine : heurte l'obstacle !
+            forward(300) # passe au-dessus de la tablette
+            land() # se pose sur la tablette
+            takeOff()
+            forward(300) # passe au-dessus de la mezzanine
+            land() # se pose sur la mezzanine
+        except Exception as err:
+            print(err)
+            display()
+        getViewer().printTrajectory()
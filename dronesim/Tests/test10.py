@@ -0,0 +1,29 @@
+import asyncio
+from dronecore.roomshply import RoomShp
+from dronecore.dronevirt import *
+from dronecore.dronephys import DronePhysics
+from dronecore.droneasync import AsyncDrone, SimClock
+
+async def patrol(name:str, drone:AsyncDrone, clock:SimClock, side:int) :
+    await drone.takeOff()
+    for _ in range(4) :
+        await drone.forward(side)
+        await drone.rotateLeft(90)
+        print("t={:6.2f} s : {} at {}".format(clock.time, name, drone.getCurrentPosition()))
+    await drone.land()
+    return clock.time
+
+async def mission(room:RoomShp, clock:SimClock) :
+    drones = {}
+    for i, cls in enumerate((DroneVirtual, DroneVirtual, DronePhysics)) :
+        drone = cls()
+        drone.viewer = ViewerNone(drone, room)
+        drones["drone {} ({})".format(i, cls.__name__)] = AsyncDrone(drone, clock)
+        drone.locate(100 + 200*i, 100, 0, room)
+    return await asyncio.gather(*(patrol(name, d, clock, 100 + 50*i) for i, (name, d) in enumerate(drones.items())))
+
+if __name__ == '__main__':
+    print("**** TEST n°10 : trois drones commandés en même temps (asyncio, horloge simulée).")
+    room = RoomShp("(0 0, 1000 0, 1000 1000, 0 1000, 0 0)", 250)
+    clock = SimClock()
+    print("end of the missions :", clock.run(mission(room, clock)))
@@ -0,0 +1,25 @@
+import numpy as np
+from dronecore.roomshply import RoomShp
+from dronecore.dronevirt import *
+from dronecore.swarm import Swarm
+from viewermpl import ViewerSwarmMPL
+
+if __name__ == '__main__':
+    print("**** TEST n°11 : essaim de 100 drones en formation, dont deux lignes qui se croisent.")
+    room = RoomShp("(0 0, 1200 0, 1200 1400, 0 1400, 0 0)", 300)
+    swarm = Swarm(100, room, Position(550, 800, 130))
+    i = np.arange(100)
+    # a grid of 10 x 10 drones ; the first row faces the second one
+    swarm.locate(150 + 100*(i % 10), 150 + 100*(i // 10), np.where(i < 10, 90, np.where(i < 20, 270, 90)))
+    viewer = ViewerSwarmMPL(swarm)
+    swarm.apply(CommandType.CMD_TAKEOFF)
+    viewer.display()
+    swarm.apply(CommandType.CMD_GOUP, np.where(i % 2 == 0, 50, 100))
+    viewer.display()
+    for _ in range(3) :
+        swarm.apply(CommandType.CMD_FORWARD, 50)
+        viewer.display()
+        print(swarm, "- collisions :", list(zip(*(c.tolist() for c in swarm.collisions))))
+    print("detected the target :", np.flatnonzero(swarm.detected).tolist())
+    swarm.apply(CommandType.CMD_LAND)
+    viewer.display()
@@ -5,81 +5,62 @@ Ce drone est virtuel, mais toutes les procédures représentent des commandes
 qui existent pour un drone de type Tello Edu.
 """
 
-from dronecore.roomshply import RoomShp
-from dronecore.dronevirt import *
-from viewermpl import ViewerBasicMPL
-from viewertk import ViewerTkMPL
-
-#################
-#   Constantes  #
-#################
-
-DRONE_VIRTUAL = "DroneVirtual"
-"""
-Constante qui identifie un drone virtuel (simulé) associé à la classe DroneVirtual.
-"""
-
-DRONE_TELLO = "DroneTello"
-"""
-Constante qui identifie un drone réel de type Tello Edu, associé à la classe DroneTello.
-"""
-
-VIEWER_CONSOLE = "ViewerConsole"
-"""
-Constante qui identifie une vue associée à la classe ViewerConsole.
-"""
-
-VIEWER_BASICMPL = "ViewerBasicMPL"
-"""
-Constante qui identifie une vue associée à la classe ViewerChartDir.
-"""
-
-VIEWER_TKMPL = "ViewerTkMPL"
-"""
-Constante qui identifie une vue associée à la classe ViewerTkMPL.
-"""
+from simulation import *
 
 #####################################
 # Objets de base pour la simulation #
 #####################################
 
-room:ARoom = None
+simulation:Simulation = Simulation()
 """
-La pièce à explorer.
+La simulation par défaut, sur laquelle agissent toutes les commandes de ce module.
+Elle contient la pièce à explorer (room), la cible (target), le drone (drone) et
+l'interface de visualisation (viewer), accessibles aussi comme attributs de ce module.
 """
 
-target:Position = None
-"""
-La cible à détecter dans la pièce.
-"""
+def __getattr__(name:str) :
+    if name in ("room", "target", "drone", "viewer") :
+        return getattr(simulation, name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
-drone:ADrone = None
-"""
-Le drone à commander.
-"""
+def getSimulation() -> Simulation :
+    """
+    Fonction qui retourne la simulation sur laquelle agissent les commandes.
+    :return: la simulation courante
+    """
+    return simulation
 
-viewer:AViewer = None
-"""
-L'interface de visualisation à utiliser.
-"""
+def setSimulation(sim:Simulation) :
+    """
+    Change la simulation sur laquelle agissent les commandes.
+    :param sim: la nouvelle simulation
+    """
+    global simulation
+    simulation = sim
 
 ###########################################
 # Commandes à utiliser pour la simulation #
 ###########################################
 def display() :
-    drone.display()
-    #if viewer is not None :
-    #    viewer.display()
+    simulation.display()
+
+def getViewer() -> AViewer :
+    """
+    Fonction qui retourne la visualisation créée par 'createDrone(...)', par exemple
+    pour afficher après coup la trajectoire enregistrée par VIEWER_RECORD.
+    :return: la visualisation
+    """
+    return simulation.viewer
 
-def createRoom(description:str|tuple, height:int) :
+def createRoom(description:str|tuple, height:int, obstacles:list=None) :
     """
     Création de la pièce à explorer. Ce doit être la première instruction à appeler.
     :param description: description du contour de la pièce (suite de points, en cm)
     :param height: hauteur de la pièce (en cm)
+    :param obstacles: éventuellement les obstacles de la pièce, chacun décrit par un
+                      pavé (xmin, ymin, xmax, ymax, zmin, zmax)
     """
-    global room
-    room=RoomShp(description, height)
-    print(room)
+    simulation.createRoom(description, height, obstacles)
 
 def createTarget() :
     """
@@ -87,9 +68,7 @@ def createTarget() :
     être la seconde instruction à appeler si on veut ajouter une cible à chercher.
     Créer une cible n'est pas obligatoire.
     """
-    global target
-    target=room.getRandomPosition()
-    print("Target : x={} y={} z={}".format(target.x, target.y, target.y))
+    simulation.createTarget()
 
 def createTargetIn(x1:float, y1:float, z1:float, x2:float, y2:float, z2:float) :
     """
@@ -103,34 +82,27 @@ def createTargetIn(x1:float, y1:float, z1:float, x2:float, y2:float, z2:float) :
 	:param y2 ordonnée supérieure droite du cube
 	:param z2 hauteur supérieure droite du cube
     """
-    global target
-    target=room.getRandomPosition(Position(x1,y1,z1), Position(x2,y2,z2))
-    print("Target : x={} y={} z={}".format(target.x, target.y, target.z))
+    simulation.createTargetIn(x1, y1, z1, x2, y2, z2)
+
+def setSeed(seed) :
+    """
+    Fixe la graine du tirage au hasard des cibles (createTarget, createTargetIn,
+    createTargets) : une même graine donne les mêmes cibles, d'une exécution à l'autre.
+    :param seed: la graine (un entier), None pour un tirage différent à chaque fois
+    """
+    simulation.setSeed(seed)
 
 def createDrone(droneId:str, viewerId:str, progfunc=None) :
     """
     Création du drone et de sa visualisation. Cette instruction doit être appelée
     après l'instruction 'createRoom(...)' qui crée la pièce à explorer.
-    :param droneId: le drone à créer (actuellement uniquement : DRONE_VIRTUAL)
-    :param viewerId: la visualisation (VIEWER_CONSOLE, VIEWER_BASICMPL ou VIEWER_TKMPL)
+    :param droneId: le drone à créer (DRONE_VIRTUAL, DRONE_PHYSICS dont les déplacements prennent du temps,
+                    ou DRONE_TELLO pour un drone réel Tello Edu)
+    :param viewerId: la visualisation (VIEWER_CONSOLE, VIEWER_BASICMPL, VIEWER_TKMPL,
+                     ou sans visualisation : VIEWER_NONE, VIEWER_RECORD)
     :param progfunc: éventuellement le programme à exécuter dans le visualiseur VIEWER_TKMPL
     """
-    global drone
-    if droneId == DRONE_VIRTUAL :
-        drone=DroneVirtual()
-        drone.target=target
-    else :
-        raise Exception("Drone Identifier Unknown !")
-    global viewer
-    if viewerId == VIEWER_CONSOLE :
-        viewer=ViewerConsole(drone, room, target)
-    elif viewerId == VIEWER_BASICMPL :
-        viewer = ViewerBasicMPL(drone, room, target)
-    elif viewerId == VIEWER_TKMPL:
-        viewer = ViewerTkMPL(drone, room, target, progfunc=progfunc)
-    else :
-        raise Exception("Viewer Identifier Unknown !")
-    drone.viewer=viewer
+    simulation.createDrone(droneId, viewerId, progfunc)
 
 def locate(x, y, heading) :
     """
@@ -139,31 +111,27 @@ def locate(x, y, heading) :
     :param y: ordonnée du drone
     :param heading: cap du drone en degrés
     """
-    drone.locate(x, y, heading, room)
-    drone.display()
+    simulation.locate(x, y, heading)
 
 def takeOff() :
     """
     Le drone décolle et va se positionner en vol stationnaire (à environ 80cm du sol dans le cas
 	du drone tello edu). Si le drone est déjà en vol, la commande est sans effet.
     """
-    drone.takeOff()
-    drone.display()
+    simulation.takeOff()
 
 def land() :
     """
     Le drone se pose droit sous lui. Sans effet si le drone est déjà posé.
     """
-    drone.land()
-    drone.display()
+    simulation.land()
 
 def forward(n:int) :
     """
     Le drone avance droit devant lui de n cm. Sans effet si le drone n’a pas décollé.
     :param n: nombre de cm
     """
-    drone.forward(n)
-    drone.display()
+    simulation.forward(n)
 
 def backward(n:int) :
     """
@@ -171,8 +139,7 @@ def backward(n:int) :
     Sans effet si le drone n’a pas décollé.
     :param n: nombre de cm
     """
-    drone.backward(n)
-    drone.display()
+    simulation.backward(n)
 
 def goUp(n:int) :
     """
@@ -180,8 +147,7 @@ def goUp(n:int) :
     Sans effet si le drone n’a pas décollé.
     :param n: nombre de cm
     """
-    drone.goUp(n)
-    drone.display()
+    simulation.goUp(n)
 
 def goDown(n:int) :
     """
@@ -189,8 +155,7 @@ def goDown(n:int) :
     Sans effet si le drone n’a pas décollé.
     :param n: nombre de cm
     """
-    drone.goDown(n)
-    drone.display()
+    simulation.goDown(n)
 
 def goLeft(n:int) :
     """
@@ -198,8 +163,7 @@ def goLeft(n:int) :
     Sans effet si le drone n’a pas décollé.
     :param n: nombre de cm
     """
-    drone.goLeft(n)
-    drone.display()
+    simulation.goLeft(n)
 
 def goRight(n:int) :
     """
@@ -207,8 +171,7 @@ def goRight(n:int) :
     Sans effet si le drone n’a pas décollé.
     :param n: nombre de cm
     """
-    drone.goRight(n)
-    drone.display()
+    simulation.goRight(n)
 
 def rotateLeft(n:int) :
     """
@@ -216,8 +179,7 @@ def rotateLeft(n:int) :
     Sans effet si le drone n’a pas décollé.
     :param n: nombre de degrés
     """
-    drone.rotateLeft(n)
-    drone.display()
+    simulation.rotateLeft(n)
 
 def rotateRight(n:int) :
     """
@@ -225,29 +187,28 @@ def rotateRight(n:int) :
     Sans effet si le drone n’a pas décollé.
     :param n: nombre de degrés
     """
-    drone.rotateRight(n)
-    drone.display()
+    simulation.rotateRight(n)
 
 def isTargetDetected() -> bool :
     """
     Interroge le drone pour savoir s'il a trouvé la cible.
     :return: True si la cible est détectée, False sinon
     """
-    return drone.isTargetDetected()
+    return simulation.isTargetDetected()
 
 def getPosition() -> Position :
     """
     Fonction qui retourne la position courante du drone.
     :return: la position
     """
-    return drone.getCurrentPosition()
+    return simulation.getPosition()
 
 def getHeight() -> int :
     """
     Fonction qui retourne l’altitude du drone (approximative pour un drone réel), en cm.
     :return: l'altitude courante en cm
     """
-    return drone.getHeight()
+    return simulation.getHeight()
 
 def getHeading(unit:str="radian") -> float|int :
     """
@@ -255,7 +216,53 @@ def getHeading(unit:str="radian") -> float|int :
     :param unit:
     :return: le cap
     """
-    if unit=="radian" :
-        return drone.getHeading()
-    else :
-        return round(drone.getHeading()*180/pi)
\ No newline at end of file
+    return simulation.getHeading(unit)
+
+def getMissionTime() -> float|None :
+    """
+    Récupère le temps de mission simulé (la durée cumulée des déplacements), pour
+    un drone créé avec DRONE_PHYSICS.
+    :return: le temps en secondes (None pour un drone DRONE_VIRTUAL, qui se déplace instantanément)
+    """
+    return simulation.getMissionTime()
+
+def createTargets(targets, seed=None) :
+    """
+    Création d'un ensemble de cibles à rechercher dans la pièce (en plus de la cible).
+    Cette instruction doit être appelée après l'instruction 'createRoom(...)'.
+    :param targets: le nombre de cibles, placées au hasard dans la pièce, ou la liste
+                    de leurs positions (x, y, z)
+    :param seed: la graine du tirage au hasard des positions (None pour un tirage différent à chaque fois)
+    """
+    simulation.createTargets(targets, seed)
+
+def getNewTargets() -> list[Position] :
+    """
+    Récupère les cibles de l'ensemble détectées depuis l'appel précédent de cette
+    fonction (une cible est détectée quand le drone passe à moins de 50 cm).
+    :return: la liste des positions des cibles détectées, dans l'ordre de détection
+    """
+    return simulation.getNewTargets()
+
+def countDetectedTargets() -> int :
+    """
+    Récupère le nombre de cibles de l'ensemble déjà détectées.
+    :return: le nombre de cibles
+    """
+    return simulation.countDetectedTargets()
+
+def createCoverage(resolution:float=5) :
+    """
+    Mesure de la couverture de la pièce par les déplacements du drone (la part de la
+    pièce passée à moins de 50 cm du drone). Cette instruction doit être appelée après
+    l'instruction 'createRoom(...)'.
+    :param resolution: la taille des cellules de la grille de couverture (en cm)
+    """
+    simulation.createCoverage(resolution)
+
+def getCoverage() -> float :
+    """
+    Récupère la couverture de la pièce par les déplacements du drone.
+    :return: la part de la pièce couverte (en %)
+    """
+    return simulation.getCoverage()
\ No newline at end of file
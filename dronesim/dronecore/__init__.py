@@ -6,9 +6,17 @@ naviguer dans un environnement clos (une pièce).
 import time
 from abc import ABC, abstractmethod
 from enum import Enum
-from dronecore.envgeo import ARoom, Position
+from functools import wraps
+from dronecore.envgeo import ARoom, Position, Obstacle
 from math import *
 
+SIM_VERSION = "1.0"
+"""
+Version du comportement de la simulation (limites et règles des drones, détection,
+collisions, arrondis) : à changer lorsqu'une modification change les résultats d'un
+vol, pour invalider les résultats mis en cache (voir dronecore.resultcache).
+"""
+
 class DroneState(Enum) :
     KO = 0
     ONGROUND = 1
@@ -53,6 +61,20 @@ class Command :
         else :
             return "Command {} : response={} result={}".format(self.ctype.name, self.response, self.result.name)
 
+def recorded(command) :
+    """
+    Decorator of the commands of a drone : after the command (even if it raises an
+    exception, as for a crash), the drone is recorded by its recorder, if any.
+    """
+    @wraps(command)
+    def run(self, *args) :
+        try :
+            return command(self, *args)
+        finally :
+            if self.recorder is not None :
+                self.recorder.record(self)
+    return run
+
 class ADrone(ABC) :
 
     def __init__(self):
@@ -61,6 +83,7 @@ class ADrone(ABC) :
         self.viewer:AViewer|None = None # the viewer used to interact with the drone
         self.previous = Position()  # the previous position of the drone
         self.position = Position()  # the current position of the drone
+        self.recorder = None # the recorder of the trajectory (see dronecore.trajectory.TrajectoryRecorder)
 
 
     def display(self, message:str=None):
@@ -235,6 +258,13 @@ class ADrone(ABC) :
         """
         return self.command.amount
 
+    def getMissionTime(self) -> float|None :
+        """
+        Fonction qui retourne le temps de mission simulé depuis la création du drone.
+        :return: le temps en secondes, ou None si le drone ne simule pas la durée des commandes
+        """
+        return None
+
 class AViewer(ABC) :
     """
     Ancestor of drone visualisation.
@@ -269,11 +299,107 @@ class ViewerConsole(AViewer) :
     and sent command in the console.
     """
 
+    delay = 0.5
+    """
+    The pause after each displayed command (in seconds).
+    """
+
     def display(self, message:str=None):
         if message is None :
             if self.drone.getState()==DroneState.KO :
                 print(">>>>>> Drone is KO - Program stopped <<<<<<")
             print(self.getStateString()," [", self.drone.getCommand(),"]")
-            time.sleep(0.5)
+            if self.delay > 0 :
+                time.sleep(self.delay)
         else :
             print(">>>",message,"<<<")
+
+
+class ViewerNone(AViewer) :
+    """
+    Headless implementation of AViewer : nothing is shown and nothing is kept,
+    so that a drone program runs at full CPU speed (no pause between commands).
+    """
+
+    def display(self, message:str=None):
+        pass
+
+class RecordedStep :
+    """
+    A snapshot of the drone taken by ViewerRecord after a command.
+    """
+
+    def __init__(self, previous:Position, position:Position, state:DroneState, command:Command):
+        self.previous = previous # the position before the command
+        self.position = position # the position after the command
+        self.state = state # the state of the drone after the command
+        self.command = command # a copy of the command sent to the drone
+
+class _ReplayDrone :
+    """
+    Minimal stand-in of a drone, used to feed a viewer with recorded steps.
+    """
+
+    def __init__(self, step:RecordedStep):
+        self.step = step
+
+    def getPreviousPosition(self) -> Position :
+        return self.step.previous
+
+    def getCurrentPosition(self) -> Position :
+        return self.step.position
+
+    def getState(self) -> DroneState :
+        return self.step.state
+
+    def getCommand(self) -> Command :
+        return self.step.command
+
+class ViewerRecord(AViewer) :
+    """
+    Headless implementation of AViewer : nothing is shown during the flight, but the
+    trajectory is kept in memory by the recorder of the drone (a TrajectoryRecorder, see
+    dronecore.trajectory, attached to the drone if it has none), so that it can be printed
+    or rendered by another viewer afterwards.
+    """
+
+    def __init__(self, drone : ADrone, room : ARoom, target : Position = None, showDegrees : bool = True) :
+        super().__init__(drone, room, target, showDegrees)
+        from dronecore.trajectory import TrajectoryRecorder
+        if drone.recorder is None :
+            drone.recorder = TrajectoryRecorder()
+        self.recorder = drone.recorder # the recorded steps (every command is recorded by the drone, even a crash)
+        self.messages:list[str] = [] # the messages sent by the drone
+
+    @property
+    def steps(self) -> list[RecordedStep] :
+        """
+        The recorded steps, in order, as objects (see TrajectoryRecorder.getStep).
+        """
+        return [self.recorder.getStep(i) for i in range(len(self.recorder))]
+
+    def display(self, message:str=None):
+        if message is not None :
+            self.messages.append(message)
+
+    def getPathLength(self) -> float :
+        """
+        Get the length of the recorded trajectory (see TrajectoryRecorder.getPathLength).
+        :return: the length (in cm)
+        """
+        return self.recorder.getPathLength()
+
+    def printTrajectory(self):
+        """
+        Print the recorded steps in the console, as ViewerConsole would have done.
+        """
+        console = ViewerConsole(self.drone, self.room, self.target, self.showDegrees)
+        console.delay = 0
+        self.replay(console)
+
+    def replay(self, viewer:AViewer):
+        """
+        Replay the recorded steps in another viewer (for example a ViewerBasicMPL).
+        :param viewer: the viewer used to render the trajectory
+        """
+        self.recorder.replay(viewer)
@@ -0,0 +1,360 @@
+"""
+Détection des collisions entre un déplacement (un segment) et les murs d'une pièce.
+Les murs sont précalculés sous forme de tableaux contigus de segments, et la
+recherche du premier mur touché le long d'un déplacement se fait sans créer
+d'objet shapely. Pour les grandes pièces, une grille uniforme indexe les murs
+afin de ne tester que ceux qui sont proches du déplacement. Un mur peut n'exister
+qu'entre deux altitudes (les faces d'un obstacle) : il n'arrête alors que les
+déplacements faits à une altitude comprise dans cet intervalle.
+"""
+import numpy as np
+
+_EPS = 1e-9
+
+def _hitParameters(xa, ya, xb, yb, x1, y1, sx, sy) -> np.ndarray :
+    """
+    Element-wise kernel (with NumPy broadcasting) : the parameter t in [0, 1] of the
+    intersection of the segment (xa, ya) - (xb, yb) with the wall (x1, y1) - (x1+sx, y1+sy),
+    or inf if they do not intersect. For a collinear overlap, t is the first point of the overlap.
+    """
+    rx = xb - xa
+    ry = yb - ya
+    qx = x1 - xa
+    qy = y1 - ya
+    denom = rx*sy - ry*sx
+    qr = qx*ry - qy*rx
+    with np.errstate(divide="ignore", invalid="ignore") :
+        t = (qx*sy - qy*sx) / denom
+        u = qr / denom
+        hit = (denom != 0) & (t >= -_EPS) & (t <= 1+_EPS) & (u >= -_EPS) & (u <= 1+_EPS)
+        t = np.where(hit, np.clip(t, 0.0, 1.0), np.inf)
+        collinear = (denom == 0) & (qr == 0)
+        if collinear.any() :
+            rr = rx*rx + ry*ry
+            t0 = (qx*rx + qy*ry) / rr
+            t1 = ((qx+sx)*rx + (qy+sy)*ry) / rr
+            lo = np.maximum(np.minimum(t0, t1), 0.0)
+            overlap = collinear & (rr > 0) & (lo <= np.minimum(np.maximum(t0, t1), 1.0))
+            t = np.where(overlap, np.minimum(t, lo), t)
+    return t
+
+def _cellPairs(ix0:np.ndarray, iy0:np.ndarray, ix1:np.ndarray, iy1:np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray] :
+    """
+    Enumerate the cells of K rectangles of cells [ix0, ix1] x [iy0, iy1].
+    :return: for each (rectangle, cell) pair, the index of the rectangle and the cell coordinates
+    """
+    w = ix1 - ix0 + 1
+    count = w * (iy1 - iy0 + 1)
+    owner = np.repeat(np.arange(len(count)), count)
+    k = np.arange(len(owner)) - np.repeat(np.cumsum(count) - count, count)
+    return owner, ix0[owner] + k % w[owner], iy0[owner] + k // w[owner]
+
+class WallGrid :
+    """
+    A sparse uniform grid over the walls of a room : each non-empty cell holds the
+    indexes of the walls whose bounding box overlaps it. The cells are stored in a
+    compressed layout : cells[k] is the identifier of the k-th non-empty cell, and
+    its walls are walls[start[k]:start[k+1]].
+    """
+
+    def __init__(self, walls:'WallSegments', cellSize:float=None):
+        self.x0 = float(walls.xmin.min())
+        self.y0 = float(walls.ymin.min())
+        if cellSize is None :
+            # a few walls per cell along the walls
+            cellSize = max(2*float(np.median(np.hypot(walls.dx, walls.dy))), 10.0)
+        self.cellSize = cellSize # the size of a cell (in cm)
+        self.nx = int((float(walls.xmax.max()) - self.x0) // cellSize) + 1 # the number of columns
+        self.ny = int((float(walls.ymax.max()) - self.y0) // cellSize) + 1 # the number of rows
+        owner, cx, cy = _cellPairs(*self.cellRange(walls.xmin, walls.ymin, walls.xmax, walls.ymax))
+        cell = cy*self.nx + cx
+        order = np.argsort(cell, kind="stable")
+        self.walls = owner[order] # the wall indexes, sorted by cell
+        self.cells, first = np.unique(cell[order], return_index=True) # the non-empty cells
+        self.start = np.append(first, len(order)) # the first wall of each non-empty cell
+        # the same, as Python objects for single queries
+        self._walls = self.walls.tolist()
+        self._slices = {c: (a, b) for c, a, b in zip(self.cells.tolist(), self.start[:-1].tolist(), self.start[1:].tolist())}
+
+    def cellRange(self, xmin, ymin, xmax, ymax) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray] :
+        """
+        Get the range of cells [ix0, ix1] x [iy0, iy1] covered by boxes (clipped to the grid).
+        """
+        ix0 = np.clip(np.floor((np.asarray(xmin) - _EPS - self.x0) / self.cellSize), 0, self.nx-1).astype(np.int64)
+        iy0 = np.clip(np.floor((np.asarray(ymin) - _EPS - self.y0) / self.cellSize), 0, self.ny-1).astype(np.int64)
+        ix1 = np.clip(np.floor((np.asarray(xmax) + _EPS - self.x0) / self.cellSize), 0, self.nx-1).astype(np.int64)
+        iy1 = np.clip(np.floor((np.asarray(ymax) + _EPS - self.y0) / self.cellSize), 0, self.ny-1).astype(np.int64)
+        return ix0, iy0, ix1, iy1
+
+    def candidates(self, xa:float, ya:float, xb:float, yb:float) -> set[int] :
+        """
+        Get the indexes of the walls that may intersect a segment : the walls of the
+        cells crossed by the segment, row by row.
+        """
+        cs = self.cellSize
+        iy0 = min(max(int((min(ya, yb) - _EPS - self.y0) // cs), 0), self.ny-1)
+        iy1 = min(max(int((max(ya, yb) + _EPS - self.y0) // cs), 0), self.ny-1)
+        found = set()
+        for cy in range(iy0, iy1+1) :
+            if iy0 == iy1 :
+                xlo, xhi = min(xa, xb), max(xa, xb)
+            else :
+                # the part of the segment inside the row
+                t0 = (self.y0 + cy*cs - ya) / (yb - ya)
+                t1 = (self.y0 + (cy+1)*cs - ya) / (yb - ya)
+                t0, t1 = max(min(t0, t1), 0.0), min(max(t0, t1), 1.0)
+                xlo, xhi = sorted((xa + t0*(xb-xa), xa + t1*(xb-xa)))
+            ix0 = min(max(int((xlo - _EPS - self.x0) // cs), 0), self.nx-1)
+            ix1 = min(max(int((xhi + _EPS - self.x0) // cs), 0), self.nx-1)
+            for c in range(cy*self.nx+ix0, cy*self.nx+ix1+1) :
+                s = self._slices.get(c)
+                if s is not None :
+                    found.update(self._walls[s[0]:s[1]])
+        return found
+
+    def pairs(self, xa:np.ndarray, ya:np.ndarray, xb:np.ndarray, yb:np.ndarray) -> tuple[np.ndarray, np.ndarray] :
+        """
+        Get the (segment, wall) pairs to test for K segments (a wall may appear twice for a segment).
+        :return: the segment indexes and the wall indexes of the pairs
+        """
+        owner, cx, cy = _cellPairs(*self.cellRange(np.minimum(xa, xb), np.minimum(ya, yb),
+                                                   np.maximum(xa, xb), np.maximum(ya, yb)))
+        cell = cy*self.nx + cx
+        k = np.minimum(np.searchsorted(self.cells, cell), len(self.cells)-1)
+        found = self.cells[k] == cell
+        owner, k = owner[found], k[found]
+        first = self.start[k]
+        count = self.start[k+1] - first
+        segment = np.repeat(owner, count)
+        i = np.arange(len(segment)) - np.repeat(np.cumsum(count) - count, count)
+        return segment, self.walls[np.repeat(first, count) + i]
+
+class WallSegments :
+    """
+    The walls of a room, as contiguous arrays of 2D segments (x1, y1) - (x2, y2).
+    Optionally, each wall only stands between the altitudes zmin and zmax (the faces
+    of an obstacle) ; without these arrays every wall goes from the floor to the ceiling.
+    """
+
+    SMALL = 16
+    """
+    Under this number of walls, a single query tests every wall in a plain Python loop
+    (faster than NumPy calls for a handful of walls). Above, the walls far from the
+    segment are discarded first (with the grid index if any, or by bounding box).
+    """
+
+    BATCH_INDEX = 64
+    """
+    Above this number of walls, vectorized queries always use a grid index (built on
+    the first query if buildIndex was not called) : testing every segment against
+    every wall costs much more than the enumeration of the cells.
+    """
+
+    def __init__(self, x1, y1, x2, y2, zmin=None, zmax=None):
+        self.x1 = np.ascontiguousarray(x1, dtype=np.float64)
+        self.y1 = np.ascontiguousarray(y1, dtype=np.float64)
+        self.x2 = np.ascontiguousarray(x2, dtype=np.float64)
+        self.y2 = np.ascontiguousarray(y2, dtype=np.float64)
+        self.dx = self.x2 - self.x1
+        self.dy = self.y2 - self.y1
+        self.xmin = np.minimum(self.x1, self.x2)
+        self.xmax = np.maximum(self.x1, self.x2)
+        self.ymin = np.minimum(self.y1, self.y2)
+        self.ymax = np.maximum(self.y1, self.y2)
+        self.zmin:np.ndarray|None = None # the lowest altitude of each wall (None : no altitude range)
+        self.zmax:np.ndarray|None = None # the highest altitude of each wall (None : no altitude range)
+        if zmin is not None or zmax is not None :
+            self.zmin = np.broadcast_to(np.asarray(-np.inf if zmin is None else zmin, dtype=np.float64), self.x1.shape).copy()
+            self.zmax = np.broadcast_to(np.asarray(np.inf if zmax is None else zmax, dtype=np.float64), self.x1.shape).copy()
+            self._zmin = self.zmin.tolist()
+            self._zmax = self.zmax.tolist()
+        self.grid:WallGrid|None = None # the spatial index of the walls (see buildIndex)
+        self._batchGrid:WallGrid|None = None # the index used by the vectorized queries only
+        self._list = list(zip(self.x1.tolist(), self.y1.tolist(), self.dx.tolist(), self.dy.tolist()))
+
+    def __len__(self):
+        return len(self.x1)
+
+    @staticmethod
+    def fromRings(rings, zmin=None, zmax=None) -> 'WallSegments' :
+        """
+        Build the walls from closed rings of points.
+        :param rings: a sequence of rings, each ring is a sequence of (x, y) points
+        :param zmin: the lowest altitude of the walls of each ring (a sequence, or None for the floor)
+        :param zmax: the highest altitude of the walls of each ring (a sequence, or None for the ceiling)
+        :return: the walls
+        """
+        x1, y1, x2, y2, z1, z2 = [], [], [], [], [], []
+        for i, ring in enumerate(rings) :
+            c = np.asarray(ring, dtype=np.float64).reshape(-1, 2) if len(ring) > 0 else np.zeros((0, 2))
+            if c.shape[0] < 2 :
+                continue
+            x1.append(c[:-1, 0])
+            y1.append(c[:-1, 1])
+            x2.append(c[1:, 0])
+            y2.append(c[1:, 1])
+            z1.append(np.full(len(c)-1, -np.inf if zmin is None else zmin[i]))
+            z2.append(np.full(len(c)-1, np.inf if zmax is None else zmax[i]))
+        if len(x1) == 0 :
+            return WallSegments(*(np.zeros(0),)*4)
+        if zmin is None and zmax is None :
+            return WallSegments(np.concatenate(x1), np.concatenate(y1), np.concatenate(x2), np.concatenate(y2))
+        return WallSegments(np.concatenate(x1), np.concatenate(y1), np.concatenate(x2), np.concatenate(y2),
+                            np.concatenate(z1), np.concatenate(z2))
+
+    @staticmethod
+    def fromPolygon(polygon) -> 'WallSegments' :
+        """
+        Build the walls from the exterior and the interior rings (holes) of a shapely polygon.
+        :param polygon: the polygon
+        :return: the walls
+        """
+        return WallSegments.fromRings([polygon.exterior.coords]+[ring.coords for ring in polygon.interiors])
+
+    @staticmethod
+    def concatenate(parts:list['WallSegments']) -> 'WallSegments' :
+        """
+        Gather several sets of walls (the index is not kept).
+        :param parts: the sets of walls
+        :return: the walls
+        """
+        arrays = [np.concatenate([getattr(w, a) for w in parts]) for a in ("x1", "y1", "x2", "y2")]
+        if all(w.zmin is None for w in parts) :
+            return WallSegments(*arrays)
+        zmin = np.concatenate([np.full(len(w), -np.inf) if w.zmin is None else w.zmin for w in parts])
+        zmax = np.concatenate([np.full(len(w), np.inf) if w.zmax is None else w.zmax for w in parts])
+        return WallSegments(*arrays, zmin, zmax)
+
+    def buildIndex(self, cellSize:float=None) :
+        """
+        Build the uniform grid index of the walls, used by the following queries.
+        :param cellSize: the size of a cell (in cm), computed from the walls if None
+        """
+        self.grid = WallGrid(self, cellSize)
+
+    def firstHit(self, xa:float, ya:float, xb:float, yb:float, z:float=None) -> tuple[float, float]|None :
+        """
+        Get the first wall hit along the segment from (xa, ya) to (xb, yb).
+        :param z: the altitude of the segment (None to test all the walls whatever their altitudes)
+        :return: the hit point nearest to (xa, ya), or None if the segment hits no wall
+        """
+        if len(self) <= WallSegments.SMALL :
+            if z is None or self.zmin is None :
+                t = self._firstHitLoop(xa, ya, xb, yb, self._list)
+            else :
+                t = self._firstHitLoop(xa, ya, xb, yb, [self._list[i] for i in self._atAltitude(range(len(self)), z)])
+        else :
+            walls = self._atAltitude(self._candidates(xa, ya, xb, yb), z)
+            if len(walls) <= WallSegments.SMALL :
+                t = self._firstHitLoop(xa, ya, xb, yb, [self._list[i] for i in walls])
+            else :
+                t = _hitParameters(xa, ya, xb, yb, self.x1[walls], self.y1[walls], self.dx[walls], self.dy[walls]).min()
+                t = None if np.isinf(t) else float(t)
+        if t is None :
+            return None
+        return xa + t*(xb-xa), ya + t*(yb-ya)
+
+    def _candidates(self, xa:float, ya:float, xb:float, yb:float) -> np.ndarray|list :
+        """
+        Get the indexes of the walls that may intersect the segment : the walls of the
+        cells crossed by the segment if there is an index, else the walls whose bounding
+        box overlaps the bounding box of the segment.
+        """
+        if self.grid is not None :
+            return list(self.grid.candidates(xa, ya, xb, yb))
+        m = ((self.xmax >= min(xa, xb) - _EPS) & (self.xmin <= max(xa, xb) + _EPS) &
+             (self.ymax >= min(ya, yb) - _EPS) & (self.ymin <= max(ya, yb) + _EPS))
+        return np.flatnonzero(m)
+
+    def _atAltitude(self, walls, z:float) :
+        """
+        Keep the walls (given by their indexes) that stand at the altitude z.
+        """
+        if z is None or self.zmin is None :
+            return walls
+        if isinstance(walls, np.ndarray) :
+            return walls[(self.zmin[walls] <= z) & (self.zmax[walls] >= z)]
+        return [i for i in walls if self._zmin[i] <= z <= self._zmax[i]]
+
+    @staticmethod
+    def _firstHitLoop(xa:float, ya:float, xb:float, yb:float, walls:list) -> float|None :
+        """
+        Get the parameter t in [0, 1] of the first wall hit along the segment, or None.
+        :param walls: the walls to test, as (x1, y1, dx, dy) tuples
+        """
+        rx = xb - xa
+        ry = yb - ya
+        rr = rx*rx + ry*ry
+        best = None
+        for x1, y1, sx, sy in walls :
+            qx = x1 - xa
+            qy = y1 - ya
+            denom = rx*sy - ry*sx
+            qr = qx*ry - qy*rx
+            if denom != 0 :
+                t = (qx*sy - qy*sx) / denom
+                u = qr / denom
+                if -_EPS <= t <= 1+_EPS and -_EPS <= u <= 1+_EPS :
+                    t = min(max(t, 0.0), 1.0)
+                    if best is None or t < best :
+                        best = t
+            elif qr == 0 and rr > 0 :
+                # collinear : the first point of the overlap, if any
+                t0 = (qx*rx + qy*ry) / rr
+                t1 = ((qx+sx)*rx + (qy+sy)*ry) / rr
+                lo = max(min(t0, t1), 0.0)
+                if lo <= min(max(t0, t1), 1.0) and (best is None or lo < best) :
+                    best = lo
+        return best
+
+    def hitParameters(self, xa:np.ndarray, ya:np.ndarray, xb:np.ndarray, yb:np.ndarray, z:np.ndarray=None) -> np.ndarray :
+        """
+        Vectorized query : for K segments (xa, ya) - (xb, yb), get the parameter t in [0, 1]
+        of the first wall hit along each segment (inf if the segment hits no wall).
+        :param z: the altitudes of the segments (None to test all the walls whatever their altitudes)
+        :return: the array of K parameters
+        """
+        if len(self) == 0 :
+            return np.full(len(xa), np.inf)
+        levels = z is not None and self.zmin is not None
+        grid = self.grid
+        if grid is None and len(self) > WallSegments.BATCH_INDEX :
+            if self._batchGrid is None :
+                self._batchGrid = WallGrid(self)
+            grid = self._batchGrid
+        if grid is not None :
+            segment, wall = grid.pairs(xa, ya, xb, yb)
+            if levels :
+                keep = (self.zmin[wall] <= z[segment]) & (self.zmax[wall] >= z[segment])
+                segment, wall = segment[keep], wall[keep]
+            t = np.full(len(xa), np.inf)
+            np.minimum.at(t, segment, _hitParameters(xa[segment], ya[segment], xb[segment], yb[segment],
+                                                     self.x1[wall], self.y1[wall], self.dx[wall], self.dy[wall]))
+            return t
+        t = _hitParameters(xa[:, None], ya[:, None], xb[:, None], yb[:, None],
+                           self.x1[None, :], self.y1[None, :], self.dx[None, :], self.dy[None, :])
+        if levels :
+            t = np.where((self.zmin[None, :] <= z[:, None]) & (self.zmax[None, :] >= z[:, None]), t, np.inf)
+        return t.min(axis=1)
+
+    def firstHits(self, xa:np.ndarray, ya:np.ndarray, xb:np.ndarray, yb:np.ndarray, z=None,
+                  chunk:int=1_000_000) -> tuple[np.ndarray, np.ndarray, np.ndarray] :
+        """
+        Get the first wall hit along K segments at once.
+        :param z: the altitudes of the segments (a number or K numbers, None to test all the walls)
+        :param chunk: the maximum number of segment-wall pairs tested at once without index,
+                      or of segments tested at once with the index (bounds the memory)
+        :return: a mask of the segments that hit a wall, and the coordinates x, y of the hits
+                 (the end of the segment when there is no hit)
+        """
+        t = np.empty(len(xa))
+        if z is not None :
+            z = np.broadcast_to(np.asarray(z, dtype=np.float64), np.shape(xa))
+        indexed = self.grid is not None or len(self) > WallSegments.BATCH_INDEX
+        step = max(1, chunk // 256) if indexed else max(1, chunk // max(1, len(self)))
+        for i in range(0, len(xa), step) :
+            s = slice(i, i+step)
+            t[s] = self.hitParameters(xa[s], ya[s], xb[s], yb[s], None if z is None else z[s])
+        hit = np.isfinite(t)
+        t = np.where(hit, t, 1.0)
+        return hit, np.where(hit, xa + t*(xb-xa), xb), np.where(hit, ya + t*(yb-ya), yb)
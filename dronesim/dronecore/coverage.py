@@ -0,0 +1,109 @@
+"""
+Couverture de la pièce par un drone : une grille d'occupation (une cellule de quelques
+cm) sur laquelle chaque déplacement marque les cellules vues par le drone, c'est-à-dire
+à moins du rayon de détection du segment parcouru (une capsule). La pièce n'est
+rastérisée qu'une fois ; chaque déplacement ne traite que la fenêtre de la grille
+autour du segment, dont la taille ne dépend que de la longueur du déplacement.
+Le pourcentage de couverture et le nombre de revisites sont tenus à jour à chaque
+déplacement.
+"""
+import numpy as np
+import shapely
+from math import floor, ceil
+from dronecore.envgeo import Position
+
+class CoverageGrid :
+    """
+    The coverage of a room (with a 'geometry' attribute, see RoomShp) by the moves of a drone.
+    """
+
+    def __init__(self, room, resolution:float=5, radius:float=50):
+        """
+        :param room: the room (its outline and its holes are rasterized once)
+        :param resolution: the size of the cells (in cm)
+        :param radius: the radius seen around the drone (in cm), the detection radius
+        """
+        self.resolution = resolution
+        self.radius = radius
+        xmin, ymin, xmax, ymax = room.geometry.bounds
+        self.x0 = xmin # the origin of the grid
+        self.y0 = ymin
+        self.columns = max(1, ceil((xmax - xmin) / resolution))
+        self.rows = max(1, ceil((ymax - ymin) / resolution))
+        xs = xmin + (np.arange(self.columns) + 0.5) * resolution
+        ys = ymin + (np.arange(self.rows) + 0.5) * resolution
+        self.inside = shapely.contains_xy(room.geometry, xs[None, :], ys[:, None]) # the cells of the room (rows x columns)
+        self.counts = np.zeros((self.rows, self.columns), dtype=np.uint16) # the number of times each cell was seen
+        self.cells = int(np.count_nonzero(self.inside)) # the number of cells of the room
+        self.covered = 0 # the number of cells of the room seen at least once
+        self.revisits = 0 # the number of times a cell of the room was seen again
+        self.moves = 0 # the number of marked moves
+        self._xs = xs
+        self._ys = ys
+
+    def __str__(self):
+        return "Coverage {:.1f} % ({} cells of {} cm, {} revisits)".format(
+            self.getCoverage(), self.cells, self.resolution, self.revisits)
+
+    def getCoverage(self) -> float :
+        """
+        Get the part of the room seen by the drone.
+        :return: the coverage (in %)
+        """
+        return 100.0 * self.covered / self.cells if self.cells > 0 else 0.0
+
+    def getHeatmap(self) -> np.ndarray :
+        """
+        Get the number of times each cell was seen (rows = y, columns = x), -1 outside the room,
+        to display with imshow(heatmap, origin="lower", extent=grid.getExtent()).
+        """
+        return np.where(self.inside, self.counts.astype(np.int32), -1)
+
+    def getExtent(self) -> tuple[float, float, float, float] :
+        """
+        Get the extent (xmin, xmax, ymin, ymax) of the grid.
+        """
+        return (self.x0, self.x0 + self.columns * self.resolution, self.y0, self.y0 + self.rows * self.resolution)
+
+    def mark(self, p1:Position, p2:Position) :
+        """
+        Mark the cells seen during a move from p1 to p2 : the cells at less than the radius of the
+        segment, in the horizontal plane. The cells around p1 were already seen at the end of the
+        previous move : they are not marked again (except for the first move).
+        """
+        r = self.radius
+        first = self.moves == 0
+        self.moves += 1
+        ux = p2.x - p1.x
+        uy = p2.y - p1.y
+        l2 = ux*ux + uy*uy
+        if l2 == 0 and not first :
+            return
+        # the window of the grid around the segment
+        res = self.resolution
+        c0 = max(floor((min(p1.x, p2.x) - r - self.x0) / res), 0)
+        c1 = min(floor((max(p1.x, p2.x) + r - self.x0) / res), self.columns - 1)
+        r0 = max(floor((min(p1.y, p2.y) - r - self.y0) / res), 0)
+        r1 = min(floor((max(p1.y, p2.y) + r - self.y0) / res), self.rows - 1)
+        if c0 > c1 or r0 > r1 :
+            return
+        dx = self._xs[None, c0:c1+1] - p1.x
+        dy = self._ys[r0:r1+1, None] - p1.y
+        r2 = r*r
+        if l2 == 0 :
+            seen = dx*dx + dy*dy < r2
+        else :
+            # the distance to the segment : the projection on the line, clamped to the segment
+            t = np.clip((dx*ux + dy*uy) / l2, 0.0, 1.0)
+            ex = dx - t*ux
+            ey = dy - t*uy
+            seen = ex*ex + ey*ey < r2
+            if not first :
+                seen &= dx*dx + dy*dy >= r2
+        seen &= self.inside[r0:r1+1, c0:c1+1]
+        window = self.counts[r0:r1+1, c0:c1+1]
+        counts = window[seen]
+        new = int(np.count_nonzero(counts == 0))
+        self.covered += new
+        self.revisits += len(counts) - new
+        window[seen] = np.minimum(counts, np.iinfo(np.uint16).max - 1) + 1
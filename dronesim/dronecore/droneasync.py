@@ -0,0 +1,210 @@
+"""
+Façade asynchrone (asyncio) des drones : 'await drone.forward(100)', et plusieurs
+drones commandés en même temps avec asyncio.gather, dans une seule boucle
+d'événements. Les drones virtuels avancent sur une horloge simulée (SimClock) :
+chaque commande dure le temps du déplacement, mais l'horloge saute directement
+au prochain réveil, sans attendre. Les drones réels (DroneTello) exécutent leurs
+commandes bloquantes dans des threads, sans horloge simulée : l'horloge ne peut pas
+savoir qu'un thread ou une entrée-sortie réelle est en cours, elle sauterait le temps
+de ce travail. Une boucle menée par une SimClock n'accepte donc que des drones
+simulés. Les vues ne sont pas appelées (ni pause).
+"""
+import asyncio
+import heapq
+import itertools
+import weakref
+from dronecore import *
+from dronecore.dronevirt import DroneVirtual
+
+_running:weakref.WeakKeyDictionary = weakref.WeakKeyDictionary() # the clock that drives each event loop
+
+class SimClock :
+    """
+    A simulated clock for asyncio : the coroutines wait with 'await clock.sleep(delay)',
+    and the clock jumps to the earliest wake-up as soon as all the coroutines wait
+    (that is when no wake-up was added during 'settle' iterations of the event loop).
+    The coroutines run by the clock must only wait for the clock (or for each other) :
+    a real wait (network, asyncio.to_thread...) is not seen by the clock, which would
+    jump while it is pending. AsyncDrone enforces it : only simulated drones (DroneVirtual)
+    fly with a clock, and a drone without clock refuses to run in a loop driven by a clock.
+    """
+
+    def __init__(self, settle:int=4):
+        self.time = 0.0 # the simulated time (in s)
+        self.settle = settle # the number of idle iterations of the event loop before the clock jumps
+        self._heap = [] # the wake-ups (time, order, future)
+        self._order = itertools.count()
+        self._changed = False
+        self._pending = None # an event set when a wake-up is added
+
+    def sleep(self, delay:float) -> asyncio.Future :
+        """
+        Wait for a simulated delay (to be awaited).
+        :param delay: the delay (in s)
+        """
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (self.time + max(0.0, delay), next(self._order), future))
+        self._changed = True
+        if self._pending is not None :
+            self._pending.set()
+        return future
+
+    async def _advance(self) :
+        """
+        The task that moves the clock forward, while the main coroutine runs.
+        """
+        self._pending = asyncio.Event()
+        while True :
+            if not self._heap :
+                self._pending.clear()
+                await self._pending.wait()
+            idle = 0
+            while idle < self.settle :
+                self._changed = False
+                await asyncio.sleep(0)
+                idle = 0 if self._changed else idle + 1
+            if not self._heap :
+                continue
+            # wake up all the coroutines waiting for the earliest time
+            self.time = self._heap[0][0]
+            while self._heap and self._heap[0][0] <= self.time :
+                future = heapq.heappop(self._heap)[2]
+                if not future.done() :
+                    future.set_result(None)
+
+    async def _main(self, coroutine) :
+        loop = asyncio.get_running_loop()
+        _running[loop] = self
+        advance = asyncio.create_task(self._advance())
+        try :
+            return await coroutine
+        finally :
+            advance.cancel()
+            del _running[loop]
+
+    @staticmethod
+    def getRunning() -> 'SimClock|None' :
+        """
+        Get the clock that drives the running event loop, if any.
+        """
+        return _running.get(asyncio.get_running_loop())
+
+    def run(self, coroutine) :
+        """
+        Run a coroutine in a new event loop, with this clock.
+        :return: the result of the coroutine
+        """
+        return asyncio.run(self._main(coroutine))
+
+class AsyncDrone :
+    """
+    Asynchronous facade of a drone (ADrone) : its commands are coroutines.
+    With a clock, the commands run at once and then wait for their simulated duration
+    (given by the mission time of the drone if it has one, else by the speeds below) ;
+    without clock, the commands run in a thread. The commands of one drone never overlap.
+    Only a simulated drone (DroneVirtual, DronePhysics) can have a clock, and a drone
+    without clock cannot be commanded in a loop driven by a clock (see SimClock).
+    """
+
+    SPEED = 100.0
+    """
+    The horizontal speed of a drone without mission time (in cm/s).
+    """
+
+    VERTICAL_SPEED = 80.0
+    """
+    The vertical speed of a drone without mission time (in cm/s).
+    """
+
+    YAW_RATE = 100.0
+    """
+    The rotation speed of a drone without mission time (in degree/s).
+    """
+
+    def __init__(self, drone:ADrone, clock:SimClock=None):
+        if clock is not None and not isinstance(drone, DroneVirtual) :
+            raise Exception("Only a simulated drone can fly with a simulated clock, not {}".format(type(drone).__name__))
+        self.drone = drone # the drone to command
+        self.clock = clock # the simulated clock (None for a real drone)
+        self._lock = asyncio.Lock()
+
+    def __str__(self):
+        return "Asynchronous facade of : {}".format(self.drone)
+
+    def _duration(self, p0:Position, p1:Position, t0:float|None) -> float :
+        """
+        The simulated duration of the last command, that moved the drone from p0 to p1.
+        """
+        if t0 is not None :
+            return self.drone.getMissionTime() - t0
+        if p1.heading != p0.heading :
+            return abs(p1.heading - p0.heading) * 180 / pi / self.YAW_RATE
+        return sqrt((p1.x - p0.x)**2 + (p1.y - p0.y)**2) / self.SPEED + abs(p1.z - p0.z) / self.VERTICAL_SPEED
+
+    async def _run(self, command, *args) :
+        async with self._lock :
+            if self.clock is None :
+                if SimClock.getRunning() is not None :
+                    raise Exception("A drone without simulated clock cannot run in a loop driven by a simulated clock")
+                return await asyncio.to_thread(command, *args)
+            p = self.drone.getCurrentPosition()
+            p0 = Position(p.x, p.y, p.z, p.heading)
+            t0 = self.drone.getMissionTime()
+            try :
+                return command(*args)
+            finally :
+                # a crash takes time too
+                await self.clock.sleep(self._duration(p0, self.drone.getCurrentPosition(), t0))
+
+    async def locate(self, x:float, y:float, heading:int, room:ARoom) :
+        # the drone is placed, it does not fly : no duration
+        async with self._lock :
+            return self.drone.locate(x, y, heading, room)
+
+    async def takeOff(self) :
+        return await self._run(self.drone.takeOff)
+
+    async def land(self) :
+        return await self._run(self.drone.land)
+
+    async def forward(self, n:int) :
+        return await self._run(self.drone.forward, n)
+
+    async def backward(self, n:int) :
+        return await self._run(self.drone.backward, n)
+
+    async def goUp(self, n:int) :
+        return await self._run(self.drone.goUp, n)
+
+    async def goDown(self, n:int) :
+        return await self._run(self.drone.goDown, n)
+
+    async def goLeft(self, n:int) :
+        return await self._run(self.drone.goLeft, n)
+
+    async def goRight(self, n:int) :
+        return await self._run(self.drone.goRight, n)
+
+    async def rotateLeft(self, n:int) :
+        return await self._run(self.drone.rotateLeft, n)
+
+    async def rotateRight(self, n:int) :
+        return await self._run(self.drone.rotateRight, n)
+
+    def isTargetDetected(self) -> bool :
+        return self.drone.isTargetDetected()
+
+    def getCurrentPosition(self) -> Position :
+        return self.drone.getCurrentPosition()
+
+    def getState(self) -> DroneState :
+        return self.drone.getState()
+
+    def getCommand(self) -> Command :
+        return self.drone.getCommand()
+
+    def getHeight(self) -> int :
+        return self.drone.getHeight()
+
+    def getHeading(self) -> float :
+        return self.drone.getHeading()
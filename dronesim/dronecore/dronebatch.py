@@ -0,0 +1,231 @@
+"""
+Moteur de simulation d'un lot de drones virtuels : les états de N drones sont
+stockés dans des tableaux NumPy, et une commande (ou un vecteur de commandes,
+une par drone) est appliquée à tous les drones en une seule fois, avec les
+mêmes règles que la classe DroneVirtual.
+"""
+import numpy as np
+from dronecore import *
+from math import pi
+
+COMMAND_CODES = list(CommandType)
+"""
+The command types, indexed by their opcode (see DroneBatch.opcode).
+"""
+
+RESULT_CODES = list(CommandResult)
+"""
+The command results, indexed by the codes stored in DroneBatch.result.
+"""
+
+_OK = RESULT_CODES.index(CommandResult.RES_OK)
+_NO = RESULT_CODES.index(CommandResult.RES_NO)
+_BREAK = RESULT_CODES.index(CommandResult.RES_BREAK)
+_KO = DroneState.KO.value
+_ONGROUND = DroneState.ONGROUND.value
+_INFLIGHT = DroneState.INFLIGHT.value
+
+# Unit vector of each translation, in the drone's frame (forward, left)
+_TRANSLATIONS = {CommandType.CMD_FORWARD: (1, 0), CommandType.CMD_BACKWARD: (-1, 0),
+                 CommandType.CMD_GOLEFT: (0, 1), CommandType.CMD_GORIGHT: (0, -1)}
+
+class DroneBatch :
+    """
+    A batch of N virtual drones in the same room. The state of the drones is held
+    in NumPy arrays (x, y, z, heading in radians, state, result of the last command
+    and target detection) and every command is applied to all the drones at once.
+    The room must provide its walls as WallSegments (attribute 'walls', see RoomShp).
+    """
+
+    def __init__(self, n:int, room:ARoom, target:Position=None):
+        self.minMove = 20  # minimum movement (in cm)
+        self.maxMove = 500  # maximum movement (in cm)
+        self.minRotation = 1  # minimum rotation (in degree)
+        self.maxRotation = 360  # maximum rotation (in degree)
+        self.takeoffAltitude = 80  # altitude when take off (in cm)
+        self.minSecAltitude = 10  # minimum security altitude (in cm)
+        self.radiusDetection = 50  # radius detection of a target (in cm)
+        self.sweptDetection = False  # true to detect the target along the whole move, not only at its end
+        self.room = room  # the room where the drones are located
+        self.target = target  # the position of the target in the room
+        self.size = n # the number of drones
+        self.x = np.zeros(n)
+        self.y = np.zeros(n)
+        self.z = np.zeros(n)
+        self.heading = np.zeros(n) # the headings (in radians)
+        self.state = np.full(n, _ONGROUND, dtype=np.int8) # the states (values of DroneState)
+        self.result = np.full(n, _OK, dtype=np.int8) # the results of the last command (indexes in RESULT_CODES)
+        self.detected = np.zeros(n, dtype=bool) # the detection values (true = target detected)
+
+    def __str__(self):
+        return "Batch of {} virtual drones (class DroneBatch) - {} in flight, {} KO".format(
+            self.size, self.countState(DroneState.INFLIGHT), self.countState(DroneState.KO))
+
+    @staticmethod
+    def opcode(ctype:CommandType) -> int :
+        """
+        Get the opcode of a command type, to build a vector of commands.
+        :param ctype: the command type
+        :return: the opcode
+        """
+        return COMMAND_CODES.index(ctype)
+
+    def countState(self, state:DroneState) -> int :
+        """
+        Count the drones in the given state.
+        :param state: the state
+        :return: the number of drones
+        """
+        return int(np.count_nonzero(self.state == state.value))
+
+    def getPosition(self, i:int) -> Position :
+        """
+        Get the position of a drone of the batch.
+        :param i: the index of the drone
+        :return: a copy of its position
+        """
+        return Position(self.x[i], self.y[i], self.z[i], self.heading[i])
+
+    def getResult(self, i:int) -> CommandResult :
+        """
+        Get the result of the last command for a drone of the batch.
+        :param i: the index of the drone
+        :return: the result
+        """
+        return RESULT_CODES[self.result[i]]
+
+    def locate(self, x, y, heading) :
+        """
+        Locate the drones on the ground (only the drones that are on the ground).
+        :param x: the abscissa (a number or an array of N numbers)
+        :param y: the ordinate (a number or an array of N numbers)
+        :param heading: the heading in degrees (a number or an array of N numbers)
+        """
+        m = self.state == _ONGROUND
+        self.x[m] = np.broadcast_to(x, self.size)[m]
+        self.y[m] = np.broadcast_to(y, self.size)[m]
+        self.z[m] = 0
+        self.heading[m] = np.broadcast_to(np.multiply(pi, heading)/180, self.size)[m]
+        self.result[:] = np.where(m, _OK, _NO)
+
+    def apply(self, ctype, amount=-1) :
+        """
+        Apply a command to all the drones of the batch.
+        :param ctype: a CommandType for all the drones, or an array of N opcodes (see opcode)
+        :param amount: the amount of the command (a number or an array of N numbers)
+        """
+        if isinstance(ctype, CommandType) :
+            op = np.full(self.size, self.opcode(ctype), dtype=np.int8)
+        else :
+            op = np.asarray(ctype)
+        n = np.broadcast_to(amount, self.size)
+        flying = self.state == _INFLIGHT
+        start = (self.x.copy(), self.y.copy(), self.z.copy()) if self.sweptDetection else None
+        result = np.full(self.size, _NO, dtype=np.int8)
+        ok = np.zeros(self.size, dtype=bool)
+        floor, ceiling = self._verticalLimits()
+        # Take off (crash on the ceiling or an obstacle)
+        m = (op == self.opcode(CommandType.CMD_TAKEOFF)) & (self.state == _ONGROUND)
+        crash = m & (self.z + self.takeoffAltitude >= ceiling)
+        self.z[crash] = ceiling[crash]
+        self.state[crash] = _KO
+        result[crash] = _BREAK
+        m &= ~crash
+        self.z[m] += self.takeoffAltitude
+        self.state[m] = _INFLIGHT
+        ok |= m
+        # Land (on the floor or on an obstacle)
+        m = (op == self.opcode(CommandType.CMD_LAND)) & flying
+        self.z[m] = floor[m]
+        self.state[m] = _ONGROUND
+        ok |= m
+        # Up (crash on the ceiling or an obstacle) and down (safety altitude over the floor or an obstacle)
+        m = (op == self.opcode(CommandType.CMD_GOUP)) & flying
+        crash = m & (self.z + n >= ceiling)
+        self.z[crash] = ceiling[crash]
+        self.state[crash] = _KO
+        result[crash] = _BREAK
+        m &= ~crash
+        self.z[m] += n[m]
+        ok |= m
+        m = (op == self.opcode(CommandType.CMD_GODOWN)) & flying
+        low = floor[m] + self.minSecAltitude
+        self.z[m] = np.where(self.z[m] - n[m] <= low, low, self.z[m] - n[m])
+        ok |= m
+        # Rotations
+        valid = flying & (n >= self.minRotation) & (n <= self.maxRotation)
+        m = (op == self.opcode(CommandType.CMD_ROTATELEFT)) & valid
+        self.heading[m] += (pi * n[m]) / 180.0
+        ok |= m
+        m = (op == self.opcode(CommandType.CMD_ROTATERIGHT)) & valid
+        self.heading[m] -= (pi * n[m]) / 180.0
+        ok |= m
+        # Translations
+        valid = flying & (n >= self.minMove) & (n <= self.maxMove)
+        front = np.zeros(self.size)
+        left = np.zeros(self.size)
+        for ct, (f, l) in _TRANSLATIONS.items() :
+            m = (op == self.opcode(ct)) & valid
+            front[m] = f * n[m]
+            left[m] = l * n[m]
+        m = (front != 0) | (left != 0)
+        if m.any() :
+            ok |= self._translate(np.flatnonzero(m), front[m], left[m], result)
+        result[ok] = _OK
+        self.result[:] = result
+        self._detectTarget(ok, start)
+
+    def _translate(self, idx:np.ndarray, front:np.ndarray, left:np.ndarray, result:np.ndarray) -> np.ndarray :
+        """
+        Move the drones of indexes idx in their own frame, and stop at the first wall hit.
+        :return: a mask of the drones that moved without crash
+        """
+        cos_h = np.cos(self.heading[idx])
+        sin_h = np.sin(self.heading[idx])
+        x0 = self.x[idx]
+        y0 = self.y[idx]
+        x1 = np.round(x0 + front*cos_h - left*sin_h)
+        y1 = np.round(y0 + front*sin_h + left*cos_h)
+        hit, x1, y1 = self.room.walls.firstHits(x0, y0, x1, y1, self.z[idx])
+        crashed = idx[hit]
+        self.state[crashed] = _KO
+        result[crashed] = _BREAK
+        self.x[idx] = x1
+        self.y[idx] = y1
+        ok = np.zeros(self.size, dtype=bool)
+        ok[idx[~hit]] = True
+        return ok
+
+    def _verticalLimits(self) -> tuple[np.ndarray, np.ndarray] :
+        """
+        Get the lowest and highest altitudes reachable by each drone (see ARoom.getVerticalLimits).
+        """
+        floor = np.zeros(self.size)
+        ceiling = np.full(self.size, float(self.room.getHeight()))
+        for o in self.room.getObstacles() :
+            m = (self.x > o.xmin) & (self.x < o.xmax) & (self.y > o.ymin) & (self.y < o.ymax)
+            below = m & (self.z >= o.zmax)
+            floor[below] = np.maximum(floor[below], o.zmax)
+            above = m & ~below & (self.z <= o.zmin)
+            ceiling[above] = np.minimum(ceiling[above], o.zmin)
+        return floor, ceiling
+
+    def _detectTarget(self, ok:np.ndarray, start:tuple=None) :
+        """
+        Update the detection values of the drones whose last command succeeded.
+        :param start: the positions (x, y, z) before the command, to detect along the moves (see sweptDetection)
+        """
+        if self.target is not None :
+            t = self.target
+            if start is None :
+                dx, dy, dz = t.x - self.x, t.y - self.y, t.z - self.z
+            else :
+                # distance to the moves : the projection of the target on each segment, clamped to its ends
+                x0, y0, z0 = start
+                ux, uy, uz = self.x - x0, self.y - y0, self.z - z0
+                dx, dy, dz = t.x - x0, t.y - y0, t.z - z0
+                l2 = ux*ux + uy*uy + uz*uz
+                s = np.clip(np.divide(dx*ux + dy*uy + dz*uz, l2, out=np.zeros(self.size), where=l2 > 0), 0.0, 1.0)
+                dx, dy, dz = dx - s*ux, dy - s*uy, dz - s*uz
+            d2 = dx*dx + dy*dy + dz*dz
+            self.detected[ok] = d2[ok] < self.radiusDetection**2
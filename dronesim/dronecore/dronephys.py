@@ -0,0 +1,86 @@
+"""
+Mode physique du drone virtuel : les commandes ne téléportent plus le drone, qui
+accélère, vole à sa vitesse maximale puis décélère, avec des valeurs proches de
+celles d'un Tello Edu. Les positions sont intégrées à pas de temps fixe et chaque
+commande a une durée simulée (le temps de mission). Les collisions restent testées
+le long du trajet réel (rectiligne) : le drone s'arrête sur le premier mur touché,
+à l'instant où il l'atteint.
+"""
+from math import sqrt
+from dronecore.dronevirt import *
+
+class DronePhysics(DroneVirtual) :
+    """
+    A virtual drone whose movements take time : each movement follows a trapezoidal
+    speed profile (acceleration, maximum speed, deceleration, from rest to rest)
+    integrated at a fixed time step, and the rotations follow the yaw rate. The
+    final positions are the same as with DroneVirtual.
+    """
+
+    def __init__(self, dt:float=0.01):
+        super().__init__()
+        self.maxSpeed = 100.0  # maximum horizontal speed (in cm/s)
+        self.maxVerticalSpeed = 80.0  # maximum vertical speed (in cm/s)
+        self.acceleration = 250.0  # acceleration and deceleration (in cm/s²)
+        self.yawRate = 100.0  # maximum rotation speed (in degree/s)
+        self.yawAcceleration = 400.0  # rotation acceleration (in degree/s²)
+        self.dt = dt  # the time step of the integration (in s)
+        self.time = 0.0  # the mission time (in s)
+        self.commandTime = 0.0  # the duration of the last movement (in s)
+        self.onStep = None  # a function f(drone, t, x, y, z, heading) called at each time step, to sample the flight
+
+    def __str__(self):
+        return "Virtual drone with flight dynamics (class DronePhysics) - state = {} - mission time = {:.2f} s".format(
+            self.state, self.time)
+
+    def getMissionTime(self) -> float :
+        return self.time
+
+    def _flight(self) :
+        super()._flight()
+        p0 = self.previous
+        p1 = self.position
+        dx = p1.x - p0.x
+        dy = p1.y - p0.y
+        dz = p1.z - p0.z
+        dh = p1.heading - p0.heading
+        if dh != 0 :
+            duration = self._integrate(abs(dh)*180/pi, self.yawRate, self.yawAcceleration, dx, dy, dz, dh)
+        elif dx != 0 or dy != 0 :
+            duration = self._integrate(sqrt(dx*dx + dy*dy), self.maxSpeed, self.acceleration, dx, dy, dz, dh)
+        else :
+            duration = self._integrate(abs(dz), self.maxVerticalSpeed, self.acceleration, dx, dy, dz, dh)
+        self.commandTime = duration
+        self.time += duration
+
+    def _integrate(self, distance:float, vmax:float, accel:float, dx:float, dy:float, dz:float, dh:float) -> float :
+        """
+        Integrate a movement from rest to rest along the segment from self.previous, at the fixed time step.
+        :param distance: the length of the movement (in cm or in degrees)
+        :param vmax: the maximum speed
+        :param accel: the acceleration and deceleration
+        :param dx, dy, dz, dh: the changes of the coordinates and of the heading during the movement
+        :return: the duration of the movement (in s)
+        """
+        dt = self.dt
+        step = self.onStep
+        p0 = self.previous
+        t = 0.0
+        s = 0.0
+        v = 0.0
+        while s < distance :
+            # accelerate up to the maximum speed, but keep the speed from which the drone can stop in time
+            v += accel*dt
+            if v > vmax :
+                v = vmax
+            vstop = sqrt(2*accel*(distance - s))
+            if v > vstop :
+                v = vstop
+            s += v*dt
+            if s > distance :
+                s = distance
+            t += dt
+            if step is not None :
+                f = s / distance
+                step(self, self.time + t, p0.x + dx*f, p0.y + dy*f, p0.z + dz*f, p0.heading + dh*f)
+        return t
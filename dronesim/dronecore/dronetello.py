@@ -0,0 +1,418 @@
+"""
+Implémentation de la classe abstraite ADrone pour un drone réel de type Tello Edu,
+commandé avec le protocole texte du SDK Tello sur UDP : les commandes sont envoyées
+au port 8889 du drone, qui répond à chacune ("ok", "error..." ou une valeur), et
+l'état du drone (télémétrie) est reçu en continu sur le port 8890 par un thread.
+Les commandes sont mises en file et envoyées sans attendre les réponses précédentes
+(au plus 'window' commandes en attente), et les réponses sont associées aux
+commandes dans l'ordre d'envoi. Les réponses ne portant pas d'identifiant, seules
+les lectures (commandes en '?') sont renvoyées par défaut quand leur réponse tarde,
+un déplacement renvoyé serait volé deux fois ; après un renvoi ou une commande sans
+réponse, les commandes suivantes attendent la réponse en retard, qui est ignorée. Le drone ne mesure pas sa position : elle est
+estimée à partir des commandes réussies, avec les mêmes règles que le drone virtuel.
+"""
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from dronecore import *
+from math import *
+
+def parseState(data:bytes) -> dict[str, float|str] :
+    """
+    Parse a state packet of the Tello SDK ("pitch:0;roll:0;yaw:-90;...;h:80;bat:87;...\\r\\n").
+    :param data: the packet
+    :return: the values by name (numbers when they can be converted, else strings)
+    """
+    state = {}
+    for field in data.decode("ascii", "replace").strip().split(";") :
+        name, sep, value = field.partition(":")
+        if sep :
+            try :
+                state[name] = float(value)
+            except ValueError :
+                state[name] = value
+    return state
+
+class _Pending :
+    """
+    A command queued or sent to the drone, waiting for its response.
+    """
+
+    def __init__(self, text:str, retries:int):
+        self.text = text # the text of the command
+        self.retries = retries # the number of times the command may be sent again
+        self.future = Future() # the future response
+        self.attempts = 0 # the number of times the command was sent
+        self.deadline = 0.0 # the time (time.monotonic) after which the command is sent again or fails
+
+class DroneTello(ADrone) :
+    """
+    A Tello Edu drone, commanded over UDP with the text protocol of the Tello SDK.
+    The connection is opened by connect() and closed by close().
+    """
+
+    HOST = "192.168.10.1"
+    """
+    The default address of the drone (the access point of its Wi-Fi network).
+    """
+
+    PORT = 8889
+    """
+    The default UDP port of the commands on the drone.
+    """
+
+    STATE_PORT = 8890
+    """
+    The default local UDP port on which the drone sends its state.
+    """
+
+    TICK = 0.05
+    """
+    The period of the checks of the timeouts by the receiver (in s).
+    """
+
+    def __init__(self, host:str=None, port:int=None, statePort:int=None, timeout:float=7.0, retries:int=2, window:int=1,
+                 retryMoves:bool=False):
+        """
+        :param host: the address of the drone (default : HOST)
+        :param port: the command port of the drone (default : PORT)
+        :param statePort: the local port of the state packets (default : STATE_PORT)
+        :param timeout: the time to wait for a response before sending the command again (in s)
+        :param retries: the number of times a read command ("battery?"...) or "command" is sent again before
+                        failing ; as the responses carry no identifier, the retries are only safe with window=1
+        :param window: the maximum number of commands waiting for their response
+        :param retryMoves: true to send again the other commands too (a move whose response is late would be flown twice)
+        """
+        super().__init__()
+        self.minMove = 20  # minimum movement (in cm)
+        self.maxMove = 500  # maximum movement (in cm)
+        self.minRotation = 1  # minimum rotation (in degree)
+        self.maxRotation = 360  # maximum rotation (in degree)
+        self.takeoffAltitude = 80  # altitude when take off (in cm)
+        self.minSecAltitude = 10  # minimum security altitude (in cm)
+        self.radiusDetection = 50  # radius detection of a target (in cm)
+        self.room = None  # the room where the drone is located
+        self.target = None  # the position of the target in the room
+        self.targets = None  # the set of targets to search, if any (see dronecore.targets.TargetSet)
+        self.detected = False  # the detection value (true = target detected, from the estimated position)
+        self.address = (host or DroneTello.HOST, port or DroneTello.PORT) # the address of the drone
+        self.statePort = DroneTello.STATE_PORT if statePort is None else statePort # the local port of the state packets
+        self.timeout = timeout
+        self.retries = retries
+        self.retryMoves = retryMoves
+        self.window = max(1, window)
+        self.telemetry:dict[str, float|str] = {} # the last state received from the drone
+        self.telemetryTime = None # the time (time.monotonic) of the last state received
+        self._socket = None
+        self._stateSocket = None
+        self._running = False
+        self._threads = []
+        self._lock = threading.Lock()
+        self._queue:deque[_Pending] = deque() # the commands waiting to be sent
+        self._inflight:deque[_Pending] = deque() # the commands sent, waiting for their response (in order)
+        self._late = 0 # the number of late responses expected (to commands sent again, or failed without response)
+        self._lateUntil = 0.0 # the time (time.monotonic) after which the late responses are considered lost
+
+    def __str__(self):
+        return "Tello drone (class DroneTello) at {}:{} - state = {}".format(self.address[0], self.address[1], self.state)
+
+    def setFlightParameters(self, filename: str) :
+        pass
+
+    ##############
+    # Connection #
+    ##############
+
+    def connect(self) :
+        """
+        Open the sockets, start the receivers of the responses and of the state, and
+        put the drone in SDK mode (command "command").
+        """
+        if self._socket is not None :
+            return
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind(("", 0))
+        self._socket.settimeout(self.TICK)
+        self._stateSocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._stateSocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._stateSocket.bind(("", self.statePort))
+        self._stateSocket.settimeout(self.TICK)
+        self._running = True
+        self._threads = [threading.Thread(target=self._receive, daemon=True),
+                         threading.Thread(target=self._receiveState, daemon=True)]
+        for t in self._threads :
+            t.start()
+        response = self.send("command")
+        if response != "ok" :
+            self.close()
+            raise Exception("The drone at {}:{} refuses the SDK mode : {}".format(self.address[0], self.address[1], response))
+
+    def close(self) :
+        """
+        Close the connection : the commands without response fail.
+        """
+        if self._socket is None :
+            return
+        self._running = False
+        for t in self._threads :
+            t.join()
+        self._socket.close()
+        self._stateSocket.close()
+        self._socket = None
+        with self._lock :
+            for p in list(self._inflight) + list(self._queue) :
+                p.future.set_exception(Exception("Connection to the drone closed"))
+            self._inflight.clear()
+            self._queue.clear()
+
+    def sendAsync(self, text:str) -> Future :
+        """
+        Queue a command of the Tello SDK, sent as soon as less than 'window' commands wait for their response.
+        :param text: the command (for example "forward 100" or "battery?")
+        :return: the future response of the drone (the future fails if the drone does not respond)
+        """
+        if not self._running :
+            raise Exception("The drone is not connected")
+        p = _Pending(text, self.retries if self.retryMoves or DroneTello.isRepeatable(text) else 0)
+        with self._lock :
+            self._queue.append(p)
+            self._flush()
+        return p.future
+
+    def send(self, text:str, timeout:float=None) -> str :
+        """
+        Send a command of the Tello SDK and wait for the response.
+        :param text: the command
+        :param timeout: the maximum time to wait (in s, default : the time of all the attempts, and a late response)
+        :return: the response of the drone
+        """
+        future = self.sendAsync(text)
+        if timeout is None :
+            timeout = self.timeout * (self.retries + 2) + 1.0
+        try :
+            return future.result(timeout)
+        except FutureTimeout :
+            # the receiver does not expire the command (stopped ?)
+            raise Exception("No response from the drone to '{}' after {:.1f} s".format(text, timeout))
+
+    @staticmethod
+    def isRepeatable(text:str) -> bool :
+        """
+        Determine if a command can be sent again without effect on the flight : the read commands
+        (ending with '?') and the entry in SDK mode ("command").
+        """
+        return text.endswith("?") or text == "command"
+
+    def getTelemetry(self) -> dict[str, float|str] :
+        """
+        Get the last state received from the drone (pitch, roll, yaw, h, bat, time...).
+        """
+        return dict(self.telemetry)
+
+    def _flush(self) :
+        """
+        Send the queued commands while the window is not full (called with the lock held). While a late
+        response is expected, nothing is sent : the response could not be told apart from the next one.
+        """
+        if self._late > 0 and time.monotonic() >= self._lateUntil :
+            self._late = 0 # lost
+        while self._queue and len(self._inflight) < self.window and self._late == 0 :
+            p = self._queue.popleft()
+            self._inflight.append(p)
+            self._transmit(p)
+
+    def _transmit(self, p:_Pending) :
+        p.attempts += 1
+        p.deadline = time.monotonic() + self.timeout
+        self._socket.sendto(p.text.encode("ascii"), self.address)
+
+    def _expire(self) :
+        """
+        Send again the oldest command if its response is late, or fail it after the retries (called with the lock held).
+        The response to a command that failed may still arrive : it is expected as a late response.
+        """
+        if self._inflight and self._inflight[0].deadline <= time.monotonic() :
+            p = self._inflight[0]
+            if p.attempts <= p.retries :
+                self._transmit(p)
+            else :
+                self._inflight.popleft()
+                self._expectLate(p.attempts)
+                p.future.set_exception(Exception("No response from the drone to '{}'".format(p.text)))
+
+    def _expectLate(self, n:int) :
+        """
+        Expect n late responses, until a timeout (called with the lock held).
+        """
+        if n > 0 :
+            self._late += n
+            self._lateUntil = time.monotonic() + self.timeout
+
+    def _receive(self) :
+        """
+        The receiver of the responses : each response is the one of the oldest command sent.
+        """
+        while self._running :
+            try :
+                data, _ = self._socket.recvfrom(1024)
+            except socket.timeout :
+                data = None
+            except OSError :
+                break
+            with self._lock :
+                if data is not None :
+                    if self._inflight :
+                        # the first response to a command sent several times : the other ones will be late
+                        p = self._inflight.popleft()
+                        self._expectLate(p.attempts - 1)
+                        p.future.set_result(data.decode("ascii", "replace").strip())
+                    elif self._late > 0 :
+                        self._late -= 1 # a late response : ignored
+                self._expire()
+                self._flush()
+
+    def _receiveState(self) :
+        """
+        The receiver of the state packets.
+        """
+        while self._running :
+            try :
+                data, _ = self._stateSocket.recvfrom(1024)
+            except socket.timeout :
+                continue
+            except OSError :
+                break
+            self.telemetry = parseState(data)
+            self.telemetryTime = time.monotonic()
+
+    ############
+    # Commands #
+    ############
+
+    def _command(self, ctype:CommandType, amount:int, text:str) -> bool :
+        """
+        Send a command and set its response and its result.
+        :return: True if the drone executed the command
+        """
+        self.command.ctype = ctype
+        self.command.amount = amount
+        response = self.send(text)
+        self.command.response = (response == "ok")
+        if self.command.response :
+            self.command.result = CommandResult.RES_OK
+        else :
+            self.command.result = CommandResult.RES_NO
+            self.display("WARNING : command '{}' refused by the drone : {}".format(text, response))
+        return self.command.response
+
+    def _moveBy(self, front:int, left:int) :
+        """
+        Update the estimated position after a translation in the frame of the drone.
+        """
+        self.savePosition()
+        h = self.position.heading
+        self.position.x = round(self.position.x + front*cos(h) - left*sin(h))
+        self.position.y = round(self.position.y + front*sin(h) + left*cos(h))
+        self.detectTarget()
+
+    def _rotateBy(self, n:int) :
+        self.savePosition()
+        self.position.heading += (pi * n) / 180.0
+        self.detectTarget()
+
+    def detectTarget(self) :
+        if self.target is not None:
+            self.detected = (self.position.distance(self.target) < self.radiusDetection)
+        if self.targets is not None :
+            self.targets.detect(self.position, self.radiusDetection)
+
+    @recorded
+    def locate(self, x: float, y: float, heading: int, room: ARoom) :
+        self.command.ctype = CommandType.CMD_LOCATE
+        self.command.amount = -1
+        if self.state==DroneState.ONGROUND :
+            self.command.response=True
+            self.command.result = CommandResult.RES_OK
+            self.room=room
+            self.position.setCoord(x, y, 0, pi*heading/180)
+            self.previous.setCoord(x, y, 0, self.position.heading)
+        else :
+            self.command.response = False
+            self.command.result = CommandResult.RES_NO
+            self.display('WARNING : command "locate" can be used only before the drone takes off')
+
+    @recorded
+    def takeOff(self) :
+        if self._command(CommandType.CMD_TAKEOFF, -1, "takeoff") :
+            self.savePosition()
+            self.position.z = self.takeoffAltitude
+            self.state = DroneState.INFLIGHT
+            self.detectTarget()
+
+    @recorded
+    def land(self) :
+        if self._command(CommandType.CMD_LAND, -1, "land") :
+            self.savePosition()
+            self.position.z = 0
+            self.state = DroneState.ONGROUND
+            self.detectTarget()
+
+    @recorded
+    def forward(self, n: int) :
+        if self._command(CommandType.CMD_FORWARD, n, "forward {}".format(n)) :
+            self._moveBy(n, 0)
+
+    @recorded
+    def backward(self, n: int) :
+        if self._command(CommandType.CMD_BACKWARD, n, "back {}".format(n)) :
+            self._moveBy(-n, 0)
+
+    @recorded
+    def goUp(self, n: int) :
+        if self._command(CommandType.CMD_GOUP, n, "up {}".format(n)) :
+            self.savePosition()
+            self.position.z += n
+            self.detectTarget()
+
+    @recorded
+    def goDown(self, n: int) :
+        if self._command(CommandType.CMD_GODOWN, n, "down {}".format(n)) :
+            self.savePosition()
+            self.position.z = max(self.position.z - n, self.minSecAltitude)
+            self.detectTarget()
+
+    @recorded
+    def goLeft(self, n: int) :
+        if self._command(CommandType.CMD_GOLEFT, n, "left {}".format(n)) :
+            self._moveBy(0, n)
+
+    @recorded
+    def goRight(self, n: int) :
+        if self._command(CommandType.CMD_GORIGHT, n, "right {}".format(n)) :
+            self._moveBy(0, -n)
+
+    @recorded
+    def rotateLeft(self, n: int) :
+        if self._command(CommandType.CMD_ROTATELEFT, n, "ccw {}".format(n)) :
+            self._rotateBy(n)
+
+    @recorded
+    def rotateRight(self, n: int) :
+        if self._command(CommandType.CMD_ROTATERIGHT, n, "cw {}".format(n)) :
+            self._rotateBy(-n)
+
+    def isTargetDetected(self) -> bool:
+        return self.detected
+
+    def getHeight(self) -> int:
+        """
+        The height measured by the drone (field h of its state), or the estimated one before the first state.
+        """
+        if "h" in self.telemetry :
+            return round(self.telemetry["h"])
+        return round(self.position.z)
+
+    def getHeading(self) -> float:
+        return self.position.heading
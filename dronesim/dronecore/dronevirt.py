@@ -18,18 +18,39 @@ class DroneVirtual(ADrone) :
         self.radiusDetection = 50  # radius detection of a target (in cm)
         self.room = None  # the room where the drone is located
         self.target = None  # the position of the target in the room
+        self.targets = None  # the set of targets to search, if any (see dronecore.targets.TargetSet)
         self.detected = False  # the detection value (true = target detected)
+        self.sweptDetection = False  # true to detect the targets along the whole move, not only at its end
+        self.coverage = None  # the coverage of the room by the moves, if measured (see dronecore.coverage.CoverageGrid)
 
     def __str__(self):
         return "Virtual drone (class DroneVirtual) - state = {}".format(self.state)
 
     def detectTarget(self) :
+        if self.sweptDetection :
+            if self.target is not None:
+                self.detected = (self.target.distanceToSegment(self.previous, self.position) < self.radiusDetection)
+            if self.targets is not None :
+                self.targets.detect(self.position, self.radiusDetection, self.previous)
+            return
         if self.target is not None:
             self.detected = (self.position.distance(self.target) < self.radiusDetection)
+        if self.targets is not None :
+            self.targets.detect(self.position, self.radiusDetection)
 
     def setFlightParameters(self, filename: str) :
         pass
 
+    def _flight(self) :
+        """
+        Called after each movement of the drone, from self.previous to self.position
+        (also before a crash is raised). The virtual drone moves instantly : only the
+        coverage of the room is updated.
+        """
+        if self.coverage is not None :
+            self.coverage.mark(self.previous, self.position)
+
+    @recorded
     def locate(self, x: float, y: float, heading: int, room: ARoom) :
         self.command.ctype = CommandType.CMD_LOCATE
         self.command.amount = -1
@@ -43,13 +64,24 @@ class DroneVirtual(ADrone) :
             self.command.result = CommandResult.RES_NO
             self.display('WARNING : command "locate" can be used only before the drone takes off')
 
+    @recorded
     def takeOff(self) :
         self.command.ctype = CommandType.CMD_TAKEOFF
         self.command.amount = -1
         if self.state == DroneState.ONGROUND :
+            self.command.response = True
             self.savePosition()
+            floor, ceiling = self.room.getVerticalLimits(self.position)
+            if self.position.z + self.takeoffAltitude >= ceiling :
+                self.position.z = ceiling
+                self.command.result = CommandResult.RES_BREAK
+                self.state=DroneState.KO
+                self._flight()
+                if ceiling < self.room.getHeight() :
+                    raise Exception("Crash ! drone hits an obstacle")
+                raise Exception("Crash ! drone hits room ceiling")
             self.position.z += self.takeoffAltitude
-            self.command.response = True
+            self._flight()
             self.command.result = CommandResult.RES_OK
             self.state = DroneState.INFLIGHT
             self.detectTarget()
@@ -58,12 +90,16 @@ class DroneVirtual(ADrone) :
             self.command.result = CommandResult.RES_NO
             self.display("Cannot takes off : drone flying or not ready")
 
+    @recorded
     def land(self) :
         self.command.ctype = CommandType.CMD_LAND
         self.command.amount = -1
         if self.state == DroneState.INFLIGHT :
             self.savePosition()
-            self.position.z = 0
+            # the drone lands on the floor, or on the top of the obstacle under it
+            floor, ceiling = self.room.getVerticalLimits(self.position)
+            self.position.z = floor
+            self._flight()
             self.command.response = True
             self.command.result = CommandResult.RES_OK
             self.state = DroneState.ONGROUND
@@ -96,40 +132,50 @@ class DroneVirtual(ADrone) :
             elif direction=="backward" :
                 tmp.x = round(self.position.x - n * cos(self.position.heading))
                 tmp.y = round(self.position.y - n * sin(self.position.heading))
-            crash = self.room.intersectWall2(tmp, self.position)
+            crash = self.room.intersectWall2(self.position, tmp)
             if crash is not None :
                 self.position.x = crash.x
                 self.position.y = crash.y
                 self.command.result = CommandResult.RES_BREAK
                 self.state=DroneState.KO
+                self._flight()
                 raise Exception("Crash ! drone hits a wall")
             self.position.x = tmp.x
             self.position.y = tmp.y
+            self._flight()
             self.command.result = CommandResult.RES_OK
             self.detectTarget()
 
+    @recorded
     def forward(self, n: int) :
         self.command.ctype = CommandType.CMD_FORWARD
         self.command.amount = n
         self._move("forward", n)
 
+    @recorded
     def backward(self, n: int) :
         self.command.ctype = CommandType.CMD_BACKWARD
         self.command.amount = n
         self._move("backward", n)
 
+    @recorded
     def goUp(self, n: int) :
         self.command.ctype = CommandType.CMD_GOUP
         self.command.amount = n
         if self.state == DroneState.INFLIGHT :
             self.command.response = True
             self.savePosition()
-            if self.position.z + n >= self.room.getHeight() :
-                self.position.z = self.room.getHeight()
+            floor, ceiling = self.room.getVerticalLimits(self.position)
+            if self.position.z + n >= ceiling :
+                self.position.z = ceiling
                 self.command.result = CommandResult.RES_BREAK
                 self.state=DroneState.KO
+                self._flight()
+                if ceiling < self.room.getHeight() :
+                    raise Exception("Crash ! drone hits an obstacle")
                 raise Exception("Crash ! drone hits room ceiling")
             self.position.z += n
+            self._flight()
             self.command.result = CommandResult.RES_OK
             self.detectTarget()
         else :
@@ -137,17 +183,20 @@ class DroneVirtual(ADrone) :
             self.command.result = CommandResult.RES_NO
             self.display("Cannot moves up : drone is not flying")
 
+    @recorded
     def goDown(self, n: int) :
         self.command.ctype = CommandType.CMD_GODOWN
         self.command.amount = n
         if self.state == DroneState.INFLIGHT :
             self.command.response = True
             self.savePosition()
-            if self.position.z - n <= self.minSecAltitude :
-                self.position.z = self.minSecAltitude
+            floor, ceiling = self.room.getVerticalLimits(self.position)
+            if self.position.z - n <= floor + self.minSecAltitude :
+                self.position.z = floor + self.minSecAltitude
                 self.display("WARNING : Minimum altitude reached - altitude safety engaged")
             else :
                 self.position.z -= n
+            self._flight()
             self.command.result = CommandResult.RES_OK
             self.detectTarget()
         else :
@@ -178,23 +227,27 @@ class DroneVirtual(ADrone) :
             elif direction=="right" :
                 tmp.x = round(self.position.x + n * sin(self.position.heading))
                 tmp.y = round(self.position.y - n * cos(self.position.heading))
-            crash = self.room.intersectWall2(tmp, self.position)
+            crash = self.room.intersectWall2(self.position, tmp)
             if crash is not None:
                 self.position.x = crash.x
                 self.position.y = crash.y
                 self.command.result = CommandResult.RES_BREAK
                 self.state = DroneState.KO
+                self._flight()
                 raise Exception("Crash ! drone hits a wall")
             self.position.x = tmp.x
             self.position.y = tmp.y
+            self._flight()
             self.command.result = CommandResult.RES_OK
             self.detectTarget()
 
+    @recorded
     def goLeft(self, n: int) :
         self.command.ctype = CommandType.CMD_GOLEFT
         self.command.amount = n
         self._goLateral("left",n)
 
+    @recorded
     def goRight(self, n: int) :
         self.command.ctype = CommandType.CMD_GORIGHT
         self.command.amount = n
@@ -219,20 +272,25 @@ class DroneVirtual(ADrone) :
                 self.position.heading += (pi * n) / 180.0
             else :
                 self.position.heading -= (pi * n) / 180.0
+            self._flight()
             self.command.result = CommandResult.RES_OK
             self.detectTarget()
 
+    @recorded
     def rotateLeft(self, n: int) :
         self.command.ctype = CommandType.CMD_ROTATELEFT
         self.command.amount = n
         self._rotate("left", n)
 
+    @recorded
     def rotateRight(self, n: int) :
         self.command.ctype = CommandType.CMD_ROTATERIGHT
         self.command.amount = n
         self._rotate("right", n)
 
     def isTargetDetected(self) -> bool:
+        if self.sweptDetection :
+            return self.detected
         return (self.target is not None) and self.position.distance(self.target)<self.radiusDetection
 
     def getHeight(self) -> int:
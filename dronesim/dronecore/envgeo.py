@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from math import sqrt, pi
+from math import sqrt, pi, inf
 
 class Position :
 
@@ -18,6 +18,20 @@ class Position :
     def distance(self, other) -> float :
         return sqrt((self.x - other.x) * (self.x - other.x) + (self.y - other.y) * (self.y - other.y) + (self.z - other.z) * (self.z - other.z));
 
+    def distanceToSegment(self, p1, p2) -> float :
+        """
+        Get the distance to the segment [p1, p2] (closed form : the projection on the line, clamped to the segment).
+        """
+        dx = p2.x - p1.x
+        dy = p2.y - p1.y
+        dz = p2.z - p1.z
+        l2 = dx*dx + dy*dy + dz*dz
+        t = 0.0 if l2 == 0 else min(1.0, max(0.0, ((self.x - p1.x)*dx + (self.y - p1.y)*dy + (self.z - p1.z)*dz) / l2))
+        x = p1.x + t*dx - self.x
+        y = p1.y + t*dy - self.y
+        z = p1.z + t*dz - self.z
+        return sqrt(x*x + y*y + z*z)
+
     def getHeadingRadian(self):
         return self.heading*pi/180
 
@@ -41,6 +55,57 @@ class Segment2D :
         """ Représentation d'un segment sous forme d'une chaine de caractères """
         return "Segment2D [x1={}, y1={}, x2={}, y2={}]".format(self.x1, self.y1, self.x2, self.y2)
 
+class Obstacle :
+    """
+    A box obstacle inside a room (a pillar, a shelf, an internal wall...) : its footprint
+    is the rectangle [xmin, xmax] x [ymin, ymax] and it stands from the altitude zmin to
+    the altitude zmax (up to the ceiling if zmax is None).
+    """
+
+    def __init__(self, xmin:float, ymin:float, xmax:float, ymax:float, zmin:float=0, zmax:float=None) :
+        self.xmin=min(xmin, xmax)
+        self.ymin=min(ymin, ymax)
+        self.xmax=max(xmin, xmax)
+        self.ymax=max(ymin, ymax)
+        self.zmin=zmin
+        self.zmax=inf if zmax is None else zmax
+
+    def contains(self, p:Position) -> bool :
+        """
+        Determines if a position is inside the obstacle (or on its faces).
+        """
+        return self.xmin <= p.x <= self.xmax and self.ymin <= p.y <= self.ymax and self.zmin <= p.z <= self.zmax
+
+    def getFootprint(self) -> list[tuple[float, float]] :
+        """
+        Get the footprint of the obstacle as a closed ring of (x, y) points.
+        """
+        return [(self.xmin, self.ymin), (self.xmax, self.ymin), (self.xmax, self.ymax),
+                (self.xmin, self.ymax), (self.xmin, self.ymin)]
+
+    def getEdges3D(self, height:float) -> tuple[list, list, list] :
+        """
+        Get the 12 edges of the box, as coordinates separated by NaN values (to be drawn as a single line).
+        :param height: the height of the room (the top of an obstacle that goes up to the ceiling)
+        :return: the x, y and z coordinates
+        """
+        z1, z2 = self.zmin, min(self.zmax, height)
+        ring = self.getFootprint()
+        x, y, z = [], [], []
+        for h in (z1, z2) :
+            x += [c[0] for c in ring]+[float("nan")]
+            y += [c[1] for c in ring]+[float("nan")]
+            z += [h]*len(ring)+[float("nan")]
+        for c in ring[:-1] :
+            x += [c[0], c[0], float("nan")]
+            y += [c[1], c[1], float("nan")]
+            z += [z1, z2, float("nan")]
+        return x, y, z
+
+    def __str__(self):
+        """ Représentation d'un obstacle sous forme d'une chaine de caractères """
+        return "Obstacle [X={}..{}, Y={}..{}, Z={}..{}]".format(self.xmin, self.xmax, self.ymin, self.ymax, self.zmin, self.zmax)
+
 class ARoom(ABC) :
 
     def __init__(self, height:int=250):
@@ -90,9 +155,9 @@ class ARoom(ABC) :
     @abstractmethod
     def intersectWall2(self, p1:Position, p2:Position) -> Position :
         """
-        Get the position of the intersection between segment defined by positions p1 and p2, and a wall of the room. If there is no intersection, it returns None.
-        :param p1: the first position
-        :param p2: the second position
+        Get the position of the first intersection along the segment from position p1 to position p2 with a wall of the room (the intersection nearest to p1). If there is no intersection, it returns None.
+        :param p1: the first position (the start of the segment)
+        :param p2: the second position (the end of the segment)
         :return: the position where the segment intersects a wall (None if no intersection)
         """
         pass
@@ -107,6 +172,29 @@ class ARoom(ABC) :
         """
         pass
 
+    def getObstacles(self) -> list[Obstacle] :
+        """
+        Get the obstacles inside the room (none by default).
+        :return: the list of obstacles
+        """
+        return []
+
+    def getVerticalLimits(self, p:Position) -> tuple[float, float] :
+        """
+        Get the free space above and below a position : the floor, or the top of the
+        obstacle under the position, and the ceiling, or the bottom of the obstacle above.
+        :param p: the position
+        :return: the lowest and the highest altitudes (in cm)
+        """
+        floor, ceiling = 0, self.getHeight()
+        for o in self.getObstacles() :
+            if o.xmin < p.x < o.xmax and o.ymin < p.y < o.ymax :
+                if o.zmax <= p.z :
+                    floor = max(floor, o.zmax)
+                elif o.zmin >= p.z :
+                    ceiling = min(ceiling, o.zmin)
+        return floor, ceiling
+
     @abstractmethod
     def getWalls2D(self, h:int=0) -> []:
         """
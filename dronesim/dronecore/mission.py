@@ -0,0 +1,224 @@
+"""
+Missions compilées : un programme de drone sans lecture de capteurs est une simple
+suite de commandes, capturée une fois dans deux tableaux compacts (le code de chaque
+commande, indice dans COMMAND_CODES, et sa quantité). La mission peut être validée
+sans voler (limites du drone, commandes au sol ou en vol), rejouée par une boucle
+serrée sur un drone, ou rejouée par le moteur par lots (DroneBatch) depuis N
+positions de départ à la fois, sans appel des vues ni des fonctions de dronecmds.
+"""
+import numpy as np
+from dronecore import *
+from dronecore.dronebatch import DroneBatch, COMMAND_CODES, RESULT_CODES, _KO, _ONGROUND
+from dronecore.dronevirt import DroneVirtual
+
+# The methods of the drones that run each command type
+_METHODS = {CommandType.CMD_TAKEOFF: "takeOff", CommandType.CMD_LAND: "land",
+            CommandType.CMD_FORWARD: "forward", CommandType.CMD_BACKWARD: "backward",
+            CommandType.CMD_GOUP: "goUp", CommandType.CMD_GODOWN: "goDown",
+            CommandType.CMD_GOLEFT: "goLeft", CommandType.CMD_GORIGHT: "goRight",
+            CommandType.CMD_ROTATELEFT: "rotateLeft", CommandType.CMD_ROTATERIGHT: "rotateRight"}
+
+_LOCATE = COMMAND_CODES.index(CommandType.CMD_LOCATE)
+
+class Mission :
+    """
+    A sequence of drone commands stored as arrays : opcodes (indexes in COMMAND_CODES, see
+    DroneBatch.opcode) and amounts (-1 for the commands without amount). A CMD_LOCATE command
+    places the drone at the start pose given to run or replay (by default, self.start).
+    """
+
+    def __init__(self, capacity:int=64):
+        self.opcodes = np.empty(max(1, capacity), dtype=np.int8) # the buffer of the opcodes (only the first ones are used)
+        self.amounts = np.empty(max(1, capacity), dtype=np.int32) # the buffer of the amounts
+        self.size = 0 # the number of commands
+        self.start:tuple[float, float, int]|None = None # the start pose (x, y, heading in degrees) given by the program, if any
+
+    def __len__(self):
+        return self.size
+
+    def __str__(self):
+        return "Mission of {} commands ({} bytes)".format(self.size, self.size * (self.opcodes.itemsize + self.amounts.itemsize))
+
+    @staticmethod
+    def fromCommands(commands:list[tuple[CommandType, int]], start:tuple[float, float, int]=None) -> 'Mission' :
+        """
+        Build a mission from commands (type, amount), as given by PathPlanner.plan.
+        :param start: the start pose (x, y, heading in degrees), if the mission locates the drone
+        """
+        mission = Mission(len(commands))
+        for ctype, n in commands :
+            mission.append(ctype, n)
+        mission.start = start
+        return mission
+
+    def append(self, ctype:CommandType, amount:int=-1) :
+        """
+        Append a command (the buffers double in size when they are full).
+        """
+        if self.size == len(self.opcodes) :
+            self.opcodes = np.concatenate((self.opcodes, np.empty_like(self.opcodes)))
+            self.amounts = np.concatenate((self.amounts, np.empty_like(self.amounts)))
+        self.opcodes[self.size] = COMMAND_CODES.index(ctype)
+        self.amounts[self.size] = amount
+        self.size += 1
+
+    def getCommands(self) -> list[tuple[CommandType, int]] :
+        """
+        Get the commands (type, amount).
+        """
+        return [(COMMAND_CODES[op], n) for op, n in zip(self.opcodes[:self.size].tolist(), self.amounts[:self.size].tolist())]
+
+    def validate(self, drone:DroneVirtual=None) -> list[str] :
+        """
+        Check the mission without flying : the commands refused by the drone (amounts out of its limits,
+        moves on the ground, take off in flight...). The crashes depend on the room : they are not checked.
+        :param drone: the drone whose limits are checked (default : a DroneVirtual)
+        :return: the problems found, one message per refused command (empty if the mission is valid)
+        """
+        d = DroneVirtual() if drone is None else drone
+        problems = []
+        flying = False
+        for i, (ctype, n) in enumerate(self.getCommands()) :
+            problem = None
+            if ctype == CommandType.CMD_LOCATE :
+                if flying :
+                    problem = "locate can be used only before the drone takes off"
+            elif ctype == CommandType.CMD_TAKEOFF :
+                if flying :
+                    problem = "the drone is already flying"
+                flying = True
+            elif not flying :
+                problem = "the drone is not flying"
+            elif ctype == CommandType.CMD_LAND :
+                flying = False
+            elif ctype in (CommandType.CMD_ROTATELEFT, CommandType.CMD_ROTATERIGHT) :
+                if n < d.minRotation :
+                    problem = "minimum angle is {} degrees".format(d.minRotation)
+                elif n > d.maxRotation :
+                    problem = "maximum angle is {} degrees".format(d.maxRotation)
+            elif ctype not in (CommandType.CMD_GOUP, CommandType.CMD_GODOWN) :
+                if n < d.minMove :
+                    problem = "minimum movement is {} cm".format(d.minMove)
+                elif n > d.maxMove :
+                    problem = "maximum movement is {} cm".format(d.maxMove)
+            if problem is not None :
+                name = _METHODS.get(ctype, "locate")
+                problems.append("command {} ({}{}) : {}".format(i, name, "" if ctype.unit is None else " {}".format(n), problem))
+        return problems
+
+    def run(self, drone:ADrone, room:ARoom=None, x:float=None, y:float=None, heading:int=None) -> int :
+        """
+        Send the commands to a drone, in a tight loop (the viewer of the drone is not called).
+        The run stops at the first exception raised by the drone (a crash).
+        :param room: the room where the drone is located by CMD_LOCATE
+        :param x, y, heading: the start pose (default : self.start)
+        :return: the number of commands sent (the last one may have crashed the drone)
+        """
+        if x is None :
+            x, y, heading = self.start if self.start is not None else (0, 0, 0)
+        methods = {COMMAND_CODES.index(ctype): getattr(drone, name) for ctype, name in _METHODS.items()}
+        count = 0
+        try :
+            for op, n in zip(self.opcodes[:self.size].tolist(), self.amounts[:self.size].tolist()) :
+                count += 1
+                if op == _LOCATE :
+                    drone.locate(x, y, heading, room)
+                elif n < 0 :
+                    methods[op]()
+                else :
+                    methods[op](n)
+        except Exception :
+            pass
+        return count
+
+    def replay(self, room:ARoom, x=None, y=None, heading=None, target:Position=None, sweptDetection:bool=False,
+               count:int=None) -> 'MissionReplay' :
+        """
+        Replay the mission from N start poses at once, with the batch engine (see DroneBatch). As for a
+        program, a drone stops at its first crash.
+        :param room: the room (it must provide its walls as WallSegments, see RoomShp)
+        :param x, y, heading: the start poses (numbers or arrays of N numbers, default : self.start)
+        :param target: the target, if any
+        :param sweptDetection: true to detect the target along the moves (see DroneBatch.sweptDetection)
+        :param count: the number of commands to replay (default : all)
+        :return: the results of the N flights
+        """
+        if x is None :
+            x, y, heading = self.start if self.start is not None else (0, 0, 0)
+        n = int(np.broadcast(x, y, heading).size)
+        batch = DroneBatch(n, room, target)
+        batch.sweptDetection = sweptDetection
+        replay = MissionReplay(batch)
+        lx, ly, lz = batch.x.copy(), batch.y.copy(), batch.z.copy() # the positions after the previous command
+        active = np.ones(n, dtype=bool) # the drones that did not crash
+        count = self.size if count is None else min(count, self.size)
+        for op, amount in zip(self.opcodes[:count].tolist(), self.amounts[:count].tolist()) :
+            if op == _LOCATE :
+                located = active & (batch.state == _ONGROUND) # the drones that accept the start pose
+                batch.locate(x, y, heading)
+            else :
+                batch.apply(COMMAND_CODES[op], amount)
+            replay.commands[active] += 1
+            replay.pathLength[active] += np.sqrt(((batch.x - lx)**2 + (batch.y - ly)**2 + (batch.z - lz)**2)[active])
+            if op == _LOCATE :
+                # the length is measured from the start pose, on the floor (a flying drone refuses it)
+                replay.pathLength[located] = 0.0
+                lx[located] = np.broadcast_to(x, n)[located]
+                ly[located] = np.broadcast_to(y, n)[located]
+                lz[located] = 0.0
+            else :
+                lx[active], ly[active], lz[active] = batch.x[active], batch.y[active], batch.z[active]
+            replay.reached[active] |= batch.detected[active]
+            replay.result[active] = batch.result[active]
+            active &= batch.state != _KO
+        return replay
+
+    def save(self, filename:str) :
+        """
+        Save the mission in a .npz file.
+        """
+        arrays = {"opcodes": self.opcodes[:self.size], "amounts": self.amounts[:self.size]}
+        if self.start is not None :
+            arrays["start"] = np.array(self.start, dtype=np.float64)
+        np.savez_compressed(filename, **arrays)
+
+    @staticmethod
+    def load(filename:str) -> 'Mission' :
+        """
+        Load a mission from a .npz file written by save.
+        """
+        with np.load(filename) as data :
+            n = len(data["opcodes"])
+            mission = Mission(n)
+            mission.opcodes[:n] = data["opcodes"]
+            mission.amounts[:n] = data["amounts"]
+            if "start" in data :
+                x, y, heading = data["start"].tolist()
+                mission.start = (x, y, round(heading))
+        mission.size = n
+        return mission
+
+class MissionReplay :
+    """
+    The results of a mission replayed from N start poses (see Mission.replay) : the final states
+    of the drones in the batch, and for each drone, the number of commands it received (up to its
+    crash), the length of its flight, the detection of the target and the result of its last command.
+    """
+
+    def __init__(self, batch:DroneBatch):
+        n = batch.size
+        self.batch = batch # the drones at the end of the mission
+        self.commands = np.zeros(n, dtype=np.int64) # the number of commands received by each drone
+        self.pathLength = np.zeros(n) # the length of each flight (in cm)
+        self.reached = np.zeros(n, dtype=bool) # true if the target was detected at least once
+        self.result = np.zeros(n, dtype=np.int8) # the result of the last command received (index in RESULT_CODES)
+
+    def __len__(self):
+        return self.batch.size
+
+    def __str__(self):
+        return "Replay of a mission by {} drones - {} reached the target, {} KO".format(
+            self.batch.size, int(np.count_nonzero(self.reached)), self.batch.countState(DroneState.KO))
+
+    def getResult(self, i:int) -> CommandResult :
+        return RESULT_CODES[self.result[i]]
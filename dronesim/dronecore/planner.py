@@ -0,0 +1,341 @@
+"""
+Planification de trajets sans collision dans une pièce (RoomShp), pour produire des
+solutions de référence ou des scénarios de test. L'espace libre à l'altitude du vol
+(la pièce moins les obstacles, réduite d'une marge de sécurité) est prétraité une
+fois en un graphe de visibilité entre ses sommets rentrants ; chaque requête relie
+le départ et l'arrivée au graphe et cherche le plus court chemin avec A*. Le chemin
+est traduit en commandes forward/rotateLeft/rotateRight/goUp/goDown qui respectent
+les limites du drone, en reproduisant les arrondis du drone virtuel.
+"""
+import heapq
+import weakref
+import numpy as np
+import shapely
+from math import atan2, ceil, cos, degrees, hypot, inf, pi, sin
+from shapely import Point, Polygon, box, prepare
+from shapely.geometry.polygon import orient
+from dronecore import *
+from dronecore.collision import WallSegments
+from dronecore.dronevirt import DroneVirtual
+
+# The methods of the drones that run the planned commands
+_METHODS = {CommandType.CMD_FORWARD: "forward", CommandType.CMD_GOUP: "goUp", CommandType.CMD_GODOWN: "goDown",
+            CommandType.CMD_ROTATELEFT: "rotateLeft", CommandType.CMD_ROTATERIGHT: "rotateRight"}
+
+class _VisibilityGraph :
+    """
+    The reduced visibility graph of a free region : its nodes are the reflex vertices of the
+    region (where the shortest paths bend), and two nodes are linked if the segment between
+    them stays in the region, that is if it crosses none of its borders (see WallSegments),
+    and if its line is tangent to the borders at both nodes (a shortest path never takes
+    the other segments).
+    """
+
+    def __init__(self, free, inner):
+        """
+        :param free: the free region (a shapely geometry, prepared)
+        :param inner: the region of the nodes, strictly inside the free region (a shapely geometry, prepared)
+        """
+        self.free = free
+        self.inner = inner
+        corners = _reflexVertices(inner)
+        self.borders = WallSegments.fromRings([ring.coords for p in _polygons(free) for ring in [p.exterior] + list(p.interiors)])
+        self.nodes, self._previous, self._next = corners
+        nodes = self.nodes
+        self._xy = nodes.tolist()
+        self.edges:list[list[tuple[int, float]]] = [[] for _ in range(len(nodes))] # the neighbours of each node and their distance
+        i, j = np.triu_indices(len(nodes), 1)
+        d = nodes[j] - nodes[i]
+        keep = self.tangent(i, d) & self.tangent(j, d)
+        i, j = i[keep], j[keep]
+        if len(i) > 0 :
+            visible = self.visible(nodes[i], nodes[j])
+            i, j = i[visible], j[visible]
+            d = np.hypot(*(nodes[i] - nodes[j]).T)
+            for a, b, l in zip(i.tolist(), j.tolist(), d.tolist()) :
+                self.edges[a].append((b, l))
+                self.edges[b].append((a, l))
+
+    def tangent(self, i:np.ndarray, d:np.ndarray) -> np.ndarray :
+        """
+        Test if lines are tangent to the borders at nodes : the previous and the next vertices
+        of the node are on the same side of the line.
+        :param i: the indexes of the nodes
+        :param d: the directions of the lines (k x 2)
+        """
+        p = self._previous[i] - self.nodes[i]
+        q = self._next[i] - self.nodes[i]
+        return (d[:, 0]*p[:, 1] - d[:, 1]*p[:, 0]) * (d[:, 0]*q[:, 1] - d[:, 1]*q[:, 0]) >= 0
+
+    def visible(self, a:np.ndarray, b:np.ndarray) -> np.ndarray :
+        """
+        Test if the segments [a, b], whose ends are inside the free region, stay in it.
+        :param a, b: the ends of the segments (k x 2)
+        :return: the result of each segment
+        """
+        return np.isinf(self.borders.hitParameters(a[:, 0], a[:, 1], b[:, 0], b[:, 1]))
+
+    def _linked(self, p:np.ndarray) -> list[int] :
+        """
+        Get the nodes to link to a point (1 x 2) : the visible nodes where the line from the point is
+        tangent, or all the visible nodes if the point is closer to the borders than the nodes.
+        """
+        if shapely.contains_xy(self.inner, p[0, 0], p[0, 1]) :
+            i = np.flatnonzero(self.tangent(slice(None), self.nodes - p))
+        else :
+            i = np.arange(len(self.nodes))
+        return i[self.visible(np.repeat(p, len(i), axis=0), self.nodes[i])].tolist()
+
+    def shortestPath(self, start:tuple[float, float], goal:tuple[float, float]) -> list[tuple[float, float]]|None :
+        """
+        Get the shortest path from start to goal in the free region (A* search).
+        :return: the points of the path, from start to goal, or None if the goal cannot be reached
+        """
+        s = np.array([start])
+        g = np.array([goal])
+        if self.visible(s, g)[0] :
+            return [start, goal]
+        n = len(self.nodes)
+        if n == 0 :
+            return None
+        fromStart = self._linked(s)
+        toGoal = set(self._linked(g))
+        if not fromStart or not toGoal :
+            return None
+        xy = self._xy
+        gx, gy = goal
+        # the nodes 0..n-1, then the goal (n)
+        cost = {}
+        parent = {}
+        heap = []
+        for i in fromStart :
+            c = hypot(xy[i][0] - start[0], xy[i][1] - start[1])
+            cost[i] = c
+            parent[i] = -1
+            heapq.heappush(heap, (c + hypot(xy[i][0] - gx, xy[i][1] - gy), c, i))
+        while heap :
+            _, c, i = heapq.heappop(heap)
+            if c > cost[i] :
+                continue
+            if i == n :
+                path = [goal]
+                i = parent[n]
+                while i != -1 :
+                    path.append(tuple(xy[i]))
+                    i = parent[i]
+                path.append(start)
+                return path[::-1]
+            neighbours = self.edges[i]
+            if i in toGoal :
+                neighbours = neighbours + [(n, hypot(xy[i][0] - gx, xy[i][1] - gy))]
+            for j, l in neighbours :
+                cj = c + l
+                if cj < cost.get(j, inf) :
+                    cost[j] = cj
+                    parent[j] = i
+                    heapq.heappush(heap, (cj + (0.0 if j == n else hypot(xy[j][0] - gx, xy[j][1] - gy)), cj, j))
+        return None
+
+class PathPlanner :
+    """
+    A planner of collision-free paths in a room, for a virtual drone. The visibility
+    graph of each altitude band (the set of obstacles met at this altitude) is built at
+    the first query and reused by the next ones.
+    """
+
+    def __init__(self, room:ARoom, drone:DroneVirtual=None, clearance:float=30):
+        """
+        :param room: the room (a RoomShp)
+        :param drone: the drone whose limits (minMove, maxMove, minRotation, maxRotation, minSecAltitude)
+                      the commands respect (default : a DroneVirtual)
+        :param clearance: the minimum distance between the planned path and the walls or the obstacles (in cm) ;
+                          must be greater than minMove/2 plus the drift of a rounded rotation over maxMove
+        """
+        drone = DroneVirtual() if drone is None else drone
+        self.room = room
+        self.clearance = clearance
+        self.minMove = drone.minMove
+        self.maxMove = drone.maxMove
+        self.minRotation = drone.minRotation
+        self.maxRotation = drone.maxRotation
+        self.minSecAltitude = drone.minSecAltitude
+        self._graphs:dict[tuple[int, ...], _VisibilityGraph] = {} # the visibility graphs, by blocking obstacles
+
+    def __str__(self):
+        return "Path planner in {} ({} graph(s) built)".format(self.room, len(self._graphs))
+
+    def getGraph(self, z:float) -> _VisibilityGraph :
+        """
+        Get the visibility graph of the free region at an altitude (built at the first call for its obstacles).
+        :param z: the altitude (in cm)
+        """
+        c = self.clearance
+        blocking = tuple(i for i, o in enumerate(self.room.getObstacles()) if o.zmin - c <= z <= o.zmax + c)
+        graph = self._graphs.get(blocking)
+        if graph is None :
+            region = self.room.geometry
+            for i in blocking :
+                o = self.room.getObstacles()[i]
+                region = region.difference(box(o.xmin, o.ymin, o.xmax, o.ymax))
+            free = region.buffer(-c, join_style="mitre")
+            # the nodes are taken 1 cm further from the walls, for robust visibility tests
+            inner = region.buffer(-c - 1, join_style="mitre")
+            prepare(free)
+            prepare(inner)
+            graph = _VisibilityGraph(free, inner)
+            self._graphs[blocking] = graph
+        return graph
+
+    def findPath(self, start:Position, goal:Position, altitude:float=None) -> list[tuple[float, float]] :
+        """
+        Get the shortest collision-free path between two positions, in the horizontal plane.
+        :param altitude: the altitude of the flight (default : the altitude of the goal)
+        :return: the points (x, y) of the path, from start to goal
+        """
+        z = goal.z if altitude is None else altitude
+        graph = self.getGraph(z)
+        for p, name in ((start, "start"), (goal, "goal")) :
+            if not graph.free.covers(Point(p.x, p.y)) :
+                raise Exception("The {} position is not in the room, or closer than {} cm to a wall or an obstacle".format(
+                    name, self.clearance))
+        path = graph.shortestPath((start.x, start.y), (goal.x, goal.y))
+        if path is None :
+            raise Exception("No path found between the start and the goal positions")
+        return path
+
+    def plan(self, start:Position, goal:Position, heading:int=None, altitude:float=None) -> list[tuple[CommandType, int]] :
+        """
+        Plan the commands that take a flying drone from a position to another : the drone reaches
+        the altitude of the flight above the start position, then follows the shortest path.
+        The goal is reached within minMove/2 cm (the moves are at least minMove long).
+        :param start: the position of the drone (its heading in radians, as given by getCurrentPosition)
+        :param goal: the position to reach
+        :param heading: the final heading (in degrees, as for locate), None to keep the heading of the last move
+        :param altitude: the altitude of the flight (default : the altitude of the goal)
+        :return: the commands (type, amount)
+        """
+        z = goal.z if altitude is None else altitude
+        path = self.findPath(start, goal, z)
+        commands = []
+        x, y, h = start.x, start.y, start.heading
+        floor, ceiling = self.room.getVerticalLimits(start)
+        if not floor + self.minSecAltitude < z < ceiling :
+            raise Exception("The altitude {} cm cannot be reached above the start position".format(z))
+        self._vertical(commands, start.z, z)
+        if goal.z != z :
+            floor, ceiling = self.room.getVerticalLimits(goal)
+            if not floor + self.minSecAltitude < goal.z < ceiling :
+                raise Exception("The altitude {} cm cannot be reached above the goal position".format(goal.z))
+        for wx, wy in path[1:] :
+            x, y, h = self._leg(commands, x, y, h, wx, wy, z)
+        if heading is not None :
+            h = self._rotation(commands, h, pi*heading/180)
+        self._vertical(commands, z, goal.z)
+        return commands
+
+    def _amounts(self, n:float) -> list[int] :
+        """
+        Split a distance into moves between minMove and maxMove (empty under minMove/2).
+        """
+        n = round(n)
+        if n < self.minMove / 2 :
+            return []
+        k = ceil(n / self.maxMove)
+        return [max(self.minMove, n // k + (1 if i < n % k else 0)) for i in range(k)]
+
+    def _vertical(self, commands:list, z1:float, z2:float) :
+        ctype = CommandType.CMD_GOUP if z2 > z1 else CommandType.CMD_GODOWN
+        commands.extend((ctype, n) for n in self._amounts(abs(z2 - z1)))
+
+    def _rotation(self, commands:list, h:float, target:float) -> float :
+        """
+        Add the rotation towards a heading, rounded to the degree, as the drone applies it.
+        :return: the heading after the rotation
+        """
+        a = round((degrees(target - h) + 180) % 360 - 180)
+        if abs(a) < max(1, self.minRotation) :
+            return h
+        a = max(-self.maxRotation, min(self.maxRotation, a))
+        if a > 0 :
+            commands.append((CommandType.CMD_ROTATELEFT, a))
+            return h + (pi * a) / 180.0
+        commands.append((CommandType.CMD_ROTATERIGHT, -a))
+        return h - (pi * -a) / 180.0
+
+    def _leg(self, commands:list, x:float, y:float, h:float, wx:float, wy:float, z:float) -> tuple[float, float, float] :
+        """
+        Add the commands of a straight leg towards a point, from the positions the drone actually
+        reaches (rounded to the cm) : each move aims again at the point, until it is closer than
+        minMove/2 or overshot by a last minMove move.
+        :return: the position and the heading at the end of the leg
+        """
+        for _ in range(1000) :
+            d = hypot(wx - x, wy - y)
+            amounts = self._amounts(d)
+            if not amounts :
+                return x, y, h
+            h = self._rotation(commands, h, atan2(wy - y, wx - x))
+            n = amounts[0]
+            tx = round(x + n * cos(h))
+            ty = round(y + n * sin(h))
+            if self.room.walls.firstHit(x, y, tx, ty, z) is not None :
+                raise Exception("The planned move from ({}, {}) to ({}, {}) hits a wall : increase the clearance".format(
+                    x, y, tx, ty))
+            commands.append((CommandType.CMD_FORWARD, n))
+            x, y = tx, ty
+            if d < self.minMove :
+                # the last move overshoots the point by less than minMove/2 : going back would overshoot again
+                return x, y, h
+        raise Exception("The leg towards ({}, {}) does not converge".format(wx, wy))
+
+def _reflexVertices(region) -> tuple[np.ndarray, np.ndarray, np.ndarray] :
+    """
+    Get the reflex vertices of a region (the convex corners of the walls, seen from the free space).
+    :return: the vertices, their previous and their next vertices along their rings (n x 2 each)
+    """
+    points = []
+    for polygon in _polygons(region) :
+        # exterior counterclockwise, holes clockwise : the free space is on the left of every ring
+        polygon = orient(polygon, 1.0)
+        for ring in [polygon.exterior] + list(polygon.interiors) :
+            c = np.asarray(ring.coords)[:-1]
+            previous = np.roll(c, 1, axis=0)
+            following = np.roll(c, -1, axis=0)
+            u = c - previous
+            v = following - c
+            reflex = u[:, 0]*v[:, 1] - u[:, 1]*v[:, 0] < 0
+            points.append((c[reflex], previous[reflex], following[reflex]))
+    if not points :
+        return np.zeros((0, 2)), np.zeros((0, 2)), np.zeros((0, 2))
+    return tuple(np.concatenate(p) for p in zip(*points))
+
+def _polygons(region) -> list[Polygon] :
+    """
+    Get the polygons of a region (a polygon or a multipolygon, possibly empty).
+    """
+    return [p for p in getattr(region, "geoms", [region]) if isinstance(p, Polygon) and not p.is_empty]
+
+_planners = weakref.WeakKeyDictionary()
+
+def getPlanner(room:ARoom) -> PathPlanner :
+    """
+    Get the planner of a room with the default parameters, shared by all the queries on this room.
+    """
+    planner = _planners.get(room)
+    if planner is None :
+        planner = PathPlanner(room)
+        _planners[room] = planner
+    return planner
+
+def runCommands(drone:ADrone, commands:list[tuple[CommandType, int]]) :
+    """
+    Send planned commands to a drone.
+    """
+    for ctype, n in commands :
+        getattr(drone, _METHODS[ctype])(n)
+
+def toSource(commands:list[tuple[CommandType, int]]) -> str :
+    """
+    Get the source code (dronecmds instructions) of planned commands, one per line.
+    """
+    return "\n".join("{}({})".format(_METHODS[ctype], n) for ctype, n in commands)
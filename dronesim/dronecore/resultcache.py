@@ -0,0 +1,168 @@
+"""
+Cache persistant des résultats de simulation, adressé par le contenu : la clé d'un
+résultat est l'empreinte (SHA-256) du programme, du scénario et du contexte de la
+simulation (SIM_VERSION, paramètres du drone, budget...). Un programme, une pièce ou
+une cible modifiés donnent une autre clé ; un changement de version du simulateur ou
+des paramètres du drone invalide tous les résultats. Les résultats sont rangés dans
+une base SQLite locale, dont la taille est bornée : les résultats utilisés le moins
+récemment sont supprimés en premier (LRU).
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from dronecore import SIM_VERSION
+from dronecore.dronevirt import DroneVirtual
+
+DRONE_PARAMETERS = ("minMove", "maxMove", "minRotation", "maxRotation", "takeoffAltitude", "minSecAltitude", "radiusDetection")
+"""
+The parameters of a drone that change the results of its flights (see droneParameters).
+"""
+
+def droneParameters(drone:DroneVirtual=None) -> dict :
+    """
+    Get the parameters of a drone that change the results of its flights.
+    :param drone: the drone (default : a new DroneVirtual, the drone of the grading)
+    """
+    d = DroneVirtual() if drone is None else drone
+    return {name: getattr(d, name) for name in DRONE_PARAMETERS}
+
+def hashBytes(data:bytes) -> str :
+    return hashlib.sha256(data).hexdigest()
+
+def hashFile(filename:str) -> str :
+    """
+    Get the hash of the content of a file (a program).
+    """
+    with open(filename, "rb") as f :
+        return hashBytes(f.read())
+
+def hashJSON(value) -> str :
+    """
+    Get the hash of a JSON value (a scenario), independent of the order of the keys.
+    """
+    return hashBytes(json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+
+class ResultCache :
+    """
+    A persistent cache of results (JSON objects), addressed by the hash of what they depend on,
+    with a maximum size and a least recently used eviction.
+    """
+
+    def __init__(self, filename:str, maxSize:int=256*1024*1024, context:dict=None):
+        """
+        :param filename: the SQLite database (created if needed)
+        :param maxSize: the maximum size of the stored results (in bytes)
+        :param context: what the results depend on besides the program and the scenario (budget...) ;
+                        the version of the simulation and the parameters of the drone are always added
+        """
+        self.filename = filename
+        self.maxSize = maxSize
+        self.context = {"version": SIM_VERSION, "drone": droneParameters(), **(context or {})}
+        self._context = hashJSON(self.context)
+        self.hits = 0 # the number of results found
+        self.misses = 0 # the number of results not found
+        self._db = sqlite3.connect(filename)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                         "size INTEGER NOT NULL, used INTEGER NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+        self.size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0] # the size of the stored results
+        self._clock = max(time.time_ns(), self._db.execute("SELECT COALESCE(MAX(used), 0) FROM results").fetchone()[0])
+        self._writes = 0 # the number of changes not committed
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def __str__(self):
+        return "Result cache {} ({} results, {:.1f} MB, {} hits, {} misses)".format(
+            self.filename, len(self), self.size / 1e6, self.hits, self.misses)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def key(self, program:str, scenario:str) -> str :
+        """
+        Get the key of a result.
+        :param program: the hash of the program (see hashFile)
+        :param scenario: the hash of the scenario (see hashJSON)
+        """
+        return hashBytes("{}:{}:{}".format(self._context, program, scenario).encode("ascii"))
+
+    def _tick(self) -> int :
+        # the time of use, strictly increasing (the order of the uses, for the eviction)
+        self._clock = max(self._clock + 1, time.time_ns())
+        return self._clock
+
+    def get(self, key:str) -> dict|None :
+        """
+        Get a result, and mark it as used.
+        :return: the result, or None if it is not in the cache
+        """
+        row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None :
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._db.execute("UPDATE results SET used = ? WHERE key = ?", (self._tick(), key))
+        self._changed()
+        return json.loads(row[0])
+
+    def put(self, key:str, result:dict) :
+        """
+        Store a result, then evict the least recently used results if the cache is too big.
+        """
+        value = json.dumps(result, separators=(",", ":"))
+        size = len(value) + len(key)
+        row = self._db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+        if row is not None :
+            self.size -= row[0]
+        self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (key, value, size, self._tick()))
+        self.size += size
+        if self.size > self.maxSize :
+            self._evict()
+        self._changed()
+
+    def _evict(self) :
+        """
+        Delete the least recently used results, down to 90 % of the maximum size.
+        """
+        limit = 0.9 * self.maxSize
+        while self.size > limit :
+            rows = self._db.execute("SELECT key, size FROM results ORDER BY used LIMIT 256").fetchall()
+            if not rows :
+                break
+            removed = []
+            for key, size in rows :
+                removed.append((key,))
+                self.size -= size
+                if self.size <= limit :
+                    break
+            self._db.executemany("DELETE FROM results WHERE key = ?", removed)
+
+    def _changed(self) :
+        self._writes += 1
+        if self._writes >= 1000 :
+            self.commit()
+
+    def commit(self) :
+        """
+        Write the changes to the disk (done every 1000 changes, and when the cache is closed).
+        """
+        self._db.commit()
+        self._writes = 0
+
+    def clear(self) :
+        """
+        Delete all the results.
+        """
+        self._db.execute("DELETE FROM results")
+        self.size = 0
+        self.commit()
+
+    def close(self) :
+        self.commit()
+        self._db.close()
@@ -1,15 +1,46 @@
 """
 Implémentation de la classe abstraite ARoom basée sur le package shapely. Une pièce
-est définie comme un polygone (classe shapely.Polygon).
+est définie comme un polygone (classe shapely.Polygon), éventuellement troué, et
+peut contenir des obstacles en forme de pavé (classe Obstacle).
 """
 from dronecore.envgeo import *
-from shapely import Polygon, LineString, intersects, intersection, Point
+from dronecore.collision import WallSegments
+import numpy as np
+import shapely
+from shapely import Polygon, LineString, intersects, intersection, Point, prepare, box
 from shapely.wkt import loads
-from random import uniform
+from random import uniform, random
+from bisect import bisect
 
 class RoomShp(ARoom) :
 
-    def __init__(self, coords, height:int=250):
+    INDEX_THRESHOLD = 4000
+    """
+    Number of walls above which the walls are indexed by a grid (when wallIndex is None).
+    """
+
+    MAX_TRIES = 1000
+    """
+    Number of random draws in a cuboid before giving up when it is filled by obstacles.
+    """
+
+    REJECTION_TRIES = 32
+    """
+    Number of points drawn in the bounding box of the room for one random position before
+    the room is triangulated (see _sample).
+    """
+
+    def __init__(self, coords, height:int=250, wallIndex:bool|None=None, holes:list=None, obstacles:list=None):
+        """
+        :param coords: the outline of the room (WKT coordinates or tuple of points) ; WKT
+                       coordinates may give the holes as extra rings : "(0 0, ...), (100 100, ...)"
+        :param height: the height of the room (in cm)
+        :param wallIndex: True to index the walls with a grid, False not to, None to
+                          index them only for large rooms (see INDEX_THRESHOLD)
+        :param holes: the holes of the room (sequences of points), where the drone cannot fly
+        :param obstacles: the obstacles inside the room (Obstacle objects, or tuples of their
+                          parameters (xmin, ymin, xmax, ymax[, zmin, zmax]))
+        """
         super().__init__(height)
         self.geometry = None
         if type(coords) == tuple :
@@ -19,12 +50,30 @@ class RoomShp(ARoom) :
             self.geometry = loads(coords)
         else :
             raise Exception("The coordinates that describe the perimeter of the room are incorrectly formatted.")
+        if holes :
+            self.geometry = Polygon(self.geometry.exterior.coords,
+                                    [ring.coords for ring in self.geometry.interiors]+[tuple(h) for h in holes])
+        self.obstacles = [o if isinstance(o, Obstacle) else Obstacle(*o) for o in (obstacles or [])]
         self.__lengthX = self.geometry.bounds[2]
         self.__lengthY = self.geometry.bounds[3]
+        # the walls, for collision detection : the rings of the polygon and the faces of the obstacles
+        self.walls = WallSegments.fromPolygon(self.geometry)
+        if self.obstacles :
+            self.walls = WallSegments.concatenate([self.walls, WallSegments.fromRings(
+                [o.getFootprint() for o in self.obstacles],
+                [o.zmin for o in self.obstacles], [o.zmax for o in self.obstacles])])
+        if wallIndex or (wallIndex is None and len(self.walls) > RoomShp.INDEX_THRESHOLD) :
+            self.walls.buildIndex()
+        prepare(self.geometry) # speeds up the containment tests of getRandomPosition
+        self._triangles = None # the triangulation of the room, for the random positions (see _Triangles)
+        self._regions = {} # the triangulations of the cuboids of getRandomPositions, by cuboid
+        self._draws = 0 # the number of points drawn by rejection (see _sample)
 
     def __str__(self):
         if self.geometry is None :
             return "Undefined Room"
+        elif self.obstacles :
+            return "Room {} with {} obstacle(s)".format(self.geometry, len(self.obstacles))
         else :
             return "Room "+str(self.geometry)
 
@@ -34,34 +83,35 @@ class RoomShp(ARoom) :
     def getLengthY(self) -> int:
         return self.__lengthY
 
+    def getObstacles(self) -> list[Obstacle] :
+        return self.obstacles
+
     def intersectWall(self, p1: Position, p2: Position) -> bool:
-        return intersects(LineString([(p1.x, p1.y), (p2.x, p2.y)]),
-                          self.geometry.exterior)
+        return self.walls.firstHit(p1.x, p1.y, p2.x, p2.y, p1.z) is not None
 
     def intersectWall2(self, p1: Position, p2: Position) -> Position|None:
-        g=intersection(LineString([(p1.x, p1.y), (p2.x, p2.y)]),
-                       self.geometry.exterior)
-        if len(g.coords)==0 :
+        hit = self.walls.firstHit(p1.x, p1.y, p2.x, p2.y, p1.z)
+        if hit is None :
             return None
         else :
-            return Position(x=g.coords[0][0], y=g.coords[0][1], z=p1.z)
+            return Position(x=hit[0], y=hit[1], z=p1.z)
 
     def getRandomPosition(self, p1: Position = None, p2: Position = None) -> Position:
-        [xmin, ymin, xmax, ymax] = self.geometry.bounds
         if p1 is None and p2 is None :
-            pt = Point(uniform(xmin, xmax), uniform(ymin, ymax))
-            while not self.geometry.contains(pt):
-                pt = Point(uniform(xmin, xmax), uniform(ymin, ymax))
-            return Position(pt.x, pt.y, uniform(0,self.getHeight()))
+            while True :
+                x, y = self._sample()
+                p = Position(x, y, uniform(0,self.getHeight()))
+                if not self._inObstacle(p) :
+                    return p
         elif p1 is not None and ((p2 is None) or (p2 is not None and p1.distance(p2)<0.1)) :
             pt = Point(p1.x, p1.y)
-            if self.geometry.contains(pt) and p1.z<self.getHeight() :
+            if self.geometry.contains(pt) and p1.z<self.getHeight() and not self._inObstacle(p1) :
                 return Position(p1.x, p1.y, p1.z)
             else :
                 raise Exception("The given point is not inside the room")
         elif p1 is None :
             pt = Point(p2.x, p2.y)
-            if self.geometry.contains(pt) and p2.z<self.getHeight() :
+            if self.geometry.contains(pt) and p2.z<self.getHeight() and not self._inObstacle(p2) :
                 return Position(p2.x, p2.y, p2.z)
             else:
                 raise Exception("The given point is not inside the room")
@@ -72,19 +122,151 @@ class RoomShp(ARoom) :
             pt = Point(p2.x, p2.y)
             if not self.geometry.contains(pt) or p2.z>self.getHeight() or p2.z<0 :
                 raise Exception("The second point is not inside the room")
-            return Position(uniform(p1.x, p2.x), uniform(p1.y, p2.y),uniform(p1.z,p2.z))
+            for i in range(RoomShp.MAX_TRIES) :
+                p = Position(uniform(p1.x, p2.x), uniform(p1.y, p2.y),uniform(p1.z,p2.z))
+                if not self._inObstacle(p) :
+                    return p
+            raise Exception("No free position found in the given cuboid")
+
+    def getRandomPositions(self, k:int, seed=None, p1:Position=None, p2:Position=None) -> tuple[np.ndarray, np.ndarray, np.ndarray] :
+        """
+        Get k random positions at once, uniformly distributed inside the room (and inside
+        the cuboid defined by p1 and p2 if given), outside the obstacles. The same seed
+        gives the same positions.
+        :param k: the number of positions
+        :param seed: the seed of the random generator (or a numpy Generator), None for a random seed
+        :param p1: a corner of the cuboid (optional)
+        :param p2: the opposite corner of the cuboid (optional)
+        :return: the arrays of the x, y and z coordinates
+        """
+        rng = np.random.default_rng(seed)
+        if p1 is None or p2 is None :
+            if self._triangles is None :
+                self._triangles = _Triangles(self.geometry)
+            triangles, z1, z2 = self._triangles, 0, self.getHeight()
+        else :
+            bounds = (min(p1.x, p2.x), min(p1.y, p2.y), max(p1.x, p2.x), max(p1.y, p2.y))
+            if bounds not in self._regions :
+                self._regions[bounds] = _Triangles(self.geometry.intersection(box(*bounds)))
+            triangles, z1, z2 = self._regions[bounds], min(p1.z, p2.z), max(p1.z, p2.z)
+        x, y = triangles.samples(k, rng)
+        z = rng.uniform(z1, z2, k)
+        # draw again the positions inside an obstacle
+        for i in range(RoomShp.MAX_TRIES) :
+            inside = np.zeros(k, dtype=bool)
+            for o in self.obstacles :
+                inside |= ((x >= o.xmin) & (x <= o.xmax) & (y >= o.ymin) & (y <= o.ymax) & (z >= o.zmin) & (z <= o.zmax))
+            n = int(np.count_nonzero(inside))
+            if n == 0 :
+                return x, y, z
+            x[inside], y[inside] = triangles.samples(n, rng)
+            z[inside] = rng.uniform(z1, z2, n)
+        raise Exception("No free position found in the room")
+
+    def _sample(self) -> tuple[float, float] :
+        """
+        Draw one point of the room with the random module : a point of the bounding box, kept if
+        it is inside the room (prepared geometry), as long as the room is not triangulated. The
+        triangulation is built (once) when the room fills too little of its box (see REJECTION_TRIES),
+        or when more points than walls have been drawn : its cost is then shared by enough draws.
+        """
+        if self._triangles is None :
+            self._draws += 1
+            if self._draws <= len(self.walls) :
+                xmin, ymin, xmax, ymax = self.geometry.bounds
+                for i in range(RoomShp.REJECTION_TRIES) :
+                    x, y = uniform(xmin, xmax), uniform(ymin, ymax)
+                    if shapely.contains_xy(self.geometry, x, y) :
+                        return x, y
+            self._triangles = _Triangles(self.geometry)
+        return self._triangles.sample()
+
+    def _inObstacle(self, p:Position) -> bool :
+        return any(o.contains(p) for o in self.obstacles)
 
     def getWalls2D(self, h:int=0) :
-        coords=list(self.geometry.exterior.coords)
+        """
+        Get the coordinates of the walls at the altitude h : the outline of the room,
+        then the holes, separated by NaN values.
+        """
         x=[]
         y=[]
         z=[]
-        for c in coords :
-            x.append(c[0])
-            y.append(c[1])
-            z.append(h)
+        for ring in [self.geometry.exterior]+list(self.geometry.interiors) :
+            if x :
+                x.append(float("nan"))
+                y.append(float("nan"))
+                z.append(float("nan"))
+            for c in ring.coords :
+                x.append(c[0])
+                y.append(c[1])
+                z.append(h)
         return x, y, z
 
+class _Triangles :
+    """
+    A triangulation of a polygon, to draw uniformly distributed points inside it : a
+    triangle is chosen according to its area, then a point of the triangle. Without
+    constrained triangulation (shapely < 2.1), the points are drawn in the bounding
+    box and the points outside the polygon are rejected, by vectorized batches.
+    """
+
+    def __init__(self, polygon):
+        self.polygon = polygon
+        self.a = self.b = self.c = None
+        if polygon.is_empty or polygon.area <= 0 :
+            raise Exception("The region where to draw positions is empty")
+        if hasattr(shapely, "constrained_delaunay_triangles") :
+            parts = shapely.get_parts(shapely.constrained_delaunay_triangles(polygon))
+            coords = shapely.get_coordinates(parts).reshape(len(parts), 4, 2)
+            self.a, self.b, self.c = coords[:, 0], coords[:, 1], coords[:, 2]
+            ab = self.b - self.a
+            ac = self.c - self.a
+            area = np.abs(ab[:, 0]*ac[:, 1] - ab[:, 1]*ac[:, 0])
+            self.cumulative = np.cumsum(area) / area.sum() # the cumulative distribution of the triangles
+            self._cumulative = self.cumulative.tolist()
+        else :
+            prepare(polygon)
+
+    def sample(self) -> tuple[float, float] :
+        """
+        Draw one point with the random module.
+        """
+        if self.a is None :
+            xmin, ymin, xmax, ymax = self.polygon.bounds
+            while True :
+                x, y = uniform(xmin, xmax), uniform(ymin, ymax)
+                if self.polygon.contains(Point(x, y)) :
+                    return x, y
+        i = min(bisect(self._cumulative, random()), len(self._cumulative)-1)
+        u, v = random(), random()
+        if u + v > 1 :
+            u, v = 1-u, 1-v
+        a, b, c = self.a[i], self.b[i], self.c[i]
+        return (float(a[0] + u*(b[0]-a[0]) + v*(c[0]-a[0])),
+                float(a[1] + u*(b[1]-a[1]) + v*(c[1]-a[1])))
+
+    def samples(self, k:int, rng:np.random.Generator) -> tuple[np.ndarray, np.ndarray] :
+        """
+        Draw k points with a numpy random generator.
+        """
+        if self.a is None :
+            xmin, ymin, xmax, ymax = self.polygon.bounds
+            x, y = np.empty(0), np.empty(0)
+            while len(x) < k :
+                n = 2*(k-len(x)) + 16
+                cx, cy = rng.uniform(xmin, xmax, n), rng.uniform(ymin, ymax, n)
+                keep = shapely.contains_xy(self.polygon, cx, cy)
+                x, y = np.concatenate([x, cx[keep]]), np.concatenate([y, cy[keep]])
+            return x[:k], y[:k]
+        i = np.minimum(np.searchsorted(self.cumulative, rng.random(k), side="right"), len(self.cumulative)-1)
+        u, v = rng.random(k), rng.random(k)
+        flip = u + v > 1
+        u[flip], v[flip] = 1-u[flip], 1-v[flip]
+        a, b, c = self.a[i], self.b[i], self.c[i]
+        p = a + u[:, None]*(b-a) + v[:, None]*(c-a)
+        return p[:, 0], p[:, 1]
+
 if __name__ == '__main__':
     room = RoomShp("(0 0, 500 0, 500 500, 0 500, 0 0)")
     print(room)
@@ -123,5 +305,7 @@ if __name__ == '__main__':
     print(room.getRandomPosition(Position(250,250)))
     print("Generate position 3")
     print(room.getRandomPosition(Position(200,200), Position(300,300)))
+    print("Generate 5 positions (seed 1)")
+    print(room.getRandomPositions(5, seed=1))
 
     print(room.getWalls2D())
@@ -0,0 +1,196 @@
+"""
+Génération de scénarios reproductibles : des pièces (polygones simples en étoile,
+avec un nombre de sommets choisi, éventuellement des obstacles), une cible et une
+position de départ, tirés avec un générateur aléatoire initialisé par la graine
+et le numéro du scénario. Un même numéro donne toujours le même scénario, sans
+générer les précédents : un corpus de millions de scénarios s'écrit et se relit
+au fil de l'eau (JSONL, une ligne par scénario), sans le garder en mémoire.
+Les scénarios sont au format de grading (clés 'room', 'height', 'obstacles',
+'target', 'start').
+"""
+import argparse
+import itertools
+import json
+import numpy as np
+import shapely
+from math import pi
+from shapely import Point, Polygon, box
+
+class ScenarioGenerator :
+    """
+    A deterministic generator of scenarios : the scenario i only depends on the seed and on i.
+    The scenarios are grouped by rooms : perRoom consecutive scenarios share the same room and
+    the same target, and differ by their start positions (to be replayed together, see Mission.replay).
+    """
+
+    MAX_TRIES = 1000
+
+    def __init__(self, seed:int=None, vertices:tuple[int, int]=(4, 12), size:tuple[int, int]=(500, 2000),
+                 height:tuple[int, int]=(200, 300), obstacles:tuple[int, int]=(0, 0), perRoom:int=1,
+                 clearance:float=50, targetDistance:float=100):
+        """
+        :param seed: the seed of the corpus (None for a random seed, see self.seed)
+        :param vertices: the minimum and the maximum numbers of vertices of a room
+        :param size: the minimum and the maximum widths of a room (in cm)
+        :param height: the minimum and the maximum heights of a room (in cm)
+        :param obstacles: the minimum and the maximum numbers of obstacles in a room (boxes up to the ceiling)
+        :param perRoom: the number of consecutive scenarios with the same room and target
+        :param clearance: the minimum distance between the walls or the obstacles and the start or the target (in cm)
+        :param targetDistance: the minimum horizontal distance between the start and the target (in cm)
+        """
+        self.seed = int(np.random.SeedSequence().entropy) if seed is None else seed # the seed, to generate the corpus again
+        self.vertices = vertices
+        self.size = size
+        self.height = height
+        self.obstacles = obstacles
+        self.perRoom = max(1, perRoom)
+        self.clearance = clearance
+        self.targetDistance = targetDistance
+        self._room = None # the last room generated (its index and its description), for the next scenarios of the room
+
+    def __str__(self):
+        return "Scenario generator (seed {}, {} to {} vertices, {} scenario(s) per room)".format(
+            self.seed, self.vertices[0], self.vertices[1], self.perRoom)
+
+    def generate(self, i:int) -> dict :
+        """
+        Generate a scenario.
+        :param i: the number of the scenario
+        :return: the scenario (keys 'name', 'room', 'height', 'obstacles' if any, 'target' and 'start')
+        """
+        r, k = divmod(i, self.perRoom)
+        if self._room is None or self._room[0] != r :
+            self._room = (r, self._generateRoom(r))
+        coords, height, obstacles, starts, target = self._room[1]
+        rng = np.random.default_rng([self.seed, r, k + 1])
+        x, y = self._sample(rng, starts)
+        scenario = {"name": i, "room": coords, "height": height}
+        if obstacles :
+            scenario["obstacles"] = obstacles
+        scenario["target"] = target
+        scenario["start"] = [x, y, int(rng.integers(0, 360))]
+        return scenario
+
+    def iterate(self, count:int, first:int=0) :
+        """
+        Generate scenarios lazily.
+        :param count: the number of scenarios (None for an endless stream)
+        :param first: the number of the first scenario
+        :return: an iterator on the scenarios
+        """
+        numbers = itertools.count(first) if count is None else range(first, first + count)
+        return (self.generate(i) for i in numbers)
+
+    def write(self, filename:str, count:int, first:int=0) -> int :
+        """
+        Write a corpus of scenarios in a JSONL file, one scenario per line, as they are generated.
+        :return: the number of scenarios written
+        """
+        n = 0
+        with open(filename, "w", encoding="utf-8") as f :
+            for scenario in self.iterate(count, first) :
+                f.write(json.dumps(scenario, separators=(",", ":"))+"\n")
+                n += 1
+        return n
+
+    def _generateRoom(self, r:int) -> tuple :
+        """
+        Generate the room r : its outline (WKT coordinates), its height, its obstacles, the region where
+        the start positions are drawn (far enough from the walls, the obstacles and the target) and its target.
+        """
+        rng = np.random.default_rng([self.seed, r, 0])
+        for _ in range(ScenarioGenerator.MAX_TRIES) :
+            n = int(rng.integers(self.vertices[0], self.vertices[1] + 1))
+            radius = rng.uniform(self.size[0], self.size[1]) / 2
+            # a star-shaped polygon : increasing angles around the centre, random radii
+            gaps = rng.uniform(0.5, 1.5, n)
+            angles = rng.uniform(0, 2*pi) + 2*pi * np.cumsum(gaps) / gaps.sum()
+            radii = radius * rng.uniform(0.5, 1.0, n)
+            x = np.round(radii * np.cos(angles))
+            y = np.round(radii * np.sin(angles))
+            x -= x.min()
+            y -= y.min()
+            polygon = Polygon(np.column_stack((x, y)))
+            if not polygon.is_valid or polygon.area <= 0 :
+                continue
+            obstacles = []
+            region = polygon
+            xmin, ymin, xmax, ymax = polygon.bounds
+            for j in range(int(rng.integers(self.obstacles[0], self.obstacles[1] + 1))) :
+                w, h = rng.integers(30, 150, 2)
+                if w >= xmax - xmin or h >= ymax - ymin :
+                    continue
+                ox, oy = int(rng.integers(xmin, xmax - w)), int(rng.integers(ymin, ymax - h))
+                footprint = box(ox, oy, ox + w, oy + h)
+                if polygon.contains(footprint) :
+                    obstacles.append([ox, oy, ox + int(w), oy + int(h)])
+                    region = region.difference(footprint)
+            # 1 cm more : the buffers are polygons, inside the true offsets, and the parts thinner
+            # than 2 cm (without a point with integer coordinates) are removed
+            free = region.buffer(-self.clearance - 2).buffer(1)
+            if not self._sampleable(free) :
+                continue
+            shapely.prepare(free)
+            tx, ty = self._sample(rng, free)
+            starts = free.difference(Point(tx, ty).buffer(self.targetDistance + 2)).buffer(-1).buffer(1)
+            if not self._sampleable(starts) :
+                continue
+            shapely.prepare(starts)
+            height = int(rng.integers(self.height[0], self.height[1] + 1))
+            target = [tx, ty, int(rng.integers(min(50, height // 2), max(height - 30, height // 2) + 1))]
+            coords = "(" + ", ".join("{} {}".format(int(a), int(b)) for a, b in zip(x.tolist() + x[:1].tolist(), y.tolist() + y[:1].tolist())) + ")"
+            return coords, height, obstacles, starts, target
+        raise Exception("No room found : the rooms are too small for the clearance and the target distance")
+
+    @staticmethod
+    def _sampleable(region) -> bool :
+        """
+        Check that a region is not empty, nor a sliver that would be hard to draw a point in.
+        """
+        if region.is_empty :
+            return False
+        xmin, ymin, xmax, ymax = region.bounds
+        return region.area >= 0.01 * (xmax - xmin) * (ymax - ymin)
+
+    def _sample(self, rng:np.random.Generator, region) -> tuple[int, int] :
+        """
+        Draw a point (rounded to the cm) in a region, by rejection in its bounding box.
+        """
+        xmin, ymin, xmax, ymax = region.bounds
+        for _ in range(ScenarioGenerator.MAX_TRIES) :
+            x = np.round(rng.uniform(xmin, xmax, 32))
+            y = np.round(rng.uniform(ymin, ymax, 32))
+            i = np.flatnonzero(shapely.contains_xy(region, x, y))
+            if len(i) > 0 :
+                return int(x[i[0]]), int(y[i[0]])
+        raise Exception("No free position found in the room")
+
+class Corpus :
+    """
+    A corpus of scenarios in a JSONL file, read lazily (one scenario at a time) each time it is iterated.
+    """
+
+    def __init__(self, filename:str):
+        self.filename = filename
+
+    def __str__(self):
+        return "Corpus of scenarios " + self.filename
+
+    def __iter__(self):
+        with open(self.filename, encoding="utf-8") as f :
+            for line in f :
+                if line.strip() :
+                    yield json.loads(line)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate a corpus of scenarios (JSONL).")
+    parser.add_argument("output", help="the JSONL file of the scenarios")
+    parser.add_argument("-n", "--count", type=int, default=1000, help="the number of scenarios")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="the seed of the corpus")
+    parser.add_argument("-v", "--vertices", type=int, nargs=2, default=(4, 12), help="the numbers of vertices of a room")
+    parser.add_argument("-o", "--obstacles", type=int, nargs=2, default=(0, 0), help="the numbers of obstacles in a room")
+    parser.add_argument("-p", "--per-room", type=int, default=1, help="the number of scenarios with the same room")
+    args = parser.parse_args()
+    generator = ScenarioGenerator(args.seed, tuple(args.vertices), obstacles=tuple(args.obstacles), perRoom=args.per_room)
+    n = generator.write(args.output, args.count)
+    print("{} scenarios written (seed {})".format(n, generator.seed))
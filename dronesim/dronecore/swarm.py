@@ -0,0 +1,111 @@
+"""
+Essaim de drones virtuels dans une même pièce : un lot de drones (DroneBatch) qui
+détecte aussi les collisions entre drones. Les paires de drones proches sont
+trouvées avec une table de hachage spatiale (une grille de cellules de la taille de
+la distance cherchée) : seuls les drones de cellules voisines sont comparés, ce qui
+évite les N² comparaisons de distance.
+"""
+import numpy as np
+from dronecore import *
+from dronecore.dronebatch import DroneBatch, _BREAK, _INFLIGHT, _KO
+
+# Half of the neighbour cells (the other half is found from the other cell)
+_NEIGHBOURS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+
+DIRECT_PAIRS = 64
+"""
+The number of points under which closePairs compares all the pairs (faster than the grid for a few points).
+"""
+
+def closePairs(x:np.ndarray, y:np.ndarray, z:np.ndarray, distance:float, mask:np.ndarray=None) -> tuple[np.ndarray, np.ndarray] :
+    """
+    Find the pairs of points closer than a distance, with a spatial hash on a grid of cells of this size
+    (or by comparing all the pairs, for at most DIRECT_PAIRS points).
+    :param x, y, z: the coordinates of the points
+    :param distance: the distance
+    :param mask: the points to consider (default : all)
+    :return: the indexes i and j (i < j) of the points of each pair
+    """
+    idx = np.arange(len(x)) if mask is None else np.flatnonzero(mask)
+    n = len(idx)
+    if n < 2 :
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    if n <= DIRECT_PAIRS :
+        px, py, pz = x[idx], y[idx], z[idx]
+        i, j = np.nonzero(np.triu((px[:, None]-px)**2 + (py[:, None]-py)**2 + (pz[:, None]-pz)**2 < distance**2, 1))
+        return idx[i], idx[j]
+    cx = np.floor(x[idx] / distance).astype(np.int64)
+    cy = np.floor(y[idx] / distance).astype(np.int64)
+    cx -= cx.min()
+    cy -= cy.min() - 1
+    stride = int(cy.max()) + 2
+    keys = cx * stride + cy
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    first = []
+    second = []
+    for ox, oy in _NEIGHBOURS :
+        neighbour = sorted_keys + (ox * stride + oy)
+        hi = np.searchsorted(sorted_keys, neighbour, "right")
+        if ox == 0 and oy == 0 :
+            # in the same cell : only the points after this one
+            lo = np.arange(1, n+1)
+        else :
+            lo = np.searchsorted(sorted_keys, neighbour, "left")
+        counts = np.maximum(hi - lo, 0)
+        total = int(counts.sum())
+        if total == 0 :
+            continue
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        first.append(np.repeat(np.arange(n), counts))
+        second.append(np.arange(total) + starts)
+    if not first :
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    i = idx[order[np.concatenate(first)]]
+    j = idx[order[np.concatenate(second)]]
+    close = (x[i]-x[j])**2 + (y[i]-y[j])**2 + (z[i]-z[j])**2 < distance**2
+    i = i[close]
+    j = j[close]
+    return np.minimum(i, j), np.maximum(i, j)
+
+class Swarm(DroneBatch) :
+    """
+    A swarm of N virtual drones in the same room : a batch of drones (see DroneBatch)
+    where two flying drones closer than collisionDistance after a command both crash.
+    The collisions are tested on the positions reached after each command.
+    """
+
+    def __init__(self, n:int, room:ARoom, target:Position=None):
+        super().__init__(n, room, target)
+        self.collisionDistance = 20  # the distance between two drones under which they collide (in cm)
+        self.collisions = (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)) # the pairs (i, j) of drones that collided during the last command
+
+    def __str__(self):
+        return "Swarm of {} virtual drones (class Swarm) - {} in flight, {} KO".format(
+            self.size, self.countState(DroneState.INFLIGHT), self.countState(DroneState.KO))
+
+    def apply(self, ctype, amount=-1) :
+        super().apply(ctype, amount)
+        i, j = self.getClosePairs(self.collisionDistance)
+        self.collisions = (i, j)
+        if len(i) > 0 :
+            crashed = np.concatenate((i, j))
+            self.state[crashed] = _KO
+            self.result[crashed] = _BREAK
+            self.detected[crashed] = False
+
+    def getClosePairs(self, distance:float) -> tuple[np.ndarray, np.ndarray] :
+        """
+        Get the pairs of flying drones closer than a distance.
+        :param distance: the distance (in cm)
+        :return: the indexes i and j (i < j) of the drones of each pair
+        """
+        return closePairs(self.x, self.y, self.z, distance, self.state == _INFLIGHT)
+
+    def getDistances(self, p:Position) -> np.ndarray :
+        """
+        Get the distances of all the drones to a position (Position.distance for the swarm).
+        :param p: the position
+        :return: the distances (in cm)
+        """
+        return np.sqrt((self.x-p.x)**2 + (self.y-p.y)**2 + (self.z-p.z)**2)
@@ -0,0 +1,157 @@
+"""
+Ensemble de cibles (recherche et sauvetage : des centaines ou des milliers de cibles
+dans la pièce). Les cibles sont rangées dans une grille (table de hachage spatiale,
+au format CSR) : une requête autour d'une position ne teste que les cibles des
+cellules voisines, et non toutes les cibles. L'ensemble retient les cibles déjà
+détectées, dans l'ordre de leur détection.
+"""
+import numpy as np
+from math import floor
+from dronecore.envgeo import Position
+
+class TargetSet :
+    """
+    A set of targets indexed by a grid in the horizontal plane, with their detection state.
+    """
+
+    def __init__(self, positions, cellSize:float=50):
+        """
+        :param positions: the positions of the targets (Position objects, or an array of n (x, y, z))
+        :param cellSize: the size of the cells of the grid (in cm), about the detection radius
+        """
+        if len(positions) > 0 and isinstance(positions[0], Position) :
+            positions = [(p.x, p.y, p.z) for p in positions]
+        xyz = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.x = xyz[:, 0].copy()
+        self.y = xyz[:, 1].copy()
+        self.z = xyz[:, 2].copy()
+        self.size = len(xyz) # the number of targets
+        self.cellSize = cellSize
+        self.detected = np.zeros(self.size, dtype=bool) # the targets already detected
+        self.order:list[int] = [] # the indexes of the detected targets, in the order of their detection
+        self._read = 0 # the number of detections already returned by getEvents
+        # the grid : the targets sorted by cell (key = column * rows + row)
+        cx = np.floor(self.x / cellSize).astype(np.int64)
+        cy = np.floor(self.y / cellSize).astype(np.int64)
+        self._cx0 = int(cx.min()) if self.size > 0 else 0
+        self._cy0 = int(cy.min()) if self.size > 0 else 0
+        self._columns = int(cx.max()) - self._cx0 + 1 if self.size > 0 else 0
+        self._rows = int(cy.max()) - self._cy0 + 1 if self.size > 0 else 0
+        keys = (cx - self._cx0) * self._rows + (cy - self._cy0)
+        self._index = np.argsort(keys, kind="stable")
+        self._keys = keys[self._index]
+        # the rows (x, y, z, x²+y²+z²) in the order of the grid : |t-p|² - |p|² = row . (-2p, 1)
+        self._rows4 = np.column_stack((xyz, (xyz*xyz).sum(axis=1)))[self._index]
+
+    def __len__(self):
+        return self.size
+
+    def __str__(self):
+        return "{} targets ({} detected)".format(self.size, self.countDetected())
+
+    def getPosition(self, i:int) -> Position :
+        """
+        Get the position of a target.
+        :param i: the index of the target
+        """
+        return Position(float(self.x[i]), float(self.y[i]), float(self.z[i]))
+
+    def countDetected(self) -> int :
+        return len(self.order)
+
+    def reset(self) :
+        """
+        Forget the detections.
+        """
+        self.detected[:] = False
+        self.order = []
+        self._read = 0
+
+    def _slices(self, xmin:float, ymin:float, xmax:float, ymax:float) -> list[tuple[int, int]] :
+        """
+        Get the slices of the grid (in the order of the grid) of the cells that overlap a rectangle.
+        """
+        cs = self.cellSize
+        c0 = max(floor(xmin / cs) - self._cx0, 0)
+        c1 = min(floor(xmax / cs) - self._cx0, self._columns - 1)
+        r0 = max(floor(ymin / cs) - self._cy0, 0)
+        r1 = min(floor(ymax / cs) - self._cy0, self._rows - 1)
+        if c0 > c1 or r0 > r1 :
+            return []
+        # the cells of a column are contiguous in the sorted keys : one slice per column
+        first = [c * self._rows + r0 for c in range(c0, c1 + 1)]
+        bounds = np.searchsorted(self._keys, first + [k + r1 - r0 + 1 for k in first]).tolist()
+        k = len(first)
+        return [(lo, hi) for lo, hi in zip(bounds[:k], bounds[k:]) if hi > lo]
+
+    def _gather(self, slices:list[tuple[int, int]]) -> tuple[np.ndarray, np.ndarray] :
+        """
+        Get the indexes and the rows (x, y, z, x²+y²+z²) of the targets of some slices of the grid.
+        """
+        if len(slices) == 1 :
+            lo, hi = slices[0]
+            return self._index[lo:hi], self._rows4[lo:hi]
+        return (np.concatenate([self._index[lo:hi] for lo, hi in slices]),
+                np.concatenate([self._rows4[lo:hi] for lo, hi in slices]))
+
+    def candidates(self, xmin:float, ymin:float, xmax:float, ymax:float) -> np.ndarray :
+        """
+        Get the targets of the cells that overlap a rectangle (a superset of the targets inside it).
+        :return: the indexes of the targets
+        """
+        slices = self._slices(xmin, ymin, xmax, ymax)
+        if not slices :
+            return np.zeros(0, dtype=np.intp)
+        return self._gather(slices)[0]
+
+    def query(self, p:Position, radius:float) -> np.ndarray :
+        """
+        Get the targets at a distance less than radius from a position.
+        :return: the indexes of the targets
+        """
+        slices = self._slices(p.x - radius, p.y - radius, p.x + radius, p.y + radius)
+        if not slices :
+            return np.zeros(0, dtype=np.intp)
+        i, rows = self._gather(slices)
+        d2 = rows.dot((-2*p.x, -2*p.y, -2*p.z, 1.0))
+        return i[d2 < radius*radius - (p.x*p.x + p.y*p.y + p.z*p.z)]
+
+    def querySegment(self, p1:Position, p2:Position, radius:float) -> np.ndarray :
+        """
+        Get the targets at a distance less than radius from the segment [p1, p2] (the volume swept by a move).
+        :return: the indexes of the targets
+        """
+        slices = self._slices(min(p1.x, p2.x) - radius, min(p1.y, p2.y) - radius,
+                              max(p1.x, p2.x) + radius, max(p1.y, p2.y) + radius)
+        if not slices :
+            return np.zeros(0, dtype=np.intp)
+        i, rows = self._gather(slices)
+        d = rows[:, :3] - (p1.x, p1.y, p1.z)
+        u = np.array((p2.x - p1.x, p2.y - p1.y, p2.z - p1.z))
+        l2 = u.dot(u)
+        if l2 > 0 :
+            # the projection on the segment, clamped to its ends
+            d -= np.clip(d.dot(u) / l2, 0.0, 1.0)[:, None] * u
+        return i[(d*d).sum(axis=1) < radius*radius]
+
+    def detect(self, p:Position, radius:float, p0:Position=None) -> np.ndarray :
+        """
+        Detect the targets at a distance less than radius from a position (or from the segment [p0, p]).
+        :param p0: the start of the move to the position, to detect along the whole move
+        :return: the indexes of the targets detected for the first time
+        """
+        found = self.query(p, radius) if p0 is None else self.querySegment(p0, p, radius)
+        new = found[~self.detected[found]]
+        if len(new) > 0 :
+            self.detected[new] = True
+            self.order.extend(new.tolist())
+        return new
+
+    def getEvents(self) -> list[int] :
+        """
+        Get the targets detected since the previous call.
+        :return: the indexes of the targets, in the order of their detection
+        """
+        events = self.order[self._read:]
+        self._read = len(self.order)
+        return events
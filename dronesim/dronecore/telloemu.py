@@ -0,0 +1,154 @@
+"""
+Émulateur local d'un drone Tello Edu : un serveur UDP qui reçoit les commandes du
+SDK Tello, les applique à un drone virtuel (DroneVirtual) et répond comme le drone
+réel ("ok", "error" ou la valeur demandée), et qui envoie régulièrement l'état du
+drone (télémétrie) au client. Il permet de tester DroneTello sans drone, et de
+mesurer la latence des commandes.
+"""
+import socket
+import threading
+import time
+from dronecore.dronevirt import *
+
+class TelloEmulator :
+    """
+    A Tello Edu drone emulated on the local machine, started by start() and stopped by stop().
+    """
+
+    MOVES = {"forward": DroneVirtual.forward, "back": DroneVirtual.backward,
+             "up": DroneVirtual.goUp, "down": DroneVirtual.goDown,
+             "left": DroneVirtual.goLeft, "right": DroneVirtual.goRight,
+             "cw": DroneVirtual.rotateRight, "ccw": DroneVirtual.rotateLeft}
+    """
+    The commands of the Tello SDK with an amount, and the methods of the virtual drone that run them.
+    """
+
+    def __init__(self, room:ARoom, x:float=0, y:float=0, heading:int=0, host:str="127.0.0.1", port:int=8889,
+                 statePort:int=8890, stateRate:float=10.0, delay:float=0.0):
+        """
+        :param room: the room of the emulated drone
+        :param x, y, heading: the initial position of the emulated drone
+        :param host: the address on which the emulator listens
+        :param port: the command port (0 for any free port, see self.port after start())
+        :param statePort: the port of the client to which the state packets are sent
+        :param stateRate: the number of state packets per second
+        :param delay: the time taken by each command before its response (in s)
+        """
+        self.drone = DroneVirtual() # the emulated drone
+        self.drone.viewer = ViewerNone(self.drone, room)
+        self.drone.locate(x, y, heading, room)
+        self.host = host
+        self.port = port
+        self.statePort = statePort
+        self.stateRate = stateRate
+        self.delay = delay
+        self.received = 0 # the number of commands received
+        self.client = None # the address of the last client
+        self._heading0 = self.drone.getHeading()
+        self._takeoffTime = None
+        self._socket = None
+        self._running = False
+        self._threads = []
+
+    def __str__(self):
+        return "Tello emulator on {}:{} - {}".format(self.host, self.port, self.drone)
+
+    def start(self) :
+        """
+        Start the emulator : the command server and the sender of the state packets.
+        """
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((self.host, self.port))
+        self._socket.settimeout(0.05)
+        self.port = self._socket.getsockname()[1]
+        self._running = True
+        self._threads = [threading.Thread(target=self._serve, daemon=True),
+                         threading.Thread(target=self._sendState, daemon=True)]
+        for t in self._threads :
+            t.start()
+
+    def stop(self) :
+        self._running = False
+        for t in self._threads :
+            t.join()
+        self._socket.close()
+
+    def respond(self, text:str) -> str :
+        """
+        Run a command of the Tello SDK on the emulated drone.
+        :param text: the command
+        :return: the response of the drone
+        """
+        words = text.split()
+        if not words :
+            return "error"
+        name = words[0]
+        d = self.drone
+        try :
+            if name == "command" :
+                return "ok"
+            if name == "takeoff" :
+                d.takeOff()
+                if d.getCommand().result == CommandResult.RES_OK :
+                    self._takeoffTime = time.monotonic()
+            elif name == "land" :
+                d.land()
+            elif name in self.MOVES and len(words) == 2 :
+                self.MOVES[name](d, int(words[1]))
+            elif name == "battery?" :
+                return "100"
+            elif name == "height?" :
+                return "{}dm".format(round(d.getHeight() / 10))
+            elif name == "time?" :
+                return "{}s".format(self._flightTime())
+            elif name == "speed?" :
+                return "100.0"
+            elif name == "sdk?" :
+                return "20"
+            else :
+                return "unknown command: " + text
+        except ValueError :
+            return "error"
+        except Exception as e :
+            # crash of the emulated drone : it stays KO and refuses the next commands
+            return "error " + str(e)
+        return "ok" if d.getCommand().result == CommandResult.RES_OK else "error"
+
+    def getState(self) -> bytes :
+        """
+        Get the state packet of the emulated drone, in the format of the Tello SDK 2.0.
+        The yaw is in degrees, clockwise, relative to the initial heading.
+        """
+        d = self.drone
+        yaw = round((self._heading0 - d.getHeading()) * 180 / pi)
+        yaw = (yaw + 180) % 360 - 180
+        h = d.getHeight()
+        return ("mid:-1;x:0;y:0;z:0;mpry:0,0,0;pitch:0;roll:0;yaw:{};vgx:0;vgy:0;vgz:0;templ:60;temph:62;"
+                "tof:{};h:{};bat:100;baro:0.00;time:{};agx:0.00;agy:0.00;agz:-1000.00;\r\n").format(
+            yaw, h+10, h, self._flightTime()).encode("ascii")
+
+    def _flightTime(self) -> int :
+        return 0 if self._takeoffTime is None else round(time.monotonic() - self._takeoffTime)
+
+    def _serve(self) :
+        while self._running :
+            try :
+                data, self.client = self._socket.recvfrom(1024)
+            except socket.timeout :
+                continue
+            except OSError :
+                break
+            self.received += 1
+            response = self.respond(data.decode("ascii", "replace").strip())
+            if self.delay > 0 :
+                time.sleep(self.delay)
+            self._socket.sendto(response.encode("ascii"), self.client)
+
+    def _sendState(self) :
+        while self._running :
+            time.sleep(1 / self.stateRate)
+            if self.client is not None :
+                try :
+                    self._socket.sendto(self.getState(), (self.client[0], self.statePort))
+                except OSError :
+                    break
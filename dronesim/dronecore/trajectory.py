@@ -0,0 +1,134 @@
+"""
+Enregistrement compact de la trajectoire d'un drone : après chaque commande, le
+temps, la position, le cap, la commande, sa quantité, son résultat et l'état du
+drone sont ajoutés dans un tableau NumPy préalloué (une trentaine d'octets par
+pas), qui double de taille quand il est plein. La trajectoire peut être
+sauvegardée dans un fichier .npz, rechargée, et rejouée dans n'importe quelle vue.
+"""
+import time
+import numpy as np
+from dronecore import *
+from dronecore import _ReplayDrone
+from dronecore.dronebatch import COMMAND_CODES, RESULT_CODES
+
+STEP_DTYPE = np.dtype([("t", "f8"), ("x", "f4"), ("y", "f4"), ("z", "f4"), ("heading", "f4"),
+                       ("command", "i1"), ("amount", "i4"), ("result", "i1"), ("state", "i1")])
+"""
+The type of a recorded step (31 bytes) : the time (in seconds since the start of the
+recording), the position (in cm) and heading (in radians) after the command, the command
+(index in COMMAND_CODES), its amount, its result (index in RESULT_CODES) and the state
+of the drone (value of DroneState).
+"""
+
+class TrajectoryRecorder :
+    """
+    A recorder of the steps of a drone, attached to the drone with 'drone.recorder = recorder'.
+    """
+
+    def __init__(self, capacity:int=1024):
+        self.steps = np.empty(max(1, capacity), dtype=STEP_DTYPE) # the buffer of the steps (only the first ones are used)
+        self.size = 0 # the number of recorded steps
+        self.start = time.perf_counter() # the time origin of the recording
+        self._commands = {c: i for i, c in enumerate(COMMAND_CODES)}
+        self._results = {r: i for i, r in enumerate(RESULT_CODES)}
+
+    def __len__(self):
+        return self.size
+
+    def __str__(self):
+        return "Trajectory of {} steps ({} bytes)".format(self.size, self.steps.nbytes)
+
+    def append(self, t:float, x:float, y:float, z:float, heading:float, command:int, amount:int, result:int, state:int) :
+        """
+        Append a step, given with its codes (see STEP_DTYPE).
+        """
+        if self.size == len(self.steps) :
+            steps = np.empty(2*len(self.steps), dtype=STEP_DTYPE)
+            steps[:self.size] = self.steps
+            self.steps = steps
+        self.steps[self.size] = (t, x, y, z, heading, command, amount, result, state)
+        self.size += 1
+
+    def record(self, drone:ADrone, t:float=None) :
+        """
+        Append the current step of a drone (called after each command, see the decorator 'recorded').
+        :param drone: the drone
+        :param t: the time of the step (default : the mission time of the drone if it simulates
+                  the duration of the commands, else the time elapsed since the start of the recording)
+        """
+        p = drone.getCurrentPosition()
+        c = drone.getCommand()
+        if t is None :
+            t = drone.getMissionTime()
+        self.append(time.perf_counter() - self.start if t is None else t, p.x, p.y, p.z, p.heading,
+                    self._commands[c.ctype], c.amount, self._results[c.result], drone.getState().value)
+
+    def getSteps(self) -> np.ndarray :
+        """
+        Get the recorded steps (a view on the buffer, fields t, x, y, z, heading, command, amount, result, state).
+        """
+        return self.steps[:self.size]
+
+    def getPathLength(self) -> float :
+        """
+        Get the length of the recorded trajectory.
+        :return: the length (in cm)
+        """
+        s = self.getSteps()
+        return float(np.sqrt(np.diff(s["x"].astype(np.float64))**2 + np.diff(s["y"].astype(np.float64))**2 +
+                             np.diff(s["z"].astype(np.float64))**2).sum())
+
+    def save(self, filename:str) :
+        """
+        Save the recorded steps in a .npz file (one array per field).
+        """
+        s = self.getSteps()
+        np.savez_compressed(filename, **{name: s[name] for name in STEP_DTYPE.names})
+
+    @staticmethod
+    def load(filename:str) -> 'TrajectoryRecorder' :
+        """
+        Load recorded steps from a .npz file written by save.
+        :return: a recorder holding the steps
+        """
+        with np.load(filename) as data :
+            n = len(data["t"])
+            recorder = TrajectoryRecorder(n)
+            for name in STEP_DTYPE.names :
+                recorder.steps[name][:n] = data[name]
+        recorder.size = n
+        return recorder
+
+    def getStep(self, i:int) -> RecordedStep :
+        """
+        Get a recorded step as objects (the previous position is the one of the step before,
+        and the command was refused if its result is RES_NO).
+        :param i: the index of the step
+        """
+        s = self.steps[i]
+        p = self.steps[i-1] if i > 0 else s
+        result = RESULT_CODES[s["result"]]
+        return RecordedStep(Position(float(p["x"]), float(p["y"]), float(p["z"]), float(p["heading"])),
+                            Position(float(s["x"]), float(s["y"]), float(s["z"]), float(s["heading"])),
+                            DroneState(int(s["state"])),
+                            Command(COMMAND_CODES[s["command"]], int(s["amount"]), result != CommandResult.RES_NO, result))
+
+    def replay(self, viewer:AViewer, speed:float=None) :
+        """
+        Replay the recorded steps in a viewer.
+        :param viewer: the viewer used to render the trajectory
+        :param speed: the speed of the replay (1 for the recorded pace, 2 twice as fast...),
+                      None to replay without waiting between the steps
+        """
+        drone = viewer.drone
+        start = time.perf_counter()
+        try :
+            for i in range(self.size) :
+                if speed is not None and speed > 0 :
+                    wait = (self.steps["t"][i] - self.steps["t"][0]) / speed - (time.perf_counter() - start)
+                    if wait > 0 :
+                        time.sleep(wait)
+                viewer.drone = _ReplayDrone(self.getStep(i))
+                viewer.display()
+        finally :
+            viewer.drone = drone
@@ -0,0 +1,712 @@
+"""
+Correction automatique d'un ensemble de programmes d'élèves : chaque programme
+(écrit avec dronecmds) est exécuté sur chaque scénario (pièce, cible, position
+de départ), en parallèle dans un pool de processus. Les résultats sont écrits
+au fil de l'eau au format JSONL (un objet JSON par ligne).
+
+Usage : python grading.py programs_dir scenarios.json -o results.jsonl
+
+Les scénarios peuvent aussi être un corpus JSONL (un scénario par ligne, voir
+dronecore.scenarios) : il est alors lu au fil de l'eau, sans être chargé en mémoire.
+
+Avec l'option --cache, les résultats sont gardés dans une base SQLite (voir
+dronecore.resultcache) : une nouvelle correction ne relance que les exécutions
+dont le programme, le scénario, le budget, la version du simulateur ou les
+paramètres du drone ont changé.
+
+Avec l'option --compiled, un programme qui ne lit jamais l'état du drone ni ne
+rattrape d'exception (try, with) est capturé une fois en une mission (suite de
+commandes, voir dronecore.mission), dans un processus du pool, puis rejoué par
+le moteur par lots sur tous les scénarios d'une même pièce.
+"""
+
+import argparse
+import ast
+import contextlib
+import io
+import json
+import os
+import pathlib
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+import numpy as np
+import dronecmds
+from simulation import *
+from dronecore.dronebatch import COMMAND_CODES
+from dronecore.mission import Mission
+from dronecore.scenarios import Corpus
+from dronecore.resultcache import ResultCache, hashFile, hashJSON
+
+MISSION_BATCH = 16
+"""
+The minimum number of scenarios with the same room and target replayed together by the batch
+engine (see gradeMission) : the smaller groups are run by gradeRun, which is faster for them.
+"""
+
+MISSION_CHUNK = 1024
+"""
+The maximum number of scenarios sent at once to gradeMission, and held back while their groups
+(same room and target) are gathered (see runGrading).
+"""
+
+class RunTimeout(BaseException) :
+    """
+    Raised in a program when its run exceeds the time allowed. It derives from
+    BaseException so that an 'except Exception' in the program does not catch it.
+    """
+    pass
+
+class BudgetExceeded(BaseException) :
+    """
+    Raised in a program when it sends more commands than allowed. It derives from
+    BaseException so that an 'except Exception' in the program does not catch it.
+    """
+    pass
+
+_HANDLERS = tuple(getattr(ast, name) for name in ("Try", "TryStar", "With", "AsyncWith") if hasattr(ast, name))
+"""
+The statements that can catch an exception (a crash) and go on : a program that contains one is not captured.
+"""
+
+class ProgramDependent(BaseException) :
+    """
+    Raised in a program being captured when it reads the state of the drone : its commands
+    depend on the flight, it cannot be captured as a mission.
+    """
+    pass
+
+class GradingSimulation(Simulation) :
+    """
+    A simulation whose room, target and start position are fixed by a scenario :
+    the creation commands of the program are ignored, the drone is always a
+    DroneVirtual with a ViewerRecord, and the commands are counted.
+    """
+
+    def __init__(self, scenario:dict, budget:int=1000):
+        super().__init__(verbose=False, sweptDetection=scenario.get("sweptDetection", False))
+        self.scenario = scenario # the scenario of the run
+        self.budget = budget # the maximum number of commands
+        self.commands = 0 # the number of commands sent
+        self.pathLength = 0.0 # the length of the flight (in cm)
+        self.reached = False # True if the target has been detected at least once
+        super().createRoom(scenario["room"], scenario.get("height", 250), scenario.get("obstacles"))
+        if scenario.get("target") is not None :
+            self.target = Position(*scenario["target"])
+        if scenario.get("targets") is not None :
+            self.targets = TargetSet(scenario["targets"])
+        if scenario.get("coverage") is not None :
+            super().createCoverage(scenario["coverage"])
+        self._last = Position()
+
+    def createRoom(self, description:str|tuple, height:int, obstacles:list=None) :
+        pass
+
+    def createTarget(self) :
+        pass
+
+    def createTargetIn(self, x1:float, y1:float, z1:float, x2:float, y2:float, z2:float) :
+        pass
+
+    def createTargets(self, targets, seed=None) :
+        pass
+
+    def createCoverage(self, resolution:float=5) :
+        pass
+
+    def createDrone(self, droneId:str, viewerId:str, progfunc=None) :
+        super().createDrone(DRONE_VIRTUAL, VIEWER_RECORD)
+        if progfunc is not None :
+            progfunc()
+
+    def _run(self, command, *args) :
+        """
+        Run a command of the drone, after checking the command budget.
+        :param command: the command (a method of Simulation)
+        :param args: the arguments of the command
+        """
+        self.commands += 1
+        if self.commands > self.budget :
+            raise BudgetExceeded("Command budget exceeded ({} commands)".format(self.budget))
+        try :
+            command(*args)
+        finally :
+            p = self.drone.getCurrentPosition()
+            self.pathLength += self._last.distance(p)
+            self._last.setCoord(p.x, p.y, p.z, p.heading)
+            self.reached = self.reached or self.drone.detected
+
+    def locate(self, x, y, heading) :
+        if self.scenario.get("start") is not None :
+            x, y, heading = self.scenario["start"]
+        # the length is measured from the start pose, if the drone accepts it (on the ground)
+        located = self.drone is not None and self.drone.getState() == DroneState.ONGROUND
+        self._run(super().locate, x, y, heading)
+        if located :
+            self._last.setCoord(x, y, 0, self.drone.getHeading())
+            self.pathLength = 0.0
+
+    def takeOff(self) :
+        self._run(super().takeOff)
+
+    def land(self) :
+        self._run(super().land)
+
+    def forward(self, n:int) :
+        self._run(super().forward, n)
+
+    def backward(self, n:int) :
+        self._run(super().backward, n)
+
+    def goUp(self, n:int) :
+        self._run(super().goUp, n)
+
+    def goDown(self, n:int) :
+        self._run(super().goDown, n)
+
+    def goLeft(self, n:int) :
+        self._run(super().goLeft, n)
+
+    def goRight(self, n:int) :
+        self._run(super().goRight, n)
+
+    def rotateLeft(self, n:int) :
+        self._run(super().rotateLeft, n)
+
+    def rotateRight(self, n:int) :
+        self._run(super().rotateRight, n)
+
+class CaptureSimulation(Simulation) :
+    """
+    A simulation that records the commands of a program in a Mission without flying them :
+    the creation commands are ignored, and reading the state of the drone (isTargetDetected,
+    getPosition...) stops the capture, as the next commands could depend on the flight.
+    """
+
+    def __init__(self, budget:int=1000):
+        super().__init__(verbose=False)
+        self.budget = budget # the maximum number of commands
+        self.mission = Mission() # the captured commands
+        self.created = False # True once the program has created its drone
+
+    def _append(self, ctype:CommandType, n:int=-1) :
+        if not self.created :
+            raise Exception("No drone created")
+        if self.mission.start is None and ctype != CommandType.CMD_LOCATE :
+            # the drone is in no room : the run fails when it moves
+            raise Exception("The drone is not located")
+        if int(n) != n :
+            raise ProgramDependent("Non integer amount")
+        self.mission.append(ctype, int(n))
+        if len(self.mission) > self.budget :
+            raise BudgetExceeded("Command budget exceeded ({} commands)".format(self.budget))
+
+    def _read(self, *args) :
+        raise ProgramDependent("The program reads the state of the drone")
+
+    def createRoom(self, description:str|tuple, height:int, obstacles:list=None) :
+        pass
+
+    def createTarget(self) :
+        pass
+
+    def createTargetIn(self, x1:float, y1:float, z1:float, x2:float, y2:float, z2:float) :
+        pass
+
+    def createTargets(self, targets, seed=None) :
+        pass
+
+    def createCoverage(self, resolution:float=5) :
+        pass
+
+    def createDrone(self, droneId:str, viewerId:str, progfunc=None) :
+        self.created = True
+        if progfunc is not None :
+            progfunc()
+
+    def locate(self, x, y, heading) :
+        if self.mission.start is not None and self.mission.start != (x, y, heading) :
+            raise ProgramDependent("Several start positions")
+        self.mission.start = (x, y, heading)
+        self._append(CommandType.CMD_LOCATE)
+
+    def takeOff(self) :
+        self._append(CommandType.CMD_TAKEOFF)
+
+    def land(self) :
+        self._append(CommandType.CMD_LAND)
+
+    def forward(self, n:int) :
+        self._append(CommandType.CMD_FORWARD, n)
+
+    def backward(self, n:int) :
+        self._append(CommandType.CMD_BACKWARD, n)
+
+    def goUp(self, n:int) :
+        self._append(CommandType.CMD_GOUP, n)
+
+    def goDown(self, n:int) :
+        self._append(CommandType.CMD_GODOWN, n)
+
+    def goLeft(self, n:int) :
+        self._append(CommandType.CMD_GOLEFT, n)
+
+    def goRight(self, n:int) :
+        self._append(CommandType.CMD_GORIGHT, n)
+
+    def rotateLeft(self, n:int) :
+        self._append(CommandType.CMD_ROTATELEFT, n)
+
+    def rotateRight(self, n:int) :
+        self._append(CommandType.CMD_ROTATERIGHT, n)
+
+    isTargetDetected = getPosition = getHeight = getHeading = getNewTargets = _read
+    countDetectedTargets = getCoverage = getMissionTime = _read
+
+@lru_cache(maxsize=64)
+def _compileProgram(path:str, mtime:float) :
+    """
+    Compile a program once per worker process (the modification time is part of the key).
+    """
+    with open(path, encoding="utf-8") as f :
+        return compile(f.read(), path, "exec")
+
+def _onTimeout(signum, frame) :
+    raise RunTimeout("Time limit exceeded")
+
+def _number(v:float) -> int|float :
+    """
+    A coordinate as written in the results : an integer if it has no fractional part (the same
+    in both modes, whether the position comes from a DroneVirtual or from the batch engine).
+    """
+    v = float(v)
+    return int(v) if v.is_integer() else v
+
+def gradeRun(program:str, scenarioId, scenario:dict, timeout:float=10.0, budget:int=1000) -> dict :
+    """
+    Run one program on one scenario, in the current process.
+    :param program: the path of the program
+    :param scenarioId: the identifier of the scenario (reported in the result)
+    :param scenario: the scenario (keys 'room', 'height', and optionally 'obstacles', 'target', 'targets', 'start',
+                     'sweptDetection' and 'coverage', the resolution of the coverage grid in cm)
+    :param timeout: the time allowed for the run (in seconds, only on platforms with SIGALRM)
+    :param budget: the maximum number of commands
+    :return: the result of the run, as a dictionary
+    """
+    sim = GradingSimulation(scenario, budget)
+    dronecmds.setSimulation(sim)
+    status = "ok"
+    error = None
+    useAlarm = timeout is not None and timeout > 0 and hasattr(signal, "SIGALRM")
+    start = time.perf_counter()
+    try :
+        code = _compileProgram(program, os.path.getmtime(program))
+        if useAlarm :
+            signal.signal(signal.SIGALRM, _onTimeout)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()) :
+            exec(code, {"__name__": "__main__", "__file__": program})
+    except RunTimeout as err :
+        status, error = "timeout", str(err)
+    except BudgetExceeded as err :
+        status, error = "budget", str(err)
+    except SystemExit as err :
+        # sys.exit() or exit() in the program : the run stops, not the worker
+        status, error = "exit", "Program exited (code {})".format(err.code)
+    except BaseException as err :
+        status, error = "error", str(err) or type(err).__name__
+    finally :
+        if useAlarm :
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    duration = time.perf_counter() - start
+    drone = sim.drone
+    crashed = drone is not None and drone.getState() == DroneState.KO
+    if crashed and status in ("ok", "error", "exit") :
+        status = "crash"
+    result = {"program": pathlib.Path(program).name, "scenario": scenarioId, "status": status,
+              "reached": sim.reached, "crashed": crashed, "commands": sim.commands,
+              "pathLength": round(sim.pathLength, 1), "duration": round(duration, 6), "error": error}
+    if sim.targets is not None :
+        result["targets"] = sim.targets.countDetected()
+    if sim.coverage is not None :
+        result["coverage"] = round(sim.coverage.getCoverage(), 2)
+        result["revisits"] = sim.coverage.revisits
+    if drone is not None :
+        p = drone.getCurrentPosition()
+        result["final"] = {"x": _number(p.x), "y": _number(p.y), "z": _number(p.z), "heading": round(p.heading*180/pi),
+                           "state": drone.getState().name, "result": drone.getCommand().result.name}
+    return result
+
+def captureProgram(program:str, timeout:float=10.0, budget:int=1000) -> Mission|None :
+    """
+    Capture the commands of a program as a mission, if they do not depend on the flight. A program
+    that can catch an exception (try, with) is not captured : the commands it sends after a crash
+    are not known. The program is run : the capture is done in a worker process (see runGrading).
+    :param program: the path of the program
+    :param timeout: the time allowed for the capture (in seconds, only on platforms with SIGALRM)
+    :param budget: the maximum number of commands (a longer program is captured up to budget+1 commands)
+    :return: the mission, or None if the program reads the state of the drone, catches exceptions,
+             raises an exception, exits or sends no command
+    """
+    try :
+        with open(program, encoding="utf-8") as f :
+            tree = ast.parse(f.read(), program)
+    except (OSError, SyntaxError, ValueError) :
+        return None
+    if any(isinstance(node, _HANDLERS) for node in ast.walk(tree)) :
+        return None
+    sim = CaptureSimulation(budget)
+    dronecmds.setSimulation(sim)
+    useAlarm = timeout is not None and timeout > 0 and hasattr(signal, "SIGALRM")
+    try :
+        code = _compileProgram(program, os.path.getmtime(program))
+        if useAlarm :
+            signal.signal(signal.SIGALRM, _onTimeout)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()) :
+            exec(code, {"__name__": "__main__", "__file__": program})
+    except BudgetExceeded :
+        pass
+    except BaseException :
+        # ProgramDependent, RunTimeout, an error, or sys.exit() in the program
+        return None
+    finally :
+        if useAlarm :
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return sim.mission if len(sim.mission) > 0 else None
+
+def isReplayable(scenario:dict) -> bool :
+    """
+    Determine if a scenario can be run by replaying a mission (the batch engine has no set of targets nor coverage).
+    """
+    return scenario.get("targets") is None and scenario.get("coverage") is None
+
+def _groupKey(scenario:dict) -> str :
+    """
+    Get the key of the group of a scenario : the scenarios with the same room and target are replayed together.
+    """
+    return json.dumps([scenario["room"], scenario.get("height", 250), scenario.get("obstacles"),
+                       scenario.get("target"), scenario.get("sweptDetection", False)])
+
+def gradeMission(program:str, mission:Mission, scenarios:list[tuple], timeout:float=10.0, budget:int=1000) -> list[dict] :
+    """
+    Grade a captured program on scenarios, by replaying its mission with the batch engine : the
+    scenarios with the same room and target are replayed together, from their start positions
+    (the groups of less than MISSION_BATCH scenarios are run by gradeRun). The results are the
+    ones of gradeRun.
+    :param program: the path of the program
+    :param mission: the mission captured from the program (see captureProgram)
+    :param scenarios: the scenarios, as (identifier, scenario) pairs (see isReplayable)
+    :param timeout: the time allowed for a run by gradeRun (in seconds)
+    :param budget: the maximum number of commands
+    :return: the results of the runs, in the order of the scenarios
+    """
+    groups = {}
+    for k, (sid, scenario) in enumerate(scenarios) :
+        groups.setdefault(_groupKey(scenario), []).append((k, sid, scenario))
+    results = [None] * len(scenarios)
+    over = len(mission) > budget
+    last = COMMAND_CODES[mission.opcodes[min(len(mission), budget) - 1]] if len(mission) > 0 else None
+    for group in groups.values() :
+        if len(group) < MISSION_BATCH :
+            for k, sid, scenario in group :
+                results[k] = gradeRun(program, sid, scenario, timeout, budget)
+            continue
+        start = time.perf_counter()
+        first = group[0][2]
+        room = RoomShp(first["room"], first.get("height", 250), obstacles=first.get("obstacles"))
+        target = Position(*first["target"]) if first.get("target") is not None else None
+        x, y, heading = np.array([s.get("start") or mission.start or (0, 0, 0) for _, _, s in group], dtype=np.float64).T
+        replay = mission.replay(room, x, y, heading, target, first.get("sweptDetection", False), count=budget)
+        duration = (time.perf_counter() - start) / len(group)
+        batch = replay.batch
+        for i, (k, sid, scenario) in enumerate(group) :
+            crashed = bool(batch.state[i] == DroneState.KO.value)
+            commands = int(replay.commands[i])
+            status, error = "ok", None
+            if crashed :
+                status = "crash"
+                stop = COMMAND_CODES[mission.opcodes[commands - 1]]
+                if stop not in (CommandType.CMD_GOUP, CommandType.CMD_TAKEOFF) :
+                    error = "Crash ! drone hits a wall"
+                elif batch.z[i] < room.getHeight() :
+                    error = "Crash ! drone hits an obstacle"
+                else :
+                    error = "Crash ! drone hits room ceiling"
+            elif over :
+                status, error = "budget", "Command budget exceeded ({} commands)".format(budget)
+                commands = budget + 1
+            result = {"program": pathlib.Path(program).name, "scenario": sid, "status": status,
+                      "reached": bool(replay.reached[i]), "crashed": crashed, "commands": commands,
+                      "pathLength": round(float(replay.pathLength[i]), 1), "duration": round(duration, 6), "error": error}
+            if last is not None :
+                result["final"] = {"x": _number(batch.x[i]), "y": _number(batch.y[i]), "z": _number(batch.z[i]),
+                                   "heading": round(float(batch.heading[i])*180/pi), "state": DroneState(int(batch.state[i])).name,
+                                   "result": replay.getResult(i).name}
+            results[k] = result
+    return results
+
+def _drawTarget(i:int, scenario:dict) -> dict :
+    """
+    Draw the target of a scenario given as a cuboid ('targetIn': [x1, y1, z1, x2, y2, z2]), with
+    the seed of the scenario ('seed', by default its index i) : every program is graded against
+    the same target, from one grading to another.
+    """
+    if scenario.get("target") is None and scenario.get("targetIn") is not None :
+        x1, y1, z1, x2, y2, z2 = scenario["targetIn"]
+        room = RoomShp(scenario["room"], scenario.get("height", 250), obstacles=scenario.get("obstacles"))
+        x, y, z = room.getRandomPositions(1, scenario.get("seed", i), Position(x1, y1, z1), Position(x2, y2, z2))
+        scenario["target"] = [float(x[0]), float(y[0]), float(z[0])]
+    return scenario
+
+class ScenarioStream :
+    """
+    The scenarios of a JSONL corpus, read lazily each time they are iterated (see Corpus),
+    with their targets drawn as by loadScenarios. A target given as a cuboid is drawn at the
+    first reading only : the next readings (one per program) reuse it.
+    """
+
+    def __init__(self, filename:str):
+        self.corpus = Corpus(filename)
+        self._targets = {} # the targets drawn in a cuboid, by index of their scenario
+
+    def __iter__(self):
+        for i, scenario in enumerate(self.corpus) :
+            if i in self._targets :
+                scenario["target"] = self._targets[i]
+            elif scenario.get("target") is None and scenario.get("targetIn") is not None :
+                self._targets[i] = _drawTarget(i, scenario)["target"]
+            yield scenario
+
+def loadScenarios(filename:str) -> list[dict]|ScenarioStream :
+    """
+    Load the scenarios from a JSON file (a list of scenarios), or from a JSONL corpus (one
+    scenario per line), which is streamed instead of being loaded. A target given as a cuboid
+    is drawn here, with the seed of the scenario (see _drawTarget).
+    :param filename: the JSON or JSONL file
+    :return: the scenarios
+    """
+    if filename.endswith(".jsonl") :
+        return ScenarioStream(filename)
+    with open(filename, encoding="utf-8") as f :
+        scenarios = json.load(f)
+    return [_drawTarget(i, scenario) for i, scenario in enumerate(scenarios)]
+
+def runGrading(programs:list[str], scenarios:list[dict]|ScenarioStream, output, workers:int=None,
+               timeout:float=10.0, budget:int=1000, compiled:bool=False, cache:ResultCache=None) -> int :
+    """
+    Run every program on every scenario in a pool of processes, and write each
+    result as soon as it is known. With compiled, the programs that do not read the
+    state of the drone are captured once and replayed (see gradeMission) : the
+    scenarios are gathered by room and target, and a program is captured (in the
+    pool, without waiting) only when one of its groups has MISSION_BATCH scenarios. With a
+    cache, the results already known are written at once (with 'cached': true), and
+    the new results are stored (except the timeouts, which depend on the load).
+    The results depend on the budget and on the compiled mode : they must be in the context of the cache.
+    :param programs: the paths of the programs
+    :param scenarios: the scenarios (a list, or any iterable read once per program, see ScenarioStream)
+    :param output: a text file where the JSONL results are written
+    :param workers: the number of worker processes (default : number of CPUs)
+    :param timeout: the time allowed for one run (in seconds)
+    :param budget: the maximum number of commands for one run
+    :param compiled: true to replay the programs that can be captured as missions
+    :param cache: the cache of the results, if any
+    :return: the number of runs
+    """
+    workers = workers or os.cpu_count() or 1
+    # one replay task per slice of a group of scenarios, to share them between the workers
+    size = MISSION_CHUNK
+    if isinstance(scenarios, list) :
+        size = min(size, max(MISSION_BATCH, -(-len(scenarios) // workers)))
+    count = 0
+    tasks = {} # the program of each task, and the identifiers and cache keys of its scenarios
+    captures = {} # the capture task of each program, and the slices of scenarios waiting for its mission
+    missions = {} # the mission of each captured program (None if it cannot be replayed)
+    calls = {} # the function and the arguments of each task, to run it again if it is lost with its pool
+    pending = set()
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try :
+
+        def start(function, args:tuple) :
+            # a worker killed by a program breaks the pool (and its tasks) : a new pool is started
+            nonlocal pool
+            try :
+                task = pool.submit(function, *args)
+            except BrokenProcessPool :
+                pool.shutdown(wait=False)
+                pool = ProcessPoolExecutor(max_workers=workers)
+                task = pool.submit(function, *args)
+            calls[task] = (function, args)
+            pending.add(task)
+            return task
+
+        def submit(name:str, keys:list, function, *args) :
+            tasks[start(function, args)] = (name, keys)
+
+        def replay(program:str, chunk:list) :
+            # the slice (identifier, scenario, key) of a group is replayed, or run if the program is not a mission
+            name = pathlib.Path(program).name
+            mission = missions[program]
+            if mission is not None :
+                submit(name, [(sid, key) for sid, _, key in chunk],
+                       gradeMission, program, mission, [(sid, s) for sid, s, _ in chunk], timeout, budget)
+            else :
+                for sid, scenario, key in chunk :
+                    submit(name, [(sid, key)], gradeRun, program, sid, scenario, timeout, budget)
+
+        def drain(limit:int) :
+            # wait for tasks until less than limit are in flight : a finished capture releases its slices
+            nonlocal count
+            while len(pending) >= max(limit, 1) :
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                pending.difference_update(done)
+                finished = []
+                for f in done :
+                    function, args = calls.pop(f)
+                    if isinstance(f.exception(), BrokenProcessPool) :
+                        # lost with its pool, maybe killed by another program : run again alone
+                        task = _runAlone(function, args)
+                        if f in captures :
+                            captures[task] = captures.pop(f)
+                        else :
+                            tasks[task] = tasks.pop(f)
+                        f = task
+                    if f in captures :
+                        program, waiting = captures.pop(f)
+                        try :
+                            missions[program] = f.result()
+                        except BaseException :
+                            missions[program] = None
+                        for chunk in waiting :
+                            replay(program, chunk)
+                    else :
+                        finished.append(f)
+                count += _writeResults(finished, output, cache, tasks)
+
+        for program in programs :
+            name = pathlib.Path(program).name
+            programHash = hashFile(program) if cache is not None else None
+            groups = {} # the scenarios to replay, by room and target
+            buffered = 0
+            replayed = set() # the groups already sent to a replay
+
+            def flush(group:str, chunk:list) :
+                # the capture is done only once a group is large enough, in the pool and without waiting for it
+                if len(chunk) < MISSION_BATCH and group not in replayed :
+                    for sid, scenario, key in chunk :
+                        submit(name, [(sid, key)], gradeRun, program, sid, scenario, timeout, budget)
+                        drain(4*workers)
+                    return
+                replayed.add(group)
+                if program in missions :
+                    replay(program, chunk)
+                    return
+                waiting = next((w for p, w in captures.values() if p == program), None)
+                if waiting is None :
+                    waiting = []
+                    captures[start(captureProgram, (program, timeout, budget))] = (program, waiting)
+                waiting.append(chunk)
+
+            for i, scenario in enumerate(scenarios) :
+                sid = scenario.get("name", i)
+                key = None
+                if cache is not None :
+                    key = cache.key(programHash, hashJSON({k: v for k, v in scenario.items() if k != "name"}))
+                    result = cache.get(key)
+                    if result is not None :
+                        result.update(program=name, scenario=sid, cached=True)
+                        output.write(json.dumps(result)+"\n")
+                        count += 1
+                        continue
+                if compiled and isReplayable(scenario) :
+                    group = _groupKey(scenario)
+                    chunk = groups.setdefault(group, [])
+                    chunk.append((sid, scenario, key))
+                    buffered += 1
+                    if len(chunk) >= size :
+                        flush(group, groups.pop(group))
+                        buffered -= len(chunk)
+                    elif buffered >= MISSION_CHUNK :
+                        # too many scenarios held back (the groups are not contiguous in the stream)
+                        for group, chunk in groups.items() :
+                            flush(group, chunk)
+                        groups, buffered = {}, 0
+                else :
+                    submit(name, [(sid, key)], gradeRun, program, sid, scenario, timeout, budget)
+                # Keep a bounded number of runs in flight (the scenarios are read as they are needed)
+                drain(4*workers)
+            for group, chunk in groups.items() :
+                flush(group, chunk)
+        drain(0)
+    finally :
+        pool.shutdown()
+    output.flush()
+    return count
+
+def _runAlone(function, args:tuple) :
+    """
+    Run a task alone in a new process, and wait for it : a task lost when a worker was killed
+    is run again this way, so that only the task that kills its process fails.
+    :return: the finished task (a Future)
+    """
+    with ProcessPoolExecutor(max_workers=1) as pool :
+        task = pool.submit(function, *args)
+        wait([task])
+    return task
+
+def _writeResults(futures, output, cache:ResultCache=None, tasks:dict=None) -> int :
+    """
+    Write the results of finished tasks. A task that failed (a worker killed by the program...)
+    gives an error result for each of its scenarios, which is not cached.
+    :param tasks: the program of each task, and the identifiers and cache keys of its scenarios
+    """
+    count = 0
+    for f in futures :
+        name, scenarios = tasks.pop(f)
+        try :
+            results = f.result()
+            results = results if isinstance(results, list) else [results]
+        except BaseException as err :
+            error = "Grading failed : {}".format(str(err) or type(err).__name__)
+            results = [{"program": name, "scenario": sid, "status": "error", "reached": False, "crashed": False,
+                        "commands": 0, "pathLength": 0.0, "duration": 0.0, "error": error} for sid, _ in scenarios]
+            scenarios = [(sid, None) for sid, _ in scenarios]
+        for result, (sid, key) in zip(results, scenarios) :
+            output.write(json.dumps(result)+"\n")
+            if cache is not None and key is not None and result["status"] != "timeout" :
+                cache.put(key, result)
+            count += 1
+    output.flush()
+    return count
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Grade drone programs against a set of scenarios.")
+    parser.add_argument("programs", help="the directory of the programs (*.py)")
+    parser.add_argument("scenarios", help="the JSON file (or the JSONL corpus) of the scenarios")
+    parser.add_argument("-o", "--output", help="the JSONL result file (default : standard output)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="the number of worker processes")
+    parser.add_argument("-t", "--timeout", type=float, default=10.0, help="the time allowed for one run (s)")
+    parser.add_argument("-b", "--budget", type=int, default=1000, help="the maximum number of commands for one run")
+    parser.add_argument("-c", "--compiled", action="store_true",
+                        help="capture the programs that do not read the drone state once, and replay them with the batch engine")
+    parser.add_argument("--cache", help="the SQLite file of the result cache (the unchanged runs are not run again)")
+    parser.add_argument("--cache-size", type=float, default=256, help="the maximum size of the result cache (MB)")
+    args = parser.parse_args()
+    programs = sorted(str(p) for p in pathlib.Path(args.programs).glob("*.py"))
+    scenarios = loadScenarios(args.scenarios)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    cache = ResultCache(args.cache, int(args.cache_size*1e6), {"budget": args.budget, "compiled": args.compiled}) if args.cache else None
+    try :
+        start = time.perf_counter()
+        n = runGrading(programs, scenarios, out, args.workers, args.timeout, args.budget, args.compiled, cache)
+        print("{} runs in {:.2f} s".format(n, time.perf_counter()-start), file=sys.stderr)
+        if cache is not None :
+            print(cache, file=sys.stderr)
+    finally :
+        if out is not sys.stdout :
+            out.close()
+        if cache is not None :
+            cache.close()
@@ -29,6 +29,14 @@ class Arrow3D(FancyArrowPatch):
         self._xyz = (x, y, z)
         self._dxdydz = (dx, dy, dz)
 
+    def set_data_3d(self, x, y, z, dx, dy, dz):
+        """
+        Move the arrow (to reuse the same artist).
+        """
+        self._xyz = (x, y, z)
+        self._dxdydz = (dx, dy, dz)
+        self.stale = True
+
     def draw(self, renderer):
         x1, y1, z1 = self._xyz
         dx, dy, dz = self._dxdydz
@@ -45,15 +53,204 @@ class Arrow3D(FancyArrowPatch):
         self.set_positions((xs[0], ys[0]), (xs[1], ys[1]))
         return np.min(zs)
 
+def _joined(lines) -> tuple[list, list, list] :
+    """
+    Join lines given as (xs, ys, zs) into one line, separated by NaN values (one artist for all of them).
+    """
+    x, y, z = [], [], []
+    for lx, ly, lz in lines :
+        if x :
+            x.append(float("nan"))
+            y.append(float("nan"))
+            z.append(float("nan"))
+        x.extend(lx)
+        y.extend(ly)
+        z.extend(lz)
+    return x, y, z
+
+class SceneArtists :
+    """
+    The static scene of a room in an `Axes3D` instance, built once : one line for the walls
+    on the floor, one for the walls under the ceiling, one for all the obstacles, and the target
+    with its guides (its projections on the floor and on the walls x=0 and y=0). The target is
+    moved in place (see setTarget) : the scene is never rebuilt.
+    """
+
+    def __init__(self, ax, floor, ceiling=None, obstacles=(), target=None, guides:bool=True):
+        """
+        :param floor: the walls on the floor (xs, ys, zs), as given by getWalls2D
+        :param ceiling: the walls under the ceiling (xs, ys, zs), if drawn
+        :param obstacles: the edges (xs, ys, zs) of the obstacles, as given by getEdges3D
+        :param target: the target (a Position), if any
+        :param guides: true to draw the projections of the target
+        """
+        self.ax = ax
+        self.guides = guides
+        self.walls, = ax.plot(*floor, color=(.8, .4, .4), linewidth=5)
+        self.ceiling = None if ceiling is None else ax.plot(*ceiling, color=(.8, .4, .4), linewidth=4)[0]
+        self.obstacles, = ax.plot(*_joined(obstacles), color=(.5, .4, .4), linewidth=2)
+        self.target, = ax.plot([], [], [], linestyle="", marker="D", markersize=9, color=(.4, .2, .8), markeredgecolor='red')
+        self.drop, = ax.plot([], [], [], color='red', linestyle="--", linewidth=1)
+        self.projections, = ax.plot([], [], [], color=(.8, .8, .8), linestyle="--", linewidth=1)
+        self.shadows, = ax.plot([], [], [], linestyle="", marker="D", markersize=9, color=(.8, .8, .8))
+        self.position = None # the target drawn
+        self.setTarget(target)
+
+    def setTarget(self, target) :
+        """
+        Move the target (and its guides), or hide it if None.
+        """
+        self.position = target
+        if target is None :
+            for line in (self.target, self.drop, self.projections, self.shadows) :
+                line.set_data_3d(np.empty(0), np.empty(0), np.empty(0))
+            return
+        x, y, z = target.x, target.y, target.z
+        self.target.set_data_3d(np.array([x]), np.array([y]), np.array([z]))
+        self.drop.set_data_3d(np.array([x, x]), np.array([y, y]), np.array([z, 0]))
+        if self.guides :
+            nan = float("nan")
+            self.projections.set_data_3d(np.array([0, 0, nan, x, x]), np.array([y, y, nan, 0, 0]), np.array([z, 0, nan, z, 0]))
+            self.shadows.set_data_3d(np.array([0, x]), np.array([y, 0]), np.array([z, z]))
+
+class BlitLayer :
+    """
+    The dynamic layer of a figure, drawn over a cached background : each full draw of the
+    figure (first display, resize, rotation of the view...) saves the static part as a
+    bitmap, then update() only restores it and draws the dynamic artists (blitting).
+    """
+
+    def __init__(self, canvas, artists:list):
+        """
+        :param canvas: the canvas of the figure
+        :param artists: the dynamic artists (the list may grow, the new artists must be animated)
+        """
+        self.canvas = canvas
+        self.artists = artists
+        self.background = None # the static part of the figure, saved by the last full draw
+        for a in artists :
+            a.set_animated(True)
+        self._cid = canvas.mpl_connect("draw_event", self._onDraw)
+
+    def _onDraw(self, event) :
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._drawArtists()
+
+    def _drawArtists(self) :
+        figure = self.canvas.figure
+        for a in self.artists :
+            figure.draw_artist(a)
+
+    def invalidate(self) :
+        """
+        Forget the background, after a change of the static part : the next update draws the whole figure.
+        """
+        self.background = None
+
+    def update(self) :
+        """
+        Draw the dynamic artists over the background (the whole figure if there is no background yet).
+        """
+        if self.background is None :
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self._drawArtists()
+        self.canvas.blit(self.canvas.figure.bbox)
+
+    def disconnect(self) :
+        self.canvas.mpl_disconnect(self._cid)
+
+class FlightArtists :
+    """
+    The artists of a flight in an `Axes3D` instance, updated in place : one line for
+    the trajectory, one line for the vertical segments from the drone to the ground
+    (separated by NaN values), and one arrow for the drone. The number of artists
+    does not grow with the length of the flight, so the time to draw a frame stays flat.
+    With animated, the artists are only drawn by a BlitLayer over the static scene.
+    """
+
+    def __init__(self, ax, mutation_scale=15, animated:bool=False):
+        self.ax = ax
+        self.animated = animated
+        self.xs, self.ys, self.zs = [], [], [] # the points of the trajectory
+        self.gx, self.gy, self.gz = [], [], [] # the vertical segments to the ground
+        self.trajectory, = ax.plot([], [], [], color=(.2, .5, .2), alpha=0.8, linestyle="--", linewidth=2)
+        self.ground, = ax.plot([], [], [], color=(.8, .8, .8), linewidth=1)
+        self.marker = Arrow3D(0, 0, 0, 0, 0, 0, mutation_scale=mutation_scale, ec='green', fc=(.2, .7, .2))
+        self.marker.set_visible(False)
+        ax.add_artist(self.marker)
+        self.artists = [self.ground, self.trajectory, self.marker] # the artists of the flight (for a BlitLayer)
+        self._crash = [] # the artists of the crash, if any
+        for a in self.artists :
+            a.set_animated(animated)
+
+    def reset(self):
+        """
+        Forget the flight (to draw a new one in the same axes).
+        """
+        self.xs, self.ys, self.zs = [], [], []
+        self.gx, self.gy, self.gz = [], [], []
+        self.trajectory.set_data_3d(np.empty(0), np.empty(0), np.empty(0))
+        self.ground.set_data_3d(np.empty(0), np.empty(0), np.empty(0))
+        self.marker.set_visible(False)
+        for a in self._crash :
+            a.remove()
+            self.artists.remove(a)
+        self._crash = []
+
+    def update(self, p1, p2, crashed:bool=False):
+        """
+        Add the last movement of the drone, from position p1 to position p2.
+        :param crashed: True if the drone is KO (the arrow is hidden, and a cross is drawn)
+        """
+        nan = float("nan")
+        if not self.xs or (self.xs[-1], self.ys[-1], self.zs[-1]) != (p1.x, p1.y, p1.z) :
+            if self.xs :
+                self.xs.append(nan)
+                self.ys.append(nan)
+                self.zs.append(nan)
+            self.xs.append(p1.x)
+            self.ys.append(p1.y)
+            self.zs.append(p1.z)
+        self.xs.append(p2.x)
+        self.ys.append(p2.y)
+        self.zs.append(p2.z)
+        self.trajectory.set_data_3d(np.array(self.xs), np.array(self.ys), np.array(self.zs))
+        if p1.x != p2.x or p1.y != p2.y :
+            self.gx += [p2.x, p2.x, nan]
+            self.gy += [p2.y, p2.y, nan]
+            self.gz += [p2.z, 0, nan]
+            self.ground.set_data_3d(np.array(self.gx), np.array(self.gy), np.array(self.gz))
+        if not crashed :
+            dx = 50.0 * np.cos(p2.heading)
+            dy = 50.0 * np.sin(p2.heading)
+            self.marker.set_data_3d(p2.x - dx / 2, p2.y - dy / 2, p2.z, dx, dy, 0)
+            self.marker.set_visible(True)
+        else :
+            self.marker.set_visible(False)
+            cross, = self.ax.plot([p2.x], [p2.y], [p2.z], linestyle="", marker="X", markersize=9, color=(.9, .4, .3))
+            label = self.ax.annotate3D('Crash !', (p2.x, p2.y, p2.z),
+                                       xytext=(30, -30),
+                                       textcoords='offset points',
+                                       bbox=dict(boxstyle="round", fc="tomato"),
+                                       arrowprops=dict(arrowstyle="-|>", ec='tomato', fc='black', lw=5))
+            for a in (cross, label) :
+                a.set_animated(self.animated)
+                self.artists.append(a)
+                self._crash.append(a)
+
 def _annotate3D(ax, text, xyz, *args, **kwargs):
     """Add anotation `text` to an `Axes3d` instance."""
     annotation = Annotation3D(text, xyz, *args, **kwargs)
     ax.add_artist(annotation)
+    return annotation
 
 def _arrow3D(ax, x, y, z, dx, dy, dz, *args, **kwargs):
     """Add an 3d arrow to an `Axes3D` instance."""
     arrow = Arrow3D(x, y, z, dx, dy, dz, *args, **kwargs)
     ax.add_artist(arrow)
+    return arrow
 
 setattr(Axes3D, 'annotate3D', _annotate3D)
 setattr(Axes3D, 'arrow3D', _arrow3D)
\ No newline at end of file
@@ -0,0 +1,291 @@
+"""
+Contexte de simulation : une pièce, une cible, un drone et sa visualisation.
+Chaque objet Simulation est indépendant des autres, ce qui permet de faire
+vivre plusieurs simulations dans un même interpréteur. Le module dronecmds
+n'est qu'une façade procédurale sur une simulation par défaut.
+Les vues graphiques (matplotlib, tkinter, PIL) ne sont importées que lorsqu'un
+drone est créé avec l'une d'elles : une exécution sans visualisation ne les
+charge jamais.
+"""
+
+import numpy as np
+from dronecore.roomshply import RoomShp
+from dronecore.dronevirt import *
+from dronecore.dronephys import DronePhysics
+from dronecore.trajectory import TrajectoryRecorder
+from dronecore.targets import TargetSet
+from dronecore.coverage import CoverageGrid
+
+#################
+#   Constantes  #
+#################
+
+DRONE_VIRTUAL = "DroneVirtual"
+"""
+Constante qui identifie un drone virtuel (simulé) associé à la classe DroneVirtual.
+"""
+
+DRONE_PHYSICS = "DronePhysics"
+"""
+Constante qui identifie un drone virtuel dont les déplacements prennent du temps
+(vitesse, accélération, vitesse de rotation), associé à la classe DronePhysics.
+"""
+
+DRONE_TELLO = "DroneTello"
+"""
+Constante qui identifie un drone réel de type Tello Edu, associé à la classe DroneTello.
+"""
+
+VIEWER_CONSOLE = "ViewerConsole"
+"""
+Constante qui identifie une vue associée à la classe ViewerConsole.
+"""
+
+VIEWER_BASICMPL = "ViewerBasicMPL"
+"""
+Constante qui identifie une vue associée à la classe ViewerChartDir.
+"""
+
+VIEWER_TKMPL = "ViewerTkMPL"
+"""
+Constante qui identifie une vue associée à la classe ViewerTkMPL.
+"""
+
+VIEWER_NONE = "ViewerNone"
+"""
+Constante qui identifie une exécution sans visualisation (ni pause), associée à la classe ViewerNone.
+"""
+
+VIEWER_RECORD = "ViewerRecord"
+"""
+Constante qui identifie une exécution sans visualisation qui enregistre la trajectoire
+en mémoire, associée à la classe ViewerRecord.
+"""
+
+class Simulation :
+    """
+    A drone simulation : the room to explore, the target, the drone and its viewer.
+    The methods are the commands of the dronecmds module.
+    """
+
+    def __init__(self, verbose:bool=True, record:bool=False, sweptDetection:bool=False, seed=None):
+        self.room:ARoom|None = None # the room to explore
+        self.target:Position|None = None # the target to detect in the room
+        self.targets:TargetSet|None = None # the set of targets to search in the room, if any
+        self.coverage:CoverageGrid|None = None # the coverage of the room by the drone, if measured
+        self.drone:ADrone|None = None # the drone to command
+        self.viewer:AViewer|None = None # the viewer used to display the simulation
+        self.verbose = verbose # True to print the room and the target when they are created
+        self.record = record # True to attach a TrajectoryRecorder to the drone when it is created
+        self.sweptDetection = sweptDetection # True to detect the targets along the whole moves of a virtual drone
+        self.rng:np.random.Generator|None = None # the random generator of the targets, if seeded (see setSeed)
+        if seed is not None :
+            self.setSeed(seed)
+
+    def display(self) :
+        self.drone.display()
+
+    def setSeed(self, seed) :
+        """
+        Seed the random positions of the targets (createTarget, createTargetIn, createTargets) :
+        the same seed gives the same targets.
+        :param seed: the seed (an int, or a numpy Generator), None to draw them at random again
+        """
+        self.rng = None if seed is None else np.random.default_rng(seed)
+
+    def createRoom(self, description:str|tuple, height:int, obstacles:list=None) :
+        """
+        Create the room to explore. Must be called first.
+        :param description: the outline of the room (sequence of points, in cm)
+        :param height: the height of the room (in cm)
+        :param obstacles: the obstacles in the room (Obstacle objects or tuples (xmin, ymin, xmax, ymax[, zmin, zmax]))
+        """
+        self.room=RoomShp(description, height, obstacles=obstacles)
+        if self.verbose :
+            print(self.room)
+
+    def _setTarget(self, target:Position) :
+        self.target=target
+        if self.drone is not None :
+            self.drone.target=target
+        if self.verbose :
+            print("Target : x={} y={} z={}".format(target.x, target.y, target.z))
+
+    def createTarget(self) :
+        """
+        Create the target at a random position in the room.
+        """
+        if self.rng is None :
+            self._setTarget(self.room.getRandomPosition())
+        else :
+            x, y, z = self.room.getRandomPositions(1, self.rng)
+            self._setTarget(Position(float(x[0]), float(y[0]), float(z[0])))
+
+    def createTargetIn(self, x1:float, y1:float, z1:float, x2:float, y2:float, z2:float) :
+        """
+        Create the target at a random position in the cuboid defined by (x1,y1,z1) and (x2,y2,z2).
+        """
+        if self.rng is None :
+            self._setTarget(self.room.getRandomPosition(Position(x1,y1,z1), Position(x2,y2,z2)))
+        else :
+            x, y, z = self.room.getRandomPositions(1, self.rng, Position(x1,y1,z1), Position(x2,y2,z2))
+            self._setTarget(Position(float(x[0]), float(y[0]), float(z[0])))
+
+    def createTargets(self, targets, seed=None) :
+        """
+        Create a set of targets to search in the room (in addition to the target).
+        :param targets: the number of targets, placed at random positions in the room,
+                        or their positions (a list of tuples (x, y, z))
+        :param seed: the seed of the random positions (None for the seed of the simulation, see setSeed)
+        """
+        if isinstance(targets, int) :
+            x, y, z = self.room.getRandomPositions(targets, self.rng if seed is None else seed)
+            targets = list(zip(x, y, z))
+        self.targets = TargetSet(targets)
+        if self.drone is not None :
+            self.drone.targets = self.targets
+        if self.verbose :
+            print("Targets : {}".format(len(self.targets)))
+
+    def createCoverage(self, resolution:float=5) :
+        """
+        Measure the coverage of the room by the moves of the virtual drone. Must be called after 'createRoom(...)'.
+        :param resolution: the size of the cells of the coverage grid (in cm)
+        """
+        radius = self.drone.radiusDetection if isinstance(self.drone, DroneVirtual) else 50
+        self.coverage = CoverageGrid(self.room, resolution, radius)
+        if isinstance(self.drone, DroneVirtual) :
+            self.drone.coverage = self.coverage
+
+    def createDrone(self, droneId:str, viewerId:str, progfunc=None) :
+        """
+        Create the drone and its viewer. Must be called after 'createRoom(...)'.
+        :param droneId: the drone to create (DRONE_VIRTUAL, DRONE_PHYSICS, or DRONE_TELLO for a real drone
+                        at the address DroneTello.HOST)
+        :param viewerId: the viewer (VIEWER_CONSOLE, VIEWER_BASICMPL, VIEWER_TKMPL, VIEWER_NONE or VIEWER_RECORD)
+        :param progfunc: the program to run in the VIEWER_TKMPL viewer, if any
+        """
+        if droneId == DRONE_VIRTUAL :
+            self.drone=DroneVirtual()
+            self.drone.target=self.target
+            self.drone.sweptDetection=self.sweptDetection
+            self.drone.coverage=self.coverage
+        elif droneId == DRONE_PHYSICS :
+            self.drone=DronePhysics()
+            self.drone.target=self.target
+            self.drone.sweptDetection=self.sweptDetection
+            self.drone.coverage=self.coverage
+        elif droneId == DRONE_TELLO :
+            from dronecore.dronetello import DroneTello
+            self.drone=DroneTello()
+            self.drone.target=self.target
+            self.drone.connect()
+        else :
+            raise Exception("Drone Identifier Unknown !")
+        if viewerId == VIEWER_CONSOLE :
+            self.viewer=ViewerConsole(self.drone, self.room, self.target)
+        elif viewerId == VIEWER_BASICMPL :
+            from viewermpl import ViewerBasicMPL
+            self.viewer = ViewerBasicMPL(self.drone, self.room, self.target)
+        elif viewerId == VIEWER_TKMPL:
+            from viewertk import ViewerTkMPL
+            self.viewer = ViewerTkMPL(self.drone, self.room, self.target, progfunc=progfunc, simulation=self)
+        elif viewerId == VIEWER_NONE :
+            self.viewer = ViewerNone(self.drone, self.room, self.target)
+        elif viewerId == VIEWER_RECORD :
+            self.viewer = ViewerRecord(self.drone, self.room, self.target)
+        else :
+            raise Exception("Viewer Identifier Unknown !")
+        self.drone.viewer=self.viewer
+        self.drone.targets=self.targets
+        if self.record and self.drone.recorder is None :
+            # VIEWER_RECORD has already attached its recorder
+            self.drone.recorder=TrajectoryRecorder()
+
+    def locate(self, x, y, heading) :
+        self.drone.locate(x, y, heading, self.room)
+        self.drone.display()
+
+    def takeOff(self) :
+        self.drone.takeOff()
+        self.drone.display()
+
+    def land(self) :
+        self.drone.land()
+        self.drone.display()
+
+    def forward(self, n:int) :
+        self.drone.forward(n)
+        self.drone.display()
+
+    def backward(self, n:int) :
+        self.drone.backward(n)
+        self.drone.display()
+
+    def goUp(self, n:int) :
+        self.drone.goUp(n)
+        self.drone.display()
+
+    def goDown(self, n:int) :
+        self.drone.goDown(n)
+        self.drone.display()
+
+    def goLeft(self, n:int) :
+        self.drone.goLeft(n)
+        self.drone.display()
+
+    def goRight(self, n:int) :
+        self.drone.goRight(n)
+        self.drone.display()
+
+    def rotateLeft(self, n:int) :
+        self.drone.rotateLeft(n)
+        self.drone.display()
+
+    def rotateRight(self, n:int) :
+        self.drone.rotateRight(n)
+        self.drone.display()
+
+    def isTargetDetected(self) -> bool :
+        return self.drone.isTargetDetected()
+
+    def getPosition(self) -> Position :
+        return self.drone.getCurrentPosition()
+
+    def getHeight(self) -> int :
+        return self.drone.getHeight()
+
+    def getHeading(self, unit:str="radian") -> float|int :
+        if unit=="radian" :
+            return self.drone.getHeading()
+        else :
+            return round(self.drone.getHeading()*180/pi)
+
+    def getNewTargets(self) -> list[Position] :
+        """
+        Get the targets of the set detected since the previous call.
+        """
+        if self.targets is None :
+            return []
+        return [self.targets.getPosition(i) for i in self.targets.getEvents()]
+
+    def countDetectedTargets(self) -> int :
+        return 0 if self.targets is None else self.targets.countDetected()
+
+    def getCoverage(self) -> float :
+        return 0.0 if self.coverage is None else self.coverage.getCoverage()
+
+    def getMissionTime(self) -> float|None :
+        return self.drone.getMissionTime()
+
+    def exportFlight(self, filename:str, fps:float=5, workers:int=None) -> int :
+        """
+        Export the recorded flight of the drone as an animation, rendered offscreen (see viewerexport.exportFlight).
+        The simulation must record the flight (Simulation(record=True)).
+        :param filename: a .gif or .mp4 file, or else a directory for the PNG frames
+        :return: the number of frames
+        """
+        if self.drone is None or self.drone.recorder is None :
+            raise Exception("The flight is not recorded (see Simulation(record=True))")
+        from viewerexport import exportFlight
+        return exportFlight(self.drone.recorder, self.room, filename, self.target, fps, workers=workers)
@@ -0,0 +1,266 @@
+"""
+Export d'un vol enregistré (voir dronecore.trajectory) en animation, sans fenêtre :
+les images sont dessinées par matplotlib avec le moteur Agg, une image par commande.
+La scène fixe (axes, murs, obstacles, cible) n'est dessinée qu'une fois par processus
+et gardée comme fond ; pour chaque image, seuls la trajectoire, le drone (Arrow3D)
+et le titre sont redessinés. Les images sont réparties entre les processus d'un pool,
+puis assemblées en GIF, en MP4 (avec ffmpeg) ou gardées comme suite d'images PNG.
+
+Usage : python viewerexport.py flight.npz "(0 0, 500 0, 500 500, 0 500, 0 0)" -o flight.gif
+"""
+import argparse
+import os
+import pathlib
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image, GifImagePlugin
+from dronecore import *
+from dronecore.dronebatch import COMMAND_CODES, RESULT_CODES
+from dronecore.trajectory import TrajectoryRecorder
+from mplext import Arrow3D, SceneArtists
+
+FRAME_NAME = "frame{:05d}.png"
+"""
+The name of the image files of the frames (numbered from 0).
+"""
+
+def getScene(room:ARoom, target:Position=None) -> dict :
+    """
+    Get the fixed part of the scene, as plain data (sent to the processes that draw the frames) :
+    the walls on the floor and under the ceiling (see getWalls2D), the edges of the obstacles,
+    the limits of the room and the target.
+    """
+    return {"limits": (room.getLengthX(), room.getLengthY(), room.getHeight()),
+            "walls": [room.getWalls2D(), room.getWalls2D(h=room.getHeight())],
+            "obstacles": [o.getEdges3D(room.getHeight()) for o in room.getObstacles()],
+            "target": None if target is None else (target.x, target.y, target.z)}
+
+class FrameRenderer :
+    """
+    An offscreen renderer (Agg) of the frames of a recorded flight : the fixed scene is drawn once,
+    then each frame only draws the flight artists over the saved background.
+    """
+
+    def __init__(self, scene:dict, size:float=6, dpi:int=80):
+        """
+        :param scene: the fixed scene (see getScene)
+        :param size: the size of the figure (in inches)
+        :param dpi: the resolution of the figure (the frames are size*dpi pixels wide)
+        """
+        self.fig = Figure(figsize=(size, size), dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot(1, 1, 1, projection="3d")
+        self.fig.tight_layout()
+        ax = self.ax
+        lx, ly, h = scene["limits"]
+        ax.view_init(20, 20)
+        ax.set_xlim(-0.5, lx + 0.5)
+        ax.set_ylim(-0.5, ly + 0.5)
+        ax.set_zlim(-0.5, h + 0.5)
+        ax.set_xlabel('X')
+        ax.set_ylabel('Y')
+        ax.set_zlabel('Z')
+        floor, ceiling = scene["walls"]
+        target = None if scene["target"] is None else Position(*scene["target"])
+        self.scene = SceneArtists(ax, floor, ceiling, scene["obstacles"], target, guides=False)
+        # the flight artists, drawn over the background
+        self.trajectory, = ax.plot([], [], [], color=(.2, .5, .2), alpha=0.8, linestyle="--", linewidth=2)
+        self.ground, = ax.plot([], [], [], color=(.8, .8, .8), linewidth=1)
+        self.crash, = ax.plot([], [], [], linestyle="", marker="X", markersize=10, color=(.9, .4, .3))
+        self.marker = Arrow3D(0, 0, 0, 0, 0, 0, mutation_scale=15, ec='green', fc=(.2, .7, .2))
+        ax.add_artist(self.marker)
+        self.title = self.fig.text(0.5, 0.97, "", ha="center", va="top")
+        self.artists = [self.ground, self.trajectory, self.crash, self.marker]
+        for a in self.artists + [self.title] :
+            a.set_animated(True)
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+
+    def render(self, steps:np.ndarray, i:int) -> np.ndarray :
+        """
+        Render the frame of a step : the trajectory up to the step, and the drone after the step.
+        :param steps: the recorded steps (see TrajectoryRecorder.getSteps)
+        :param i: the index of the step
+        :return: the image (height x width x 3, RGB), valid until the next call
+        """
+        s = steps[:i+1]
+        x = s["x"].astype(np.float64)
+        y = s["y"].astype(np.float64)
+        z = s["z"].astype(np.float64)
+        self.trajectory.set_data_3d(x, y, z)
+        # the vertical segments to the ground, after the horizontal moves (separated by NaN values)
+        moved = np.flatnonzero((x[1:] != x[:-1]) | (y[1:] != y[:-1])) + 1
+        nan = np.full(len(moved), np.nan)
+        self.ground.set_data_3d(np.column_stack((x[moved], x[moved], nan)).ravel(),
+                                np.column_stack((y[moved], y[moved], nan)).ravel(),
+                                np.column_stack((z[moved], np.zeros(len(moved)), nan)).ravel())
+        step = steps[i]
+        crashed = int(step["state"]) == DroneState.KO.value
+        if crashed :
+            self.crash.set_data_3d([x[-1]], [y[-1]], [z[-1]])
+        else :
+            self.crash.set_data_3d([], [], [])
+            dx = 50.0 * np.cos(float(step["heading"]))
+            dy = 50.0 * np.sin(float(step["heading"]))
+            self.marker.set_data_3d(x[-1] - dx / 2, y[-1] - dy / 2, z[-1], dx, dy, 0)
+        self.marker.set_visible(not crashed)
+        command = COMMAND_CODES[step["command"]]
+        amount = "" if command.unit is None else " {} {}".format(int(step["amount"]), command.unit)
+        self.title.set_text("{}/{} - {}{} - {}{}".format(i + 1, len(steps), command.value, amount,
+                                                          RESULT_CODES[step["result"]].name, " - Crash !" if crashed else ""))
+        self.canvas.restore_region(self.background)
+        for a in self.artists :
+            self.ax.draw_artist(a)
+        self.fig.draw_artist(self.title)
+        return np.asarray(self.canvas.buffer_rgba())[:, :, :3]
+
+def _renderPNG(scene:dict, steps:np.ndarray, first:int, last:int, size:float, dpi:int, folder:str, colors:int) -> int :
+    """
+    Render the frames of the steps first to last-1 into PNG files (run in a worker process).
+    :param colors: the number of colors of the frames (0 to keep them in RGB, without compression)
+    :return: the number of frames
+    """
+    renderer = FrameRenderer(scene, size, dpi)
+    for i in range(first, last) :
+        image = Image.fromarray(renderer.render(steps, i))
+        if colors > 0 :
+            # a palette image is much faster to compress, and the frames have few colors
+            image = image.quantize(colors, method=Image.Quantize.FASTOCTREE)
+        image.save(os.path.join(folder, FRAME_NAME.format(i)), compress_level=1 if colors > 0 else 0)
+    return last - first
+
+def _renderGIF(scene:dict, steps:np.ndarray, first:int, last:int, size:float, dpi:int, duration:int) -> list[bytes] :
+    """
+    Render the frames of the steps first to last-1 as encoded GIF frames (run in a worker process) :
+    each frame only holds the rectangle that changed since the previous frame, drawn over it, with
+    its own palette, the unchanged pixels of the rectangle being transparent (they compress well).
+    The frames of all the processes are then simply concatenated.
+    :param duration: the duration of a frame (in ms)
+    :return: the encoded frames
+    """
+    renderer = FrameRenderer(scene, size, dpi)
+    previous = renderer.render(steps, first - 1).copy() if first > 0 else None
+    frames = []
+    for i in range(first, last) :
+        image = renderer.render(steps, i)
+        changed = None if previous is None else (image != previous).any(axis=2)
+        rows = [0, image.shape[0] - 1] if changed is None else np.flatnonzero(changed.any(axis=1))
+        columns = [0, image.shape[1] - 1] if changed is None else np.flatnonzero(changed.any(axis=0))
+        if len(rows) == 0 :
+            rows = columns = [0]
+        y0, y1, x0, x1 = int(rows[0]), int(rows[-1]) + 1, int(columns[0]), int(columns[-1]) + 1
+        # 255 colors : the last index is the transparent one
+        part = Image.fromarray(image[y0:y1, x0:x1]).quantize(255, method=Image.Quantize.FASTOCTREE)
+        if changed is not None :
+            pixels = np.asarray(part).copy()
+            pixels[~changed[y0:y1, x0:x1]] = 255
+            palette = part.getpalette()
+            part = Image.fromarray(pixels, "P")
+            part.putpalette(palette + [0] * (768 - len(palette)))
+        frames.append(b"".join(GifImagePlugin.getdata(part, (x0, y0), duration=duration, transparency=255,
+                                                      include_color_table=True)))
+        previous = image.copy()
+    return frames
+
+def _parallel(function, n:int, workers:int, *args) -> list :
+    """
+    Run function(first, last, *args) on contiguous ranges of the n frames, in a pool of processes
+    (each one renders its ranges with its own FrameRenderer).
+    :param workers: the number of processes (default : number of CPUs ; 1 to render in this process)
+    :return: the results of the ranges, in order
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, n))
+    if workers == 1 :
+        return [function(args[0], args[1], 0, n, *args[2:])]
+    # two ranges per process, to balance the end of the rendering
+    bounds = np.linspace(0, n, 2*workers + 1).round().astype(int).tolist()
+    with ProcessPoolExecutor(max_workers=workers) as pool :
+        tasks = [pool.submit(function, args[0], args[1], a, b, *args[2:]) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        return [t.result() for t in tasks]
+
+def renderFrames(steps:np.ndarray, scene:dict, folder:str, size:float=6, dpi:int=80, workers:int=None, colors:int=256) -> int :
+    """
+    Render the frames of a flight into PNG files, in a pool of processes.
+    :param steps: the recorded steps (see TrajectoryRecorder.getSteps)
+    :param scene: the fixed scene (see getScene)
+    :param folder: the directory of the frames (see FRAME_NAME)
+    :param workers: the number of processes (default : number of CPUs ; 1 to render in this process)
+    :param colors: the number of colors of the frames (0 to keep them in RGB, without compression)
+    :return: the number of frames
+    """
+    return sum(_parallel(_renderPNG, len(steps), workers, scene, steps, size, dpi, folder, colors))
+
+def writeGIF(steps:np.ndarray, scene:dict, filename:str, fps:float=5, size:float=6, dpi:int=80, workers:int=None) -> int :
+    """
+    Render the frames of a flight and encode them as an animated GIF, in a pool of processes.
+    :param steps: the recorded steps (see TrajectoryRecorder.getSteps)
+    :param scene: the fixed scene (see getScene)
+    :param fps: the number of frames per second
+    :return: the number of frames
+    """
+    frames = [f for part in _parallel(_renderGIF, len(steps), workers, scene, steps, size, dpi, round(1000 / fps)) for f in part]
+    width = height = int(size * dpi) # the size of the canvas (see FigureCanvasAgg)
+    with open(filename, "wb") as f :
+        # the header (no global palette), and the extension to loop forever
+        f.write(b"GIF89a" + width.to_bytes(2, "little") + height.to_bytes(2, "little") + bytes((0, 0, 0)))
+        f.write(b"!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00")
+        for frame in frames :
+            f.write(frame)
+        f.write(b";")
+    return len(frames)
+
+def exportFlight(recorder:TrajectoryRecorder, room:ARoom, filename:str, target:Position=None, fps:float=5,
+                 size:float=6, dpi:int=80, workers:int=None) -> int :
+    """
+    Export a recorded flight as an animation, one frame per recorded step.
+    :param recorder: the recorded flight (see Simulation(record=True))
+    :param room: the room of the flight
+    :param filename: a .gif or .mp4 file (MP4 needs ffmpeg), or else a directory for the PNG frames
+    :param target: the target, if any
+    :param fps: the number of frames per second of the animation
+    :param size: the size of the frames (in inches)
+    :param dpi: the resolution of the frames (the frames are size*dpi pixels wide)
+    :param workers: the number of processes that render the frames (default : number of CPUs)
+    :return: the number of frames
+    """
+    steps = recorder.getSteps().copy()
+    if len(steps) == 0 :
+        raise Exception("No recorded step to export")
+    scene = getScene(room, target)
+    suffix = pathlib.Path(filename).suffix.lower()
+    if suffix not in (".gif", ".mp4") :
+        os.makedirs(filename, exist_ok=True)
+        return renderFrames(steps, scene, filename, size, dpi, workers)
+    if suffix == ".gif" :
+        return writeGIF(steps, scene, filename, fps, size, dpi, workers)
+    ffmpeg = shutil.which(matplotlib.rcParams["animation.ffmpeg_path"])
+    if ffmpeg is None :
+        raise Exception("ffmpeg is needed to export a MP4 file (see matplotlib.rcParams['animation.ffmpeg_path'])")
+    with tempfile.TemporaryDirectory() as folder :
+        n = renderFrames(steps, scene, folder, size, dpi, workers, colors=0)
+        subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-framerate", str(fps), "-i", os.path.join(folder, "frame%05d.png"),
+                        "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", filename], check=True)
+    return n
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export a recorded flight (.npz, see TrajectoryRecorder.save) as an animation.")
+    parser.add_argument("flight", help="the recorded flight (.npz)")
+    parser.add_argument("room", help="the outline of the room (WKT coordinates)")
+    parser.add_argument("--height", type=int, default=250, help="the height of the room (cm)")
+    parser.add_argument("--target", type=float, nargs=3, default=None, help="the position of the target (x y z)")
+    parser.add_argument("-o", "--output", default="flight.gif", help="the .gif or .mp4 file, or a directory for the PNG frames")
+    parser.add_argument("--fps", type=float, default=5, help="the number of frames per second")
+    parser.add_argument("--dpi", type=int, default=80, help="the resolution of the frames")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="the number of worker processes")
+    args = parser.parse_args()
+    from dronecore.roomshply import RoomShp
+    target = None if args.target is None else Position(*args.target)
+    n = exportFlight(TrajectoryRecorder.load(args.flight), RoomShp(args.room, args.height), args.output, target,
+                     args.fps, dpi=args.dpi, workers=args.workers)
+    print("{} frames written in {}".format(n, args.output))
@@ -8,6 +8,11 @@ class ViewerBasicMPL(AViewer) :
     A drone viewer based uniquely on matplotlib.
     """
 
+    delay = 1.0
+    """
+    The pause after each displayed command (in seconds) ; with 0, the figure is drawn without pause.
+    """
+
     def __init__(self, drone : ADrone, room : ARoom, target : Position = None, showDegrees : bool = True):
         super().__init__(drone, room, target, showDegrees)
         self.fig, self.ax = plt.subplots(1, 1, subplot_kw={"projection":"3d"}, figsize=(6,6))
@@ -16,41 +21,79 @@ class ViewerBasicMPL(AViewer) :
         self.ax.set_xlim(-0.5, self.room.getLengthX()+0.5)
         self.ax.set_ylim(-0.5, self.room.getLengthY()+0.5)
         self.ax.set_zlim(-0.5, self.room.getHeight()+0.5)
-        x, y, z = room.getWalls2D()
-        self.ax.plot(x, y, z, color=(.8, .4, .4), linewidth=5)
-        if target is not None :
-            self.ax.scatter(target.x, target.y, target.z, color=(.4, .2, .8), edgecolors='red', marker="D", s=80)
-        plt.pause(1.0)
+        # the static scene, cached as the background of the flight
+        self.scene = mplext.SceneArtists(self.ax, room.getWalls2D(),
+                                         obstacles=[o.getEdges3D(room.getHeight()) for o in room.getObstacles()],
+                                         target=target, guides=False)
+        self.flight = mplext.FlightArtists(self.ax, mutation_scale=10, animated=True)
+        self.layer = mplext.BlitLayer(self.fig.canvas, self.flight.artists)
+        if self.delay > 0 :
+            plt.pause(self.delay)
+        else :
+            self.fig.canvas.draw()
 
     def display(self, message:str=None):
         if message is None :
             if self.drone.getState()==DroneState.KO :
                 print(">>>>>> Drone is KO - Program stopped <<<<<<")
             print(self.getStateString()," [", self.drone.getCommand(),"]")
-            p1=self.drone.getPreviousPosition()
-            p2=self.drone.getCurrentPosition()
-            # draw the current position to ground segment
-            if p1.x!=p2.x or p1.y!=p2.y :
-                x_values = [p2.x, p2.x]
-                y_values = [p2.y, p2.y]
-                z_values = [p2.z, 0]
-                self.ax.plot(x_values, y_values, z_values, color=(.8, .8, .8), linewidth=1)
-            # draw the previous to current position segment
-            x_values = [p1.x, p2.x]
-            y_values = [p1.y, p2.y]
-            z_values = [p1.z, p2.z]
-            self.ax.plot(x_values, y_values, z_values, color=(.2, .5, .2), alpha=0.8, linestyle="--", linewidth=2)
-            # draw the drone
-            if self.drone.getState() != DroneState.KO :
-                #self.ax.scatter(p2.x, p2.y, p2.z, color=(.2, .7, .2), edgecolors='green', marker=">", s=60)
-                dx=50.0*cos(p2.heading)
-                dy=50.0*sin(p2.heading)
-                self.ax.arrow3D(p2.x-dx/2, p2.y-dy/2, p2.z,
-                                dx, dy, 0,
-                                mutation_scale=10, ec ='green', fc=(.2, .7, .2))
-            else :
-                self.ax.scatter(p2.x, p2.y, p2.z, color=(.9, .4, .3), marker="X", s=80)
-            plt.pause(1.0)
+            # the flight is updated in place and drawn over the cached scene
+            self.flight.update(self.drone.getPreviousPosition(), self.drone.getCurrentPosition(),
+                               self.drone.getState() == DroneState.KO)
+            self._pause()
         else :
             print(">>>",message,"<<<")
 
+    def _pause(self):
+        self.layer.update()
+        if self.delay > 0 :
+            # plt.pause would draw the whole figure again
+            self.fig.canvas.start_event_loop(self.delay)
+
+
+class ViewerSwarmMPL :
+    """
+    A viewer of a swarm of drones (see dronecore.swarm.Swarm) based on matplotlib : the room,
+    and one marker per drone (green in flight, grey on the ground, red when KO), moved in place.
+    """
+
+    delay = 0.2
+    """
+    The pause after each displayed command (in seconds) ; with 0, the figure is drawn without pause.
+    """
+
+    def __init__(self, swarm):
+        self.swarm = swarm
+        room = swarm.room
+        self.fig, self.ax = plt.subplots(1, 1, subplot_kw={"projection":"3d"}, figsize=(6,6))
+        self.fig.tight_layout()
+        self.ax.view_init(20, 20)
+        self.ax.set_xlim(-0.5, room.getLengthX()+0.5)
+        self.ax.set_ylim(-0.5, room.getLengthY()+0.5)
+        self.ax.set_zlim(-0.5, room.getHeight()+0.5)
+        self.scene = mplext.SceneArtists(self.ax, room.getWalls2D(),
+                                         obstacles=[o.getEdges3D(room.getHeight()) for o in room.getObstacles()],
+                                         target=swarm.target, guides=False)
+        # one artist per state of the drones
+        self.markers = {DroneState.INFLIGHT.value : self.ax.plot([], [], [], linestyle="", marker="o", markersize=4, color=(.2, .7, .2))[0],
+                        DroneState.ONGROUND.value : self.ax.plot([], [], [], linestyle="", marker="o", markersize=4, color=(.6, .6, .6))[0],
+                        DroneState.KO.value : self.ax.plot([], [], [], linestyle="", marker="X", markersize=7, color=(.9, .4, .3))[0]}
+        self.title = self.ax.set_title("")
+        # the markers and the title are drawn over the cached scene
+        self.layer = mplext.BlitLayer(self.fig.canvas, list(self.markers.values()) + [self.title])
+        if self.delay > 0 :
+            plt.pause(self.delay)
+        self.display()
+
+    def display(self, message:str=None):
+        if message is not None :
+            print(">>>", message, "<<<")
+            return
+        s = self.swarm
+        for state, marker in self.markers.items() :
+            m = s.state == state
+            marker.set_data_3d(s.x[m], s.y[m], s.z[m])
+        self.title.set_text("{} in flight, {} KO".format(s.countState(DroneState.INFLIGHT), s.countState(DroneState.KO)))
+        self.layer.update()
+        if self.delay > 0 :
+            self.fig.canvas.start_event_loop(self.delay)
@@ -3,12 +3,12 @@ import tkinter as tk
 import tkinter.ttk as ttk
 from idlelib.tooltip import Hovertip
 from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg, NavigationToolbar2Tk)
-import dronecmds
 from dronecore import *
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from PIL import Image, ImageTk
 import pathlib
+from mplext import FlightArtists, SceneArtists, BlitLayer
 
 class ViewerTkMPL(AViewer):
     """
@@ -20,9 +20,16 @@ class ViewerTkMPL(AViewer):
     The directory that holds this viewer module.
     """
 
-    def __init__(self, drone: ADrone, room: ARoom, target: Position = None, progfunc=None, showDegrees: bool = True):
+    def __init__(self, drone: ADrone, room: ARoom, target: Position = None, progfunc=None, showDegrees: bool = True,
+                 simulation=None, incremental: bool = True):
         super().__init__(drone, room, target, showDegrees)
         self.progfunc = progfunc
+        self.simulation = simulation # the simulation that owns the viewer (used to reset the target)
+        self.incremental = incremental # True to update the same artists in place, False to add new artists for each command
+        self.flight:FlightArtists|None = None # the artists of the flight (incremental mode)
+        self.scene:SceneArtists|None = None # the artists of the room and the target, built once
+        self.layer:BlitLayer|None = None # the flight drawn over the cached scene (incremental mode)
+        self.added = [] # the artists added for each command (not incremental mode)
         self.running = False
         # Creation of the main window
         self.window = tk.Tk()
@@ -64,6 +71,8 @@ class ViewerTkMPL(AViewer):
         self.fig.tight_layout()
         # Get the tkinter canvas and toolbar from the Matplotlib chart
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.window)
+        if self.flight is not None :
+            self.layer = BlitLayer(self.canvas, self.flight.artists)
         self.canvas.draw()
         self.mpltoolbar = NavToolbarTk(self.canvas, self.window)
         self.mpltoolbar.update()
@@ -87,11 +96,21 @@ class ViewerTkMPL(AViewer):
             self._setRunning(True)
             self.window.update()
 
-    def _drawFigure(self):
+    def _drawFigure(self) -> bool :
         """
-        Draw the matplotlib figure with the axis, the walls and the target.
+        Prepare the matplotlib figure : the axis, the walls and the target are built the first time,
+        then only the target is moved and the previous flight is removed.
+        :return: True if the static part of the figure changed (its background must be drawn again)
         """
-        self.ax.clear()
+        if self.scene is not None :
+            changed = self.scene.position is not self.target or len(self.added) > 0
+            self.scene.setTarget(self.target)
+            for a in self.added :
+                a.remove()
+            self.added = []
+            if self.flight is not None :
+                self.flight.reset()
+            return changed
         self.ax.view_init(20, 20)
         self.ax.set_xlim(-0.5, self.room.getLengthX() + 0.5)
         self.ax.set_ylim(-0.5, self.room.getLengthY() + 0.5)
@@ -99,31 +118,22 @@ class ViewerTkMPL(AViewer):
         self.ax.set_xlabel('X')
         self.ax.set_ylabel('Y')
         self.ax.set_zlabel('Z')
-        # Draw walls
-        x, y, z = self.room.getWalls2D()
-        self.ax.plot(x, y, z, color=(.8, .4, .4), linewidth=5)
-        x, y, z = self.room.getWalls2D(h=self.room.getHeight())
-        self.ax.plot(x, y, z, color=(.8, .4, .4), linewidth=4)
-        # Draw target if any
-        if self.target is not None:
-            self.ax.scatter(self.target.x, self.target.y, self.target.z,
-                            color=(.4, .2, .8), edgecolors='red', marker="D", s=80)
-            x = [self.target.x, self.target.x]
-            y = [self.target.y, self.target.y]
-            z = [self.target.z, 0]
-            self.ax.plot(x, y, z, color='red', linestyle="--", linewidth=1)
-            x = [0, 0]
-            y = [self.target.y, self.target.y]
-            z = [self.target.z, 0]
-            self.ax.plot(x, y, z, color=(.8, .8, .8), linestyle="--", linewidth=1)
-            self.ax.scatter(0, self.target.y, self.target.z,
-                            color=(.8, .8, .8), marker="D", s=80)
-            x = [self.target.x, self.target.x]
-            y = [0, 0]
-            z = [self.target.z, 0]
-            self.ax.plot(x, y, z, color=(.8, .8, .8), linestyle="--", linewidth=1)
-            self.ax.scatter(self.target.x, 0, self.target.z,
-                            color=(.8, .8, .8), marker="D", s=80)
+        # Walls, obstacles and target (with its projections)
+        h = self.room.getHeight()
+        self.scene = SceneArtists(self.ax, self.room.getWalls2D(), self.room.getWalls2D(h=h),
+                                  [o.getEdges3D(h) for o in self.room.getObstacles()], self.target)
+        if self.incremental :
+            self.flight = FlightArtists(self.ax, animated=True)
+        return True
+
+    def _redraw(self, changed:bool=True):
+        """
+        Draw the figure : only the flight over the cached scene, or the whole figure if the scene changed.
+        """
+        if self.layer is not None and not changed :
+            self.layer.update()
+        else :
+            self.canvas.draw()
 
     def createImgTk(self, name):
         """
@@ -140,18 +150,19 @@ class ViewerTkMPL(AViewer):
         Reset the target's position.
         """
         if not self.running :
-            dronecmds.createTarget()
-            self.target=dronecmds.target
-            self._drawFigure()
-            self.canvas.draw()
+            if self.simulation is not None :
+                self.simulation.createTarget()
+                self.target=self.simulation.target
+            else :
+                self.target=self.room.getRandomPosition()
+            self._redraw(self._drawFigure())
 
     def run(self):
         """
         Run the function self.progfunc if it exists.
         """
         if self.progfunc is not None:
-            self._drawFigure()
-            self.canvas.draw()
+            self._redraw(self._drawFigure())
             self._setRunning(True)
             self.drone.state = DroneState.ONGROUND
             self.progfunc()
@@ -188,31 +199,37 @@ class ViewerTkMPL(AViewer):
             self.infolbl.config(text=self.getStateString()+"\n["+str(self.drone.getCommand())+"]")
             p1 = self.drone.getPreviousPosition()
             p2 = self.drone.getCurrentPosition()
+            if self.flight is not None :
+                # update the artists in place, and draw them over the cached scene
+                self.flight.update(p1, p2, self.drone.getState() == DroneState.KO)
+                self._redraw(False)
+                self._pause_update(5)
+                return
             # draw the current position to ground segment
             if p1.x != p2.x or p1.y != p2.y:
                 x_values = [p2.x, p2.x]
                 y_values = [p2.y, p2.y]
                 z_values = [p2.z, 0]
-                self.ax.plot(x_values, y_values, z_values, color=(.8, .8, .8), linewidth=1)
+                self.added += self.ax.plot(x_values, y_values, z_values, color=(.8, .8, .8), linewidth=1)
             # draw the previous to current position segment
             x_values = [p1.x, p2.x]
             y_values = [p1.y, p2.y]
             z_values = [p1.z, p2.z]
-            self.ax.plot(x_values, y_values, z_values, color=(.2, .5, .2), alpha=0.8, linestyle="--", linewidth=2)
+            self.added += self.ax.plot(x_values, y_values, z_values, color=(.2, .5, .2), alpha=0.8, linestyle="--", linewidth=2)
             # draw the drone
             if self.drone.getState() != DroneState.KO:
                 dx = 50.0 * cos(p2.heading)
                 dy = 50.0 * sin(p2.heading)
-                self.ax.arrow3D(p2.x - dx / 2, p2.y - dy / 2, p2.z,
-                                dx, dy, 0,
-                                mutation_scale=15, ec='green', fc=(.2, .7, .2))
+                self.added.append(self.ax.arrow3D(p2.x - dx / 2, p2.y - dy / 2, p2.z,
+                                                  dx, dy, 0,
+                                                  mutation_scale=15, ec='green', fc=(.2, .7, .2)))
             else:
-                self.ax.scatter(p2.x, p2.y, p2.z, color=(.9, .4, .3), marker="X", s=80)
-                self.ax.annotate3D('Crash !', (p2.x, p2.y, p2.z),
-                              xytext=(30, -30),
-                              textcoords='offset points',
-                              bbox=dict(boxstyle="round", fc="tomato"),
-                              arrowprops=dict(arrowstyle="-|>", ec='tomato', fc='black', lw=5))
+                self.added.append(self.ax.scatter(p2.x, p2.y, p2.z, color=(.9, .4, .3), marker="X", s=80))
+                self.added.append(self.ax.annotate3D('Crash !', (p2.x, p2.y, p2.z),
+                                                     xytext=(30, -30),
+                                                     textcoords='offset points',
+                                                     bbox=dict(boxstyle="round", fc="tomato"),
+                                                     arrowprops=dict(arrowstyle="-|>", ec='tomato', fc='black', lw=5)))
             self.canvas.draw()
             self._pause_update(5)
         else: